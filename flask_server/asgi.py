@@ -0,0 +1,37 @@
+# ASGI entry point serving the same routes as app.py:
+#     uvicorn asgi:app --port 5001
+#
+# Symptom scoring, PDF rendering and batch scoring run on the small
+# "compute" lane; lookups, uploads, job submission and polling on the larger
+# "io" lane, as do the image routes, which mostly wait on the remote image
+# fetch and on the micro-batching inference thread. Each lane admits a bounded number of requests and answers the
+# rest with 429 and Retry-After.
+import os
+
+from app import app as flask_app
+from asgi_adapter import BoundedASGIApp, Lane
+from metrics import REGISTRY, stats_collector
+
+# Paths (and their sub-paths) served on the compute lane
+COMPUTE_ROUTES = ['/predict', '/predict_doctor', '/generate_prescription', '/prescriptions/bulk']
+
+app = BoundedASGIApp(
+    flask_app,
+    lanes=[
+        Lane('compute',
+             workers=int(os.getenv("ASGI_COMPUTE_WORKERS", str(os.cpu_count() or 1))),
+             queue_size=int(os.getenv("ASGI_COMPUTE_QUEUE", "32"))),
+        Lane('io',
+             workers=int(os.getenv("ASGI_IO_WORKERS", "32")),
+             queue_size=int(os.getenv("ASGI_IO_QUEUE", "128"))),
+    ],
+    routes=[(prefix, 'compute') for prefix in COMPUTE_ROUTES],
+    default_lane='io',
+    stream_workers=int(os.getenv("ASGI_STREAM_WORKERS", "64")),
+    max_body_size=int(os.getenv("ASGI_MAX_BODY_BYTES", str(32 * 2**20))),
+    retry_after=int(os.getenv("ASGI_RETRY_AFTER_SECONDS", "1")))
+
+# Lane statistics are reported under 'asgi' at /stats
+flask_app.extensions['asgi'] = app
+for lane in app.lanes.values():
+    REGISTRY.register_collector(stats_collector('aarogya_asgi_lane', lane.stats, {'lane': lane.name}))
@@ -0,0 +1,245 @@
+import asyncio
+import contextvars
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from metrics import Histogram
+
+
+QUEUE_WAIT_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+
+
+class Lane:
+    """A sized thread pool for one class of routes with admission control.
+
+    At most ``workers`` requests run and ``queue_size`` more wait; anything
+    beyond that is rejected at once, so an overloaded lane sheds load with
+    429s instead of building an unbounded queue.  Counters are only touched
+    from the event loop thread.
+    """
+
+    def __init__(self, name, workers, queue_size):
+        self.name = name
+        self.workers = workers
+        self.queue_size = queue_size
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f'asgi-{name}')
+        self.queue_waits = Histogram(QUEUE_WAIT_BUCKETS)
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def try_admit(self):
+        if self.in_flight >= self.workers + self.queue_size:
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'queue_size': self.queue_size,
+            'in_flight': self.in_flight,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'queue_wait_seconds': self.queue_waits.snapshot(),
+        }
+
+
+# PEP 3333 environ for an ASGI HTTP scope and its fully read body
+def wsgi_environ(scope, body):
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f'HTTP_{name}'
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    # The body is already read in full, chunked uploads included
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+class BoundedASGIApp:
+    """Serves a WSGI app (the Flask app) over ASGI.
+
+    Connections, request bodies and slow clients are handled on the event
+    loop; each request's handler runs on the thread pool of the lane its
+    path belongs to, so model and rendering work cannot starve lookups and
+    job polling.  Streamed responses (NDJSON batches, server-sent events)
+    are pulled chunk by chunk on a separate pool after the request leaves
+    its lane.  The app call and every step of its stream run in one
+    ``contextvars.Context``, so Flask's ``stream_with_context`` can push and
+    pop its contexts from whichever stream thread pulls the chunk.
+    """
+
+    def __init__(self, wsgi_app, lanes, routes, default_lane, stream_workers=64,
+                 max_body_size=32 * 2**20, retry_after=1):
+        self.wsgi_app = wsgi_app
+        self.lanes = {lane.name: lane for lane in lanes}
+        # (path prefix, lane name), longest prefix first; a prefix matches
+        # whole path segments, so '/predict' does not match '/predict_doctor'
+        self.routes = sorted(routes, key=lambda route: -len(route[0]))
+        self.default_lane = default_lane
+        self.stream_executor = ThreadPoolExecutor(max_workers=stream_workers,
+                                                  thread_name_prefix='asgi-stream')
+        self.max_body_size = max_body_size
+        self.retry_after = retry_after
+
+    def lane_for(self, path):
+        for prefix, name in self.routes:
+            if path == prefix or path.startswith(prefix.rstrip('/') + '/'):
+                return self.lanes[name]
+        return self.lanes[self.default_lane]
+
+    def stats(self):
+        return {name: lane.stats() for name, lane in self.lanes.items()}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self._http(scope, receive, send)
+        else:
+            raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                for lane in self.lanes.values():
+                    lane.executor.shutdown(wait=False, cancel_futures=True)
+                self.stream_executor.shutdown(wait=False, cancel_futures=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def _send_json(send, status, payload, headers=()):
+        body = json.dumps(payload).encode()
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'application/json'),
+                                (b'content-length', str(len(body)).encode()), *headers]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _read_body(self, receive):
+        chunks, size = [], 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return None
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body_size:
+                raise OverflowError
+            chunks.append(chunk)
+            if not message.get('more_body', False):
+                return b''.join(chunks)
+
+    # Runs on a lane thread: call the app and buffer the response unless it
+    # is streamed (no Content-Length), in which case the iterator is returned
+    # with the Context it must keep running in
+    def _call_wsgi(self, environ, lane, queued_at):
+        lane.queue_waits.observe(time.perf_counter() - queued_at)
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'], started['headers'] = status, headers
+
+        context = contextvars.copy_context()
+        result = context.run(self.wsgi_app, environ, start_response)
+        headers = started['headers']
+        if any(name.lower() == 'content-length' for name, _ in headers):
+            try:
+                return started['status'], headers, b''.join(result), None
+            finally:
+                if hasattr(result, 'close'):
+                    context.run(result.close)
+        return started['status'], headers, b'', (result, context)
+
+    async def _http(self, scope, receive, send):
+        lane = self.lane_for(scope['path'])
+        if not lane.try_admit():
+            await self._send_json(send, 429, {'error': 'Server busy, retry later'},
+                                  [(b'retry-after', str(self.retry_after).encode())])
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            try:
+                body = await self._read_body(receive)
+            except OverflowError:
+                await self._send_json(send, 413, {'error': 'Request body too large'})
+                return
+            if body is None:
+                return
+            status, headers, content, stream = await loop.run_in_executor(
+                lane.executor, self._call_wsgi, wsgi_environ(scope, body), lane,
+                time.perf_counter())
+        except Exception as e:
+            logging.error(f"Error occurred: {str(e)}", exc_info=True)
+            await self._send_json(send, 500, {'error': str(e)})
+            return
+        finally:
+            lane.release()
+
+        await send({'type': 'http.response.start', 'status': int(status.split(' ', 1)[0]),
+                    'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                for name, value in headers]})
+        if stream is None:
+            await send({'type': 'http.response.body', 'body': content})
+            return
+        await self._stream(*stream, receive, send)
+
+    async def _stream(self, stream, context, receive, send):
+        loop = asyncio.get_running_loop()
+        iterator = context.run(iter, stream)
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            while not disconnected.is_set():
+                chunk = await loop.run_in_executor(
+                    self.stream_executor, context.run, next, iterator, None)
+                if chunk is None or disconnected.is_set():
+                    break
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            if not disconnected.is_set():
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            watcher.cancel()
+            if hasattr(stream, 'close'):
+                await loop.run_in_executor(self.stream_executor, context.run, stream.close)
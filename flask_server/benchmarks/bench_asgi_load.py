@@ -0,0 +1,147 @@
+# Load test of the sync Werkzeug server (what app.run uses, without the
+# debugger) against the ASGI entry point under uvicorn, for the same routes.
+# MongoDB and Firebase are replaced by local stand-ins with a fixed latency,
+# so the mix exercises both lanes: /prescription/<id> waits on the "database"
+# and /predict_doctor runs the RandomForest.
+#
+# Run from the flask_server directory:
+#     python benchmarks/bench_asgi_load.py [concurrency] [seconds]
+
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+DB_LATENCY = 0.05
+PRESCRIPTIONS = 200
+SYMPTOMS = ['itching,skin rash', 'fever,cough,headache', 'chest pain,breathlessness',
+            'joint pain,fatigue', 'vomiting,abdominal pain']
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+# Child process: build the app with stand-ins and serve it until killed
+def serve(kind, port):
+    os.chdir(SERVER_DIR)
+    os.environ.update(SERVICE_BLUEPRINTS='doctor,prescriptions', WARM_UP='',
+                      PRESCRIPTION_CACHE_TTL='0')
+    import logging
+    from fakes import FakeBucket, FakeCollection
+    from prescriptions import prescription_pdf_url
+    from blueprints.common import services
+
+    class SlowCollection(FakeCollection):
+        def find_one(self, query, projection=None):
+            time.sleep(DB_LATENCY)
+            return super().find_one(query, projection)
+
+    bucket, collection = FakeBucket(), SlowCollection()
+    for i in range(PRESCRIPTIONS):
+        collection.insert_one({'prescription_id': f'rx-{i}',
+                               'firebase_path': prescription_pdf_url(bucket, f'rx-{i}')})
+    services.bucket, services.prescriptions = bucket, collection
+
+    if kind == 'asgi':
+        import uvicorn
+        from asgi import app
+        from blueprints.doctor import doctor
+        doctor.get()
+        logging.getLogger().setLevel(logging.WARNING)
+        uvicorn.run(app, host='127.0.0.1', port=port, log_level='warning')
+    else:
+        from werkzeug.serving import make_server
+        from app import app
+        from blueprints.doctor import doctor
+        doctor.get()
+        logging.getLogger().setLevel(logging.WARNING)
+        make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+
+def wait_until_up(base_url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            requests.get(base_url + '/startup', timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server at {base_url} did not start')
+
+
+def run_load(base_url, concurrency, seconds):
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + seconds
+
+    def user(seed):
+        rng = random.Random(seed)
+        session = requests.Session()
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                if rng.random() < 0.7:
+                    status = session.get(
+                        f"{base_url}/prescription/rx-{rng.randrange(PRESCRIPTIONS)}").status_code
+                else:
+                    status = session.post(f"{base_url}/predict_doctor",
+                                          json={'symptoms': rng.choice(SYMPTOMS)}).status_code
+            except requests.RequestException:
+                status = 'error'
+            elapsed = time.perf_counter() - start
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 200:
+                    latencies.append(elapsed)
+
+    threads = [threading.Thread(target=user, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else float('nan')
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f"{concurrency} concurrent clients for {seconds:.0f} s, database latency "
+          f"{DB_LATENCY * 1e3:.0f} ms, {os.cpu_count()} CPUs")
+    print(f"{'server':<8} {'ok/s':>8} {'p50 ms':>8} {'p99 ms':>8}  responses")
+    for kind in ('sync', 'asgi'):
+        port = free_port()
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', kind, str(port)],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            wait_until_up(base_url)
+            latencies, statuses = run_load(base_url, concurrency, seconds)
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{kind:<8} {len(latencies) / seconds:>8.1f} {percentile(latencies, 0.5) * 1e3:>8.1f} "
+              f"{percentile(latencies, 0.99) * 1e3:>8.1f}  "
+              f"{', '.join(f'{status}: {count}' for status, count in sorted(statuses.items(), key=str))}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--serve':
+        serve(sys.argv[2], int(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,79 @@
+# Latency comparison for /predict_doctor feature construction: the per-request
+# pandas DataFrame + .loc + reindex path vs. SymptomEncoder rows
+#
+# Run from the flask_server directory:
+#     python benchmarks/bench_doctor_encoder.py
+
+import os
+import random
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from symptom_encoder import SymptomEncoder  # noqa: E402
+
+
+def load_training_frame():
+    data = pd.read_csv(os.path.join(SERVER_DIR, "Dataset", "dataset.csv"))
+    symptoms = data['symptoms'].str.get_dummies(sep=',')
+    return symptoms.astype(np.float32), data['doctor']
+
+
+# The feature construction /predict_doctor used before SymptomEncoder
+def dataframe_row(columns, symptoms):
+    input_data = pd.DataFrame(columns=columns)
+    for symptom in [s for s in symptoms if s in columns]:
+        input_data.loc[0, symptom] = 1
+    return input_data.reindex(columns=columns, fill_value=0)
+
+
+def per_call_us(fn, number):
+    return timeit.timeit(fn, number=number) / number * 1e6
+
+
+def main():
+    X, y = load_training_frame()
+    encoder = SymptomEncoder(X.columns)
+    rng = random.Random(42)
+    requests = [rng.sample(encoder.columns, rng.randint(1, 6)) for _ in range(256)]
+
+    # Each path is measured against a model fitted the way it is fed
+    frame_model = RandomForestClassifier(n_estimators=100, random_state=42).fit(X, y)
+    array_model = RandomForestClassifier(n_estimators=100, random_state=42).fit(X.to_numpy(), y)
+    symptoms = requests[0]
+
+    print(f"{encoder.n_features} symptom columns, {len(X)} training rows\n")
+    print("encoding only (single request)")
+    print(f"  DataFrame + .loc + reindex : {per_call_us(lambda: dataframe_row(X.columns, symptoms), 200):9.1f}us")
+    print(f"  SymptomEncoder.encode      : {per_call_us(lambda: encoder.encode(symptoms), 2000):9.1f}us")
+
+    print("\nencode + predict (single request)")
+    print(f"  DataFrame path             : "
+          f"{per_call_us(lambda: frame_model.predict(dataframe_row(X.columns, symptoms)), 50):9.1f}us")
+    print(f"  SymptomEncoder path        : "
+          f"{per_call_us(lambda: array_model.predict(encoder.encode(symptoms)), 50):9.1f}us")
+
+    print(f"\nencode + predict ({len(requests)} requests)")
+    looped = per_call_us(lambda: [frame_model.predict(dataframe_row(X.columns, r)) for r in requests], 3)
+    batched = per_call_us(lambda: array_model.predict(encoder.encode_batch(requests)), 20)
+    print(f"  DataFrame path, one by one : {looped / 1e3:9.1f}ms")
+    print(f"  SymptomEncoder CSR batch   : {batched / 1e3:9.1f}ms  ({looped / batched:.0f}x)")
+
+    # The old reindex never filled the cells of the row it had just created,
+    # so unset symptoms reached the model as NaN rather than 0. The encoder
+    # must match the zero-filled intent exactly.
+    expected = [frame_model.predict(dataframe_row(X.columns, r).fillna(0))[0] for r in requests]
+    assert list(array_model.predict(encoder.encode_batch(requests))) == expected
+    legacy = [frame_model.predict(dataframe_row(X.columns, r))[0] for r in requests]
+    changed = sum(a != b for a, b in zip(legacy, expected))
+    print(f"\npredictions changed by filling unset symptoms with 0: {changed}/{len(requests)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Startup-time benchmark for the doctor recommendation model: the original
+# import-time one-hot loop + fit + training-set predict vs. the artifact store
+#
+# Run from the flask_server directory:
+#     python benchmarks/bench_doctor_startup.py
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from doctor_model import train_doctor_model  # noqa: E402
+from model_store import ModelArtifactStore  # noqa: E402
+
+DATASET = os.path.join(SERVER_DIR, "Dataset", "dataset.csv")
+
+
+# The startup sequence app.py ran before the artifact store
+def legacy_startup():
+    data = pd.read_csv(DATASET)
+    symptoms_list = data['symptoms'].str.split(',')
+    symptom_columns = list(
+        set(symptom for sublist in symptoms_list for symptom in sublist))
+    data = pd.concat([data, pd.DataFrame(columns=list(symptom_columns))], axis=1)
+    for index, symptoms in enumerate(symptoms_list):
+        data.loc[index, symptoms] = 1
+    data.drop('symptoms', axis=1, inplace=True)
+    data[symptom_columns] = data[symptom_columns].fillna(0)
+    X = data.drop(['disease', 'cures', 'doctor', 'risk level'], axis=1)
+    y = data['doctor']
+    model = RandomForestClassifier(n_estimators=100, random_state=42)
+    model.fit(X, y)
+    model.predict(X)
+    return model
+
+
+def timed(fn, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    try:
+        store = ModelArtifactStore(directory)
+
+        def cold():
+            shutil.rmtree(directory, ignore_errors=True)
+            store.load_or_train('doctor_model', DATASET, train_doctor_model)
+
+        def warm(mmap):
+            return lambda: store.load_or_train(
+                'doctor_model', DATASET, train_doctor_model, mmap=mmap)
+
+        print(f"legacy (one-hot loop + fit + predict) : {timed(legacy_startup) * 1e3:8.1f}ms")
+        print(f"artifact store, cold (train + save)   : {timed(cold) * 1e3:8.1f}ms")
+        print(f"artifact store, warm (hash + load)    : {timed(warm(False)) * 1e3:8.1f}ms")
+        print(f"artifact store, warm (hash + mmap)    : {timed(warm(True)) * 1e3:8.1f}ms")
+        size = os.path.getsize(store.artifact_path('doctor_model'))
+        print(f"artifact size                         : {size / 1024:8.1f}KiB")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Single-image CPU latency and memory of each image model as the original
+# .h5 Keras model (model.predict) and as every converted TFLite graph found
+# next to it (see tflite_models.py).  Each (model, format) pair runs in a
+# fresh interpreter so the resident memory it adds can be measured; the
+# runtime's own import is excluded.
+#
+# Run from the flask_server directory:
+#     python benchmarks/bench_image_model_formats.py [iterations]
+
+import json
+import os
+import subprocess
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from image_models import IMAGE_MODELS, QUANTIZATIONS, tflite_path  # noqa: E402
+
+PROBE = '''
+import json, os, sys, time
+import numpy as np
+
+def rss_mib():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+
+path, kind, iterations = sys.argv[1], sys.argv[2], int(sys.argv[3])
+if kind == 'keras':
+    import tensorflow as tf
+    from model_registry import load_keras_model as load
+else:
+    import tensorflow as tf
+    from tflite_models import load_tflite_model as load
+baseline = rss_mib()
+start = time.perf_counter()
+model = load(path)
+sample = np.random.default_rng(0).random((1,) + tuple(model.input_shape[1:]), dtype=np.float32)
+model.predict(sample, verbose=0)
+load_seconds = time.perf_counter() - start
+timings = []
+for _ in range(iterations):
+    start = time.perf_counter()
+    model.predict(sample, verbose=0)
+    timings.append(time.perf_counter() - start)
+timings.sort()
+print(json.dumps({
+    'load_seconds': load_seconds,
+    'p50_ms': timings[len(timings) // 2] * 1e3,
+    'p99_ms': timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1e3,
+    'rss_mib': rss_mib() - baseline,
+}))
+'''
+
+
+def measure(path, kind, iterations):
+    env = dict(os.environ, TF_CPP_MIN_LOG_LEVEL='3')
+    output = subprocess.run([sys.executable, '-c', PROBE, path, kind, str(iterations)],
+                            cwd=SERVER_DIR, env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    os.chdir(SERVER_DIR)
+    print(f"{'model':<14} {'format':<16} {'file MiB':>9} {'load s':>7} {'p50 ms':>8} "
+          f"{'p99 ms':>8} {'+RSS MiB':>9}")
+    for name, (keras_path, _) in IMAGE_MODELS.items():
+        variants = [('keras', keras_path)] + [(f'tflite {quantization}', tflite_path(keras_path, quantization))
+                                              for quantization in QUANTIZATIONS]
+        for label, path in variants:
+            if not os.path.exists(path):
+                continue
+            result = measure(path, label.split()[0], iterations)
+            print(f"{name:<14} {label:<16} {os.path.getsize(path) / 2**20:>9.2f} "
+                  f"{result['load_seconds']:>7.2f} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                  f"{result['rss_mib']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+# Per-image time and peak memory of image preprocessing: the original
+# open/resize/img_to_array/expand_dims/"/ 255.0" sequence vs. image_preprocessing
+#
+# Run from the flask_server directory:
+#     python benchmarks/bench_image_preprocessing.py
+
+import glob
+import os
+import sys
+import time
+import tracemalloc
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from image_preprocessing import ImageSpec, preprocess_batch, preprocess_image  # noqa: E402
+
+SAMPLES_DIR = os.path.join(os.path.dirname(SERVER_DIR), "Research Work", "Models + handwritten")
+
+
+# The sequence the image routes used before (img_to_array is np.asarray to float32)
+def legacy_preprocess(data, target_size):
+    img = Image.open(BytesIO(data))
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    img = img.resize(target_size)
+    img_array = np.asarray(img, dtype=np.float32)
+    img_array = np.expand_dims(img_array, axis=0)
+    return img_array / 255.0
+
+
+def measure(fn, repeat=20):
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    paths = sorted(glob.glob(os.path.join(SAMPLES_DIR, "*.jp*g")) +
+                   glob.glob(os.path.join(SAMPLES_DIR, "*.png")))
+    images = {os.path.basename(path): open(path, 'rb').read() for path in paths}
+
+    for target_size in ((150, 150), (224, 224)):
+        spec = ImageSpec(target_size)
+        print(f"\ntarget {target_size[0]}x{target_size[1]}")
+        for name, data in images.items():
+            with Image.open(BytesIO(data)) as img:
+                source = f"{img.format} {img.mode} {img.size[0]}x{img.size[1]}"
+            legacy_s, legacy_peak = measure(lambda: legacy_preprocess(data, target_size))
+            new_s, new_peak = measure(lambda: preprocess_image(data, spec))
+            print(f"  {name:12s} {source:22s} legacy {legacy_s * 1e3:6.2f}ms {legacy_peak / 2**20:6.2f}MiB"
+                  f"  new {new_s * 1e3:6.2f}ms {new_peak / 2**20:6.2f}MiB")
+
+        batch = list(images.values())
+        buffer = np.empty((len(batch),) + spec.shape, dtype=np.float32)
+        batch_s, batch_peak = measure(lambda: preprocess_batch(batch, spec, out=buffer))
+        print(f"  batch of {len(batch)} into a preallocated buffer: "
+              f"{batch_s / len(batch) * 1e3:6.2f}ms/image, peak {batch_peak / 2**20:.2f}MiB")
+
+
+if __name__ == "__main__":
+    main()
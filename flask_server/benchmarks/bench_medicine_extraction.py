@@ -0,0 +1,131 @@
+# Latency and recall of the local medicine extractor
+#
+# 1. The sample prescriptions in "Research Work/Models + handwritten", read
+#    with the bundled PaddleOCR models (skipped when paddleocr is missing).
+# 2. Synthetic prescriptions built from the drug list with one OCR-style
+#    character error per name, which always runs.
+#
+# Run from the flask_server directory:
+#     python benchmarks/bench_medicine_extraction.py
+
+import os
+import random
+import sys
+import time
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from medicine_extractor import MedicineExtractor, load_medicine_names, tokenize  # noqa: E402
+
+SAMPLES_DIR = os.path.join(os.path.dirname(SERVER_DIR), "Research Work", "Models + handwritten")
+DRUG_LIST = os.path.join(SERVER_DIR, "Dataset", "drugs_side_effects_drugs_com.csv.zip")
+
+# Medicines written on each sample, read by hand
+SAMPLE_LABELS = {
+    'doc.png': ['belladonna', 'amphojel'],
+    'doc1.jpg': ['betaloc', 'dorzolamide', 'cimetidine', 'oxprenolol'],
+    'doc1.png': ['amoxicillin'],
+    'doc2.jpg': ['augmentin', 'enzoflam', 'pan-d', 'hexigel'],
+}
+
+# Characters OCR commonly confuses in handwriting
+CONFUSIONS = {'c': 'e', 'e': 'c', 'i': 'l', 'l': 'i', 'm': 'n', 'n': 'm',
+              'o': 'a', 'a': 'o', 'u': 'v', 'r': 'n', 't': 'f'}
+
+
+def recall(extraction, labels):
+    found = {medicine.lower() for medicine in extraction.medicines}
+    return sum(label in found for label in labels), len(labels)
+
+
+def timed_extract(extractor, text):
+    start = time.perf_counter()
+    extraction = extractor.extract(text)
+    return extraction, time.perf_counter() - start
+
+
+def ocr_samples():
+    try:
+        from ocr_service import OCRService
+        ocr = OCRService(pool_size=1)
+    except ImportError:
+        print("paddleocr is not installed; skipping the sample prescriptions\n")
+        return None
+    return {name: ocr.recognize(os.path.join(SAMPLES_DIR, name), timeout=300)
+            for name in SAMPLE_LABELS}
+
+
+def bench_samples(extractor, known):
+    results = ocr_samples()
+    if results is None:
+        return
+    print(f"{'sample':<10} {'ocr ms':>8} {'extract ms':>11} {'recall':>7} {'confidence':>11} medicines")
+    total_found = total = 0
+    for name, labels in SAMPLE_LABELS.items():
+        extraction, seconds = timed_extract(extractor, results[name].text)
+        found, expected = recall(extraction, labels)
+        total_found, total = total_found + found, total + expected
+        ocr_ms = sum(results[name].timings.values()) * 1e3
+        print(f"{name:<10} {ocr_ms:>8.0f} {seconds * 1e3:>11.2f} {found:>3}/{expected:<3} "
+              f"{extraction.confidence:>11.2f} {extraction.medicines}")
+    missing = sorted(label for labels in SAMPLE_LABELS.values() for label in labels
+                     if label not in known)
+    print(f"recall {total_found}/{total}; not in the drug list: {missing}\n")
+
+
+def misspell(name, rng):
+    positions = [i for i, ch in enumerate(name) if ch in CONFUSIONS]
+    if not positions:
+        return name
+    i = rng.choice(positions)
+    return name[:i] + CONFUSIONS[name[i]] + name[i + 1:]
+
+
+def bench_synthetic(extractor, names, count=500, per_prescription=3, seed=0):
+    rng = random.Random(seed)
+    # Single-word names long enough for fuzzy matching
+    candidates = sorted({n.lower() for n in names
+                         if len(tokenize(n)) == 1 and n.isalpha() and len(n) >= 6})
+    exact_found = noisy_found = total = confident = 0
+    latencies = []
+    for _ in range(count):
+        picked = rng.sample(candidates, per_prescription)
+        for noisy in (False, True):
+            lines = [f"Tab. {misspell(n, rng) if noisy else n} {rng.choice([5, 10, 250, 500])}mg 1-0-1"
+                     for n in picked]
+            extraction, seconds = timed_extract(extractor, "\n".join(lines))
+            found, expected = recall(extraction, picked)
+            if noisy:
+                noisy_found += found
+                latencies.append(seconds)
+                confident += extractor.is_confident(extraction)
+            else:
+                exact_found += found
+                total += expected
+
+    latencies.sort()
+    print(f"synthetic: {count} prescriptions x {per_prescription} medicines")
+    print(f"  recall exact names     {exact_found / total:.3f}")
+    print(f"  recall with 1 typo     {noisy_found / total:.3f}")
+    print(f"  confident (no model)   {confident / count:.3f}")
+    print(f"  extract p50 {latencies[len(latencies) // 2] * 1e3:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e3:.2f} ms")
+
+
+def main():
+    start = time.perf_counter()
+    names = load_medicine_names(DRUG_LIST)
+    extractor = MedicineExtractor(names)
+    print(f"built matcher over {len(names)} names in {time.perf_counter() - start:.2f} s\n")
+
+    known = set()
+    for name in names:
+        known.update(tokenize(name))
+        known.add(name.lower())
+    bench_samples(extractor, known)
+    bench_synthetic(extractor, names)
+
+
+if __name__ == '__main__':
+    main()
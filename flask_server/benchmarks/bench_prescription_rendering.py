@@ -0,0 +1,85 @@
+# Prescriptions rendered and uploaded per second: the original file-based
+# flow (FPDF parses the logo PNG for every document, PDF and QR written to
+# uploads/ and re-read by upload_from_filename) vs. in-memory rendering with
+# the cached logo.  Uploads go to the in-memory FakeBucket.
+#
+# Run from the flask_server directory:
+#     python benchmarks/bench_prescription_rendering.py [count]
+
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+os.chdir(SERVER_DIR)
+
+from fakes import FakeBucket  # noqa: E402
+from prescriptions import (PDF, render_prescription_pdf, render_qr_code,  # noqa: E402
+                           upload_prescription_pdf, upload_qr_code)
+
+MEDICINES = ['Paracetamol 500mg', 'Amoxicillin 250mg', 'Cimetidine 50mg']
+LEGACY_COUNT = 3
+
+
+class LegacyPDF(PDF):
+    def header(self):
+        self.image('aarogya-data-logo.png', 10, 8, 20)
+        self.set_font('Arial', 'B', 14)
+        self.cell(0, 10, 'Medical Prescription', align='C', ln=1)
+
+
+def legacy_prescription(bucket, workdir):
+    prescription_id = str(uuid.uuid4())
+    pdf = LegacyPDF()
+    pdf.add_page()
+    pdf.add_prescription('Patient', 'Doctor', MEDICINES)
+    pdf_path = os.path.join(workdir, f'medical_prescription_{prescription_id}.pdf')
+    pdf.output(pdf_path)
+    bucket.blob(f'{prescription_id}.pdf').upload_from_filename(pdf_path)
+
+    qr_path = os.path.join(workdir, f'prescription_qr_{prescription_id}.png')
+    with open(qr_path, 'wb') as f:
+        f.write(render_qr_code(prescription_id))
+    bucket.blob(f'{prescription_id}.png').upload_from_filename(qr_path)
+    return os.path.getsize(pdf_path)
+
+
+def in_memory_prescription(bucket):
+    prescription_id = str(uuid.uuid4())
+    pdf_bytes = render_prescription_pdf(prescription_id, MEDICINES, 'Patient', 'Doctor')
+    upload_prescription_pdf(bucket, prescription_id, pdf_bytes)
+    upload_qr_code(bucket, prescription_id, render_qr_code(prescription_id))
+    return len(pdf_bytes)
+
+
+def report(label, count, seconds, pdf_size):
+    print(f"{label:<10} {count:>5} prescriptions  {count / seconds:>8.2f}/s  "
+          f"{seconds / count * 1e3:>9.1f} ms each  PDF {pdf_size / 1024:>7.1f} KiB")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    bucket = FakeBucket()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        for _ in range(LEGACY_COUNT):
+            size = legacy_prescription(bucket, workdir)
+        report('legacy', LEGACY_COUNT, time.perf_counter() - start, size)
+
+    # First document decodes the logo
+    start = time.perf_counter()
+    in_memory_prescription(bucket)
+    print(f"logo decode + first document {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    start = time.perf_counter()
+    for _ in range(count):
+        size = in_memory_prescription(bucket)
+    report('in-memory', count, time.perf_counter() - start, size)
+
+
+if __name__ == '__main__':
+    main()
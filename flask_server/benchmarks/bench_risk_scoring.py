@@ -0,0 +1,65 @@
+# Micro-benchmark: per-symptom .loc loop vs. the log-space RiskScoringEngine
+#
+# Run from the flask_server directory:
+#     python benchmarks/bench_risk_scoring.py
+
+import os
+import random
+import sys
+import timeit
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from risk_engine import RiskScoringEngine  # noqa: E402
+
+DATASET = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "Dataset", "Final_csv.csv")
+
+
+# The scoring loop the engine replaces, kept verbatim for comparison
+def loop_risk_probabilities(smoothed_df, symptoms_list):
+    risk_probs = {}
+    for risk_level in smoothed_df.index:
+        risk_prob = 1
+        for symptom in symptoms_list:
+            if symptom in smoothed_df.columns:
+                risk_prob *= smoothed_df.loc[risk_level, symptom]
+            else:
+                risk_prob *= 0.01
+        risk_probs[risk_level] = risk_prob
+    return risk_probs
+
+
+def main():
+    smoothed_df = pd.read_csv(DATASET)
+    smoothed_df.set_index('risk level', inplace=True)
+    engine = RiskScoringEngine(smoothed_df)
+    print(f"{len(engine.risk_levels)} risk levels x {len(engine.symptoms)} symptoms")
+
+    rng = random.Random(42)
+    vocabulary = list(smoothed_df.columns) + ["unlisted symptom"]
+
+    for n_symptoms in (3, 12, 50, 150):
+        symptoms = [rng.choice(vocabulary) for _ in range(n_symptoms)]
+
+        number = 200
+        loop_s = timeit.timeit(
+            lambda: loop_risk_probabilities(smoothed_df, symptoms), number=number) / number
+        engine_s = timeit.timeit(
+            lambda: engine.score(symptoms), number=number) / number
+
+        raw = loop_risk_probabilities(smoothed_df, symptoms)
+        underflow = all(value == 0.0 for value in raw.values())
+        best_loop = max(raw, key=raw.get)
+        scores = engine.score(symptoms)
+        best_engine = max(scores, key=scores.get)
+
+        print(f"symptoms={n_symptoms:4d}  loop={loop_s * 1e6:9.1f}us  "
+              f"engine={engine_s * 1e6:7.1f}us  speedup={loop_s / engine_s:6.1f}x  "
+              f"loop_underflow={underflow}  same_argmax={best_loop == best_engine or underflow}")
+
+
+if __name__ == "__main__":
+    main()
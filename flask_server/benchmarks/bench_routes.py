@@ -0,0 +1,325 @@
+# End-to-end benchmark of the flask_server routes, fully offline.
+#
+# The app runs with USE_FAKE_SERVICES=1 (in-memory Firebase, MongoDB, Twilio,
+# TinyURL and Gemini). Requests use the bundled Dataset/*.csv and the sample
+# images under "Research Work/Models + handwritten", served through the
+# FakeFetcher. Each route gets one timed first request, then `--requests`
+# requests from `--concurrency` threads through the Flask test client.
+# Results (per-route throughput, latency percentiles and peak RSS, plus
+# startup time) are written as JSON; pass an earlier file to --compare to
+# see the change per route.
+#
+# Run from the flask_server directory:
+#     python benchmarks/bench_routes.py [--requests 200] [--concurrency 8]
+#                                       [--routes predict,prescription] [--compare old.json]
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLES_DIR = os.path.join(SERVER_DIR, '..', 'Research Work', 'Models + handwritten')
+RESULTS_DIR = os.path.join(SERVER_DIR, 'benchmarks', 'results')
+sys.path.insert(0, SERVER_DIR)
+
+FIXTURE_URL = 'https://fixtures.local/'
+# Sample scans for the image routes and handwritten notes for OCR
+SCAN_SAMPLES = ['high.jpeg', 'nonDem0.jpg', 'result.jpg']
+NOTE_SAMPLES = ['doc1.jpg', 'doc2.jpg', 'doc.png', 'doc1.png', 'doc2.jpeg']
+SEEDED_PRESCRIPTIONS = 1000
+
+
+def peak_rss_mib():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))] if values else None
+
+
+def git_revision():
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVER_DIR,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                               cwd=SERVER_DIR, capture_output=True, text=True).stdout.strip()
+        return revision + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def read_sample(name):
+    with open(os.path.join(SAMPLES_DIR, name), 'rb') as f:
+        return f.read()
+
+
+class Fixtures:
+    """Request bodies for every route, built from the bundled data."""
+
+    def __init__(self, fetcher, services):
+        import pandas as pd
+        from prescriptions import prescription_pdf_url, prescription_record
+
+        self.symptoms = pd.read_csv('Dataset/dataset.csv', usecols=['symptoms'])['symptoms'].tolist()
+        self.scans = {name: read_sample(name) for name in SCAN_SAMPLES}
+        self.notes = [name for name in NOTE_SAMPLES if os.path.exists(os.path.join(SAMPLES_DIR, name))]
+        for name in self.notes:
+            content_type = 'image/png' if name.endswith('.png') else 'image/jpeg'
+            fetcher.add(FIXTURE_URL + name, read_sample(name), content_type)
+        self.fetcher = fetcher
+        self._scan_variants = 0
+        self._lock = threading.Lock()
+
+        for i in range(SEEDED_PRESCRIPTIONS):
+            services.prescriptions.insert_one(prescription_record(
+                f'rx-{i}', prescription_pdf_url(services.bucket, f'rx-{i}'), 'Patient', 'Doctor'))
+
+    # A scan URL whose bytes differ from every earlier one (trailing bytes
+    # after the image data), so each request misses the prediction cache and
+    # runs download, decode and inference
+    def new_scan_url(self, rng):
+        name = rng.choice(SCAN_SAMPLES)
+        with self._lock:
+            self._scan_variants += 1
+            variant = self._scan_variants
+        url = f'{FIXTURE_URL}{variant}/{name}'
+        self.fetcher.add(url, self.scans[name] + b'\0' * variant, 'image/jpeg')
+        return url
+
+
+def wait_for_job(job_id, timeout=120):
+    from blueprints.prescriptions import notes_pipeline
+    job = notes_pipeline.get(job_id)
+    deadline = time.monotonic() + timeout
+    while not job.finished and time.monotonic() < deadline:
+        job.wait_for_change(job.version, timeout=1)
+    return 200 if job.status == 'succeeded' else (job.status_code or 500)
+
+
+# name -> request function(client, fixtures, rng) -> status
+def route_table():
+    def post_json(path, body):
+        return lambda client, fixtures, rng: client.post(path, json=body(fixtures, rng)).status_code
+
+    def image_route(path):
+        return lambda client, fixtures, rng: client.post(
+            path, json={'image_url': fixtures.new_scan_url(rng)}).status_code
+
+    def notes(client, fixtures, rng):
+        response = client.post('/upload_handwritten_notes', json={
+            'url': FIXTURE_URL + rng.choice(fixtures.notes),
+            'patient_name': 'Patient', 'doctor_name': 'Doctor'})
+        if response.status_code != 202:
+            return response.status_code
+        return wait_for_job(response.get_json()['job_id'])
+
+    def prescription(client, fixtures, rng):
+        return client.get(f'/prescription/rx-{rng.randrange(SEEDED_PRESCRIPTIONS)}').status_code
+
+    return {
+        'predict': post_json('/predict', lambda f, rng: {'symptoms': rng.choice(f.symptoms)}),
+        'predict_batch': post_json('/predict/batch', lambda f, rng: rng.sample(f.symptoms, 50)),
+        'predict_doctor': post_json('/predict_doctor',
+                                    lambda f, rng: {'symptoms': rng.choice(f.symptoms)}),
+        'predict_kidney_image': image_route('/predict_kidney_image'),
+        'predict_brain_tumor': image_route('/predict_brain_tumor'),
+        'predict_skin_cancer': image_route('/predict_skin_cancer'),
+        'upload_handwritten_notes': notes,
+        'prescription': prescription,
+        'generate_prescription': post_json('/generate_prescription', lambda f, rng: {
+            'patient_name': 'Patient', 'doctor_name': 'Doctor',
+            'medicines': ['Paracetamol 500mg', 'Amoxicillin 250mg']}),
+        'prescriptions_bulk': post_json('/prescriptions/bulk', lambda f, rng: {
+            'prescriptions': [{'patient_name': f'Patient {i}', 'doctor_name': 'Doctor',
+                               'medicines': ['Paracetamol 500mg', 'Amoxicillin 250mg']}
+                              for i in range(10)]}),
+    }
+
+
+# Model behind each image route
+IMAGE_ROUTE_MODELS = {
+    'predict_kidney_image': 'kidney_stone',
+    'predict_brain_tumor': 'brain_tumor',
+    'predict_skin_cancer': 'skin_cancer',
+}
+
+
+# Why a route cannot be measured in this checkout, or None
+def skip_reason(route):
+    if route in IMAGE_ROUTE_MODELS:
+        from blueprints.imaging import image_models
+        path = image_models.path(IMAGE_ROUTE_MODELS[route])
+        if not os.path.exists(path):
+            return f'model file {path} not found'
+    return None
+
+
+def run_route(app, fixtures, send, requests, concurrency, seed):
+    local = threading.local()
+
+    def one(rng):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        start = time.perf_counter()
+        try:
+            status = send(local.client, fixtures, rng)
+        except Exception as e:
+            status = type(e).__name__
+        return status, time.perf_counter() - start
+
+    first_status, first_seconds = one(random.Random(seed))
+    rngs = [random.Random(seed + 1 + i) for i in range(requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, rngs))
+    wall = time.perf_counter() - start
+
+    statuses = {}
+    for status, _ in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    latencies = sorted(seconds * 1e3 for status, seconds in results
+                       if isinstance(status, int) and status < 400)
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'ok': len(latencies),
+        'statuses': statuses,
+        'throughput_rps': len(latencies) / wall,
+        'first_request_ms': first_seconds * 1e3,
+        'first_request_status': str(first_status),
+        'p50_ms': percentile(latencies, 0.50),
+        'p90_ms': percentile(latencies, 0.90),
+        'p99_ms': percentile(latencies, 0.99),
+        'max_ms': latencies[-1] if latencies else None,
+        'peak_rss_mib': peak_rss_mib(),
+    }
+
+
+def fmt(value, spec='.1f'):
+    return '-' if value is None else format(value, spec)
+
+
+def print_results(results):
+    print(f"{'route':<26} {'ok/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} "
+          f"{'first ms':>9} {'RSS MiB':>8}  statuses")
+    for name, result in results['routes'].items():
+        if 'skipped' in result:
+            print(f"{name:<26} skipped: {result['skipped']}")
+            continue
+        print(f"{name:<26} {fmt(result['throughput_rps']):>8} {fmt(result['p50_ms']):>8} "
+              f"{fmt(result['p90_ms']):>8} {fmt(result['p99_ms']):>8} "
+              f"{fmt(result['first_request_ms']):>9} {fmt(result['peak_rss_mib']):>8}  "
+              f"{json.dumps(result['statuses'])}")
+
+
+def print_comparison(previous, results):
+    print(f"\nChange vs {previous.get('revision')} ({previous.get('timestamp')}):")
+    print(f"{'route':<26} {'ok/s':>22} {'p50 ms':>22} {'p99 ms':>22}")
+
+    def change(old, new):
+        if old is None or new is None:
+            return f"{fmt(old)} -> {fmt(new)}"
+        percent = f"{(new - old) / old * 100:+.0f}%" if old else ''
+        return f"{fmt(old)} -> {fmt(new)} {percent}"
+
+    for name, result in results['routes'].items():
+        old = previous.get('routes', {}).get(name)
+        if not old or 'skipped' in old or 'skipped' in result:
+            continue
+        print(f"{name:<26} {change(old['throughput_rps'], result['throughput_rps']):>22} "
+              f"{change(old['p50_ms'], result['p50_ms']):>22} "
+              f"{change(old['p99_ms'], result['p99_ms']):>22}")
+    old_boot, new_boot = previous.get('startup', {}).get('seconds'), results['startup']['seconds']
+    print(f"{'startup seconds':<26} {change(old_boot, new_boot):>22}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline end-to-end benchmark of the routes.')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--routes', help='comma-separated route names (default: all)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='results file (default: benchmarks/results/routes-<revision>-<time>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    os.chdir(SERVER_DIR)
+    os.environ.update(USE_FAKE_SERVICES='1', WARM_UP='', SYMPTOM_CACHE_WARM='0',
+                      SERVICE_PROFILE='all', LLM_CACHE_PATH='', FETCH_CACHE_DIR='')
+    os.environ.pop('SERVICE_BLUEPRINTS', None)
+
+    start = time.perf_counter()
+    import app as app_module
+    startup_seconds = time.perf_counter() - start
+    startup_rss = peak_rss_mib()
+
+    import logging
+    logging.disable(logging.INFO)
+    from blueprints.common import image_fetcher, services, startup
+
+    ocr = 'paddleocr'
+    try:
+        import paddleocr  # noqa: F401
+    except ImportError:
+        # Only the OCR engine itself is replaced; queueing, the job
+        # pipeline and everything after OCR still run
+        from fakes import FakeOCR
+        services.ocr = FakeOCR()
+        ocr = 'fake (paddleocr not installed)'
+
+    fixtures = Fixtures(image_fetcher, services)
+    table = route_table()
+    selected = args.routes.split(',') if args.routes else list(table)
+
+    timestamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    results = {
+        'revision': git_revision(),
+        'timestamp': timestamp,
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'ocr': ocr,
+            'image_model_format': os.getenv('IMAGE_MODEL_FORMAT', 'keras'),
+        },
+        'settings': {'requests': args.requests, 'concurrency': args.concurrency, 'seed': args.seed},
+        'startup': {'seconds': startup_seconds, 'peak_rss_mib': startup_rss},
+        'routes': {},
+    }
+    for name in selected:
+        send = table[name]
+        reason = skip_reason(name)
+        if reason:
+            results['routes'][name] = {'skipped': reason}
+            continue
+        results['routes'][name] = run_route(app_module.app, fixtures, send, args.requests,
+                                             args.concurrency, args.seed)
+    results['startup']['subsystems'] = startup.to_dict()['subsystems']
+    results['peak_rss_mib'] = peak_rss_mib()
+
+    print(f"startup {startup_seconds:.2f} s, {startup_rss:.1f} MiB; "
+          f"{args.requests} requests x {args.concurrency} threads per route; OCR: {ocr}")
+    print_results(results)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"routes-{results['revision']}-{timestamp}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
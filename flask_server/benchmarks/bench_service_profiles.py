@@ -0,0 +1,69 @@
+# Startup time and resident memory of each service profile, each measured in
+# a fresh interpreter: importing app (which builds the app for the profile),
+# then optionally warming every subsystem the profile owns.  Subsystems whose
+# libraries are not installed show up as failed warm-ups.
+#
+# Run from the flask_server directory:
+#     python benchmarks/bench_service_profiles.py [--warm] [profile ...]
+
+import json
+import os
+import subprocess
+import sys
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+
+from blueprints import PROFILES  # noqa: E402
+
+# Libraries whose presence in sys.modules shows what a profile pulled in
+HEAVY_MODULES = ['pandas', 'sklearn', 'nltk', 'tensorflow', 'paddleocr', 'fitz', 'fpdf',
+                 'pymongo', 'firebase_admin', 'twilio']
+
+PROBE = '''
+import json, logging, resource, sys, time
+start = time.perf_counter()
+import app
+boot = time.perf_counter() - start
+logging.disable(logging.CRITICAL)
+failed = []
+if sys.argv[1] == "1":
+    for module in app.app.extensions.get("service_modules", {}).values():
+        for target in module.warm_up_targets:
+            try:
+                target.warm_up()
+            except Exception:
+                failed.append(target.name)
+print(json.dumps({
+    "boot": boot,
+    "total": time.perf_counter() - start,
+    "rss_mib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "loaded": [m for m in %r if m in sys.modules],
+    "failed": failed,
+}))
+''' % (HEAVY_MODULES,)
+
+
+def measure(profile, warm):
+    env = dict(os.environ, SERVICE_PROFILE=profile, WARM_UP='', SYMPTOM_CACHE_WARM='0',
+               WARM_UP_MODELS='0')
+    env.pop('SERVICE_BLUEPRINTS', None)
+    output = subprocess.run([sys.executable, '-c', PROBE, '1' if warm else '0'],
+                            cwd=SERVER_DIR, env=env, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    args = sys.argv[1:]
+    warm = '--warm' in args
+    profiles = [arg for arg in args if arg != '--warm'] or list(PROFILES)
+    print(f"{'profile':<14} {'boot s':>7} {'total s':>8} {'peak RSS MiB':>13}  libraries loaded")
+    for profile in profiles:
+        result = measure(profile, warm)
+        failed = f"  (failed: {', '.join(result['failed'])})" if result['failed'] else ''
+        print(f"{profile:<14} {result['boot']:>7.2f} {result['total']:>8.2f} "
+              f"{result['rss_mib']:>13.1f}  {', '.join(result['loaded']) or '-'}{failed}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+# Route groups that can be enabled independently; each module is imported
+# only when enabled, so a worker loads just the libraries its routes use.
+# Every module exposes ``blueprint``, ``warm_up_targets`` and ``stats()``.
+BLUEPRINT_MODULES = {
+    'risk': 'blueprints.risk',
+    'doctor': 'blueprints.doctor',
+    'imaging': 'blueprints.imaging',
+    'prescriptions': 'blueprints.prescriptions',
+}
+
+# Named deployments: small text-model workers, heavy imaging (TensorFlow)
+# and prescription/OCR (PaddleOCR) workers, or everything in one process
+PROFILES = {
+    'all': ['risk', 'doctor', 'imaging', 'prescriptions'],
+    'text': ['risk', 'doctor'],
+    'imaging': ['imaging'],
+    'prescriptions': ['prescriptions'],
+}
+
+
+class UnknownBlueprintError(Exception):
+    pass
+
+
+# Blueprint names for a profile, or for an explicit comma-separated list
+# which takes precedence over the profile
+def enabled_blueprints(profile='all', names=None):
+    if names:
+        selected = [name.strip() for name in names.split(',') if name.strip()]
+    elif profile in PROFILES:
+        selected = PROFILES[profile]
+    else:
+        raise UnknownBlueprintError(f"Unknown service profile: {profile}")
+    unknown = [name for name in selected if name not in BLUEPRINT_MODULES]
+    if unknown:
+        raise UnknownBlueprintError(f"Unknown blueprints: {', '.join(unknown)}")
+    return selected
@@ -0,0 +1,86 @@
+import os
+
+from startup import StartupReport, LazyResource
+from metrics import REGISTRY, stats_collector
+from image_fetch import ImageFetcher, ContentCache
+from services import (Services, firebase_bucket, gemini_generate, mongo_prescriptions,
+                      tinyurl_shorten, twilio_messages)
+
+# Heavy subsystems (NLTK, cloud clients, OCR, doctor and image models) are
+# built on first use or by an explicit warm-up; the report records the time
+# each one took and is served at /startup
+startup = StartupReport()
+
+
+# Firebase, MongoDB and Twilio clients are created the first time a
+# prescription flow touches them
+firebase = LazyResource('firebase', firebase_bucket, startup)
+mongo = LazyResource('mongo', mongo_prescriptions, startup)
+twilio = LazyResource('twilio', twilio_messages, startup)
+
+
+# Remote images are fetched through one pooled session with timeouts and a
+# body size cap; bodies are cached by URL/ETag and content hash
+image_fetcher = ImageFetcher(
+    cache=ContentCache(
+        os.getenv("FETCH_CACHE_DIR", "cache/fetch") or None,
+        max_disk_bytes=int(os.getenv("FETCH_CACHE_MAX_BYTES", str(512 * 2**20))),
+        max_age=int(os.getenv("FETCH_CACHE_MAX_AGE", str(24 * 3600))),
+        max_urls=int(os.getenv("FETCH_CACHE_MAX_URLS", "10000"))),
+    max_bytes=int(os.getenv("FETCH_MAX_BYTES", str(20 * 2**20))),
+    timeout=(3.05, float(os.getenv("FETCH_TIMEOUT_SECONDS", "15"))))
+
+
+# External services used by the prescription flows; each one can be replaced
+# by a local fake from fakes.py
+services = Services(
+    bucket=firebase,
+    prescriptions=mongo,
+    messages=twilio,
+    shorten=tinyurl_shorten,
+    generate=gemini_generate,
+    fetcher=image_fetcher,
+    sms_from=os.getenv("TWILIO_PHONE_NUMBER"),
+    whatsapp_from=os.getenv("TWILIO_WHATSAPP_FROM"),
+    notify_to=os.getenv("NOTIFY_PHONE_NUMBER", "+917304671744"),
+)
+
+# USE_FAKE_SERVICES=1 runs fully offline: Firebase, MongoDB, Twilio, TinyURL
+# and Gemini are replaced by the in-memory fakes, and remote files are only
+# served from what is registered on the FakeFetcher (benchmarks, demos)
+if os.getenv("USE_FAKE_SERVICES", "0") == "1":
+    from fakes import (FakeBucket, FakeCollection, FakeFetcher, FakeGenerator, FakeMessages,
+                       fake_shorten)
+    image_fetcher = FakeFetcher()
+    services.bucket = FakeBucket()
+    services.prescriptions = FakeCollection()
+    services.messages = FakeMessages()
+    services.shorten = fake_shorten
+    services.generate = FakeGenerator()
+    services.fetcher = image_fetcher
+
+
+# Trained models and derived caches are saved here and reused across boots
+MODEL_ARTIFACT_DIR = os.getenv("MODEL_ARTIFACT_DIR", "artifacts")
+
+
+# Symptom vocabularies of the risk table and of the doctor dataset in one
+# exact / token / fuzzy index, shared by both text models
+def load_symptom_index():
+    from symptom_index import SymptomIndex
+    return SymptomIndex.from_datasets(
+        "Dataset/Final_csv.csv", "Dataset/dataset.csv",
+        threshold=float(os.getenv("SYMPTOM_MATCH_THRESHOLD", "0.7")),
+        token_threshold=float(os.getenv("SYMPTOM_WORD_MATCH_THRESHOLD", "0.75")))
+
+
+symptom_index = LazyResource('symptom_index', load_symptom_index, startup)
+
+
+# Statistics of a lazy subsystem, or None while it has not been built
+def loaded_stats(resource):
+    return resource.get().stats() if resource.loaded else None
+
+
+REGISTRY.register_collector(stats_collector('aarogya_symptom_index',
+                                            lambda: loaded_stats(symptom_index)))
@@ -0,0 +1,74 @@
+import os
+
+from flask import Blueprint, jsonify, request
+
+from startup import LazyResource
+from model_store import ModelArtifactStore
+from metrics import timed
+from symptom_index import DOCTOR_VOCABULARY
+from blueprints.common import MODEL_ARTIFACT_DIR, loaded_stats, startup, symptom_index
+
+blueprint = Blueprint('doctor', __name__)
+
+# # Load the saved Random Forest model
+# with open('doctor_prediction_model.pkl', 'rb') as file:
+#     doctor_model = pickle.load(file)
+
+
+# Load the trained doctor model from the artifact store; it is only
+# retrained when the content hash of the dataset (or the scikit-learn
+# version) differs from the one the saved artifact was built from.
+# scikit-learn and scipy are imported on first use.
+model_store = ModelArtifactStore(MODEL_ARTIFACT_DIR)
+
+
+def load_doctor_model():
+    import sklearn
+    from doctor_model import train_doctor_model
+    from symptom_encoder import SymptomEncoder
+    doctor_artifact = model_store.load_or_train(
+        'doctor_model', "Dataset/dataset.csv", train_doctor_model,
+        extra_fingerprint={'sklearn_version': sklearn.__version__},
+        mmap=os.getenv("MODEL_ARTIFACT_MMAP", "0") == "1")
+    # Encode request symptoms against the training columns without pandas
+    return doctor_artifact['model'], SymptomEncoder(doctor_artifact['columns'])
+
+
+doctor = LazyResource('doctor_model', load_doctor_model, startup)
+
+warm_up_targets = [doctor, symptom_index]
+
+
+def stats():
+    return {'symptom_index': loaded_stats(symptom_index)}
+
+
+#####################################   Recommend Doctor    ##################################################
+
+@blueprint.route('/predict_doctor', methods=['POST'])
+def predict_doctor():
+    # Get the symptoms from the request
+    input_symptoms = request.json.get('symptoms', '').split(',')
+
+    doctor_model, symptom_encoder = doctor.get()
+    index = symptom_index.get()
+    with timed('doctor_encode'):
+        # Resolve each symptom to a training column despite case, spacing,
+        # typos and word order
+        matches = [index.match(symptom, DOCTOR_VOCABULARY, text=symptom.strip())
+                   for symptom in input_symptoms if symptom.strip()]
+        valid_symptoms = symptom_encoder.known(
+            [match.symptom for match in matches if match.symptom is not None])
+        features = symptom_encoder.encode(valid_symptoms) if valid_symptoms else None
+    matched_symptoms = [match.to_dict() for match in matches]
+
+    if not valid_symptoms:
+        # If no valid symptoms, predict "family doctor"
+        return jsonify({'predicted_doctor': 'family doctor', 'matched_symptoms': matched_symptoms})
+
+    # Predict the doctor from a binary feature row in the training column order
+    with timed('doctor_forward'):
+        predicted_doctor = doctor_model.predict(features)
+
+    # Return the predicted doctor as a JSON response
+    return jsonify({'predicted_doctor': predicted_doctor[0], 'matched_symptoms': matched_symptoms})
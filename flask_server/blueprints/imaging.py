@@ -0,0 +1,288 @@
+import logging
+import os
+from functools import partial
+
+import numpy as np
+from flask import Blueprint, jsonify, request
+
+from startup import LazyResource
+from model_registry import ModelRegistry
+from inference_scheduler import InferenceScheduler
+from image_preprocessing import DecodedImageCache
+from image_models import IMAGE_MODELS, tflite_path
+from tflite_models import load_tflite_model
+from image_fetch import FetchError
+from result_cache import PredictionCache, InProcessBackend, RedisBackend
+from metrics import REGISTRY, stats_collector
+from blueprints.common import image_fetcher, startup
+
+blueprint = Blueprint('imaging', __name__)
+
+# Image classifiers are loaded lazily once per process and kept resident; a
+# replaced model file is picked up through its mtime.  IMAGE_MODEL_FORMAT=tflite
+# serves the graphs converted by tflite_models.py (IMAGE_MODEL_QUANTIZATION
+# picks float32, float16 or int8) instead of the .h5 files
+IMAGE_MODEL_FORMAT = os.getenv("IMAGE_MODEL_FORMAT", "keras")
+IMAGE_MODEL_QUANTIZATION = os.getenv("IMAGE_MODEL_QUANTIZATION", "float32")
+TFLITE_NUM_THREADS = int(os.getenv("TFLITE_NUM_THREADS", "0")) or None
+
+image_models = ModelRegistry(
+    hot_reload=os.getenv("MODEL_HOT_RELOAD", "1") == "1")
+for name, (keras_path, _) in IMAGE_MODELS.items():
+    if IMAGE_MODEL_FORMAT == 'tflite':
+        image_models.register(name, tflite_path(keras_path, IMAGE_MODEL_QUANTIZATION),
+                              loader=partial(load_tflite_model, num_threads=TFLITE_NUM_THREADS))
+    else:
+        image_models.register(name, keras_path)
+
+# Input format of each image model
+IMAGE_SPECS = {name: spec for name, (_, spec) in IMAGE_MODELS.items()}
+
+# Decoded arrays are cached by content hash, so a re-submitted image skips
+# download (see common.image_fetcher) and decode.  Most repeats are already
+# answered by the prediction cache below, so this stays small
+decoded_images = DecodedImageCache(
+    max_bytes=int(os.getenv("DECODED_IMAGE_CACHE_BYTES", str(16 * 2**20))))
+
+# Load every model and run a dummy forward pass (a warm-up target)
+image_models_warm = LazyResource('image_models', image_models.warm_up, startup)
+
+# Concurrent image requests are queued per model and run as micro-batches
+inference = InferenceScheduler(
+    image_models,
+    max_batch_size=int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "16")),
+    max_wait=float(os.getenv("INFERENCE_MAX_WAIT_MS", "10")) / 1000)
+
+# Results of image predictions, keyed by (model id, model file hash, image
+# hash) so replacing a model file invalidates its entries automatically
+if os.getenv("PREDICTION_CACHE_BACKEND", "memory") == "redis":
+    prediction_cache_backend = RedisBackend.from_url(
+        os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+else:
+    prediction_cache_backend = InProcessBackend(
+        max_entries=int(os.getenv("PREDICTION_CACHE_SIZE", "4096")))
+prediction_cache = PredictionCache(
+    prediction_cache_backend, ttl=int(os.getenv("PREDICTION_CACHE_TTL", "86400")))
+
+
+# Results are looked up under the resident model's hash and stored under the
+# hash returned with the prediction, so a hot reload between the two can
+# never file one model's result under another model's file
+def image_prediction_key(model_id, fetched, model_sha256=None):
+    if model_sha256 is None:
+        model_sha256 = image_models.file_hash(model_id)
+    return PredictionCache.key(model_id, model_sha256, fetched.sha256)
+
+
+warm_up_targets = [image_models_warm]
+
+REGISTRY.register_collector(stats_collector('aarogya_prediction_cache', prediction_cache.stats))
+
+
+def stats():
+    return {
+        'image_models': image_models.stats(),
+        'inference': inference.stats(),
+        'prediction_cache': prediction_cache.stats(),
+    }
+
+
+#####################################   Kitney Stone      ##################################################
+
+
+@blueprint.route('/predict_kidney_image', methods=['POST'])
+def predict_kidney_image():
+    try:
+        # Get the JSON request which contains the image URL
+        data = request.get_json()
+        image_url = data.get('image_url', None)
+
+        if not image_url:
+            logging.error("No image URL provided")
+            return jsonify({'error': 'No image URL provided'}), 400
+
+        # Download the image through the pooled, size-capped, cached fetcher
+        try:
+            fetched = image_fetcher.fetch(image_url)
+        except FetchError as e:
+            logging.error(f"Failed to download image from URL: {e}")
+            return jsonify({'error': 'Failed to download image'}), e.status_code
+
+        # A re-submitted scan is answered from the prediction result cache
+        cached = prediction_cache.get(image_prediction_key('kidney_stone', fetched))
+        if cached is not None:
+            return jsonify(cached), 200
+
+        # Decode, resize and normalize the image for the model (cached by content)
+        img_array = decoded_images.get(fetched.sha256, fetched.content, IMAGE_SPECS['kidney_stone'])
+
+        # Predict the class
+        predictions, model_sha256 = inference.predict_with_hash('kidney_stone', img_array)
+        # Get the index of the highest probabilit∫
+        predicted_class = np.argmax(predictions, axis=1)[0]
+        predic_class = {1: 'Stone', 0: 'Normal'}
+        result = {'predicted_class': predic_class[int(predicted_class)]}
+        prediction_cache.set(image_prediction_key('kidney_stone', fetched, model_sha256), result)
+        # Return the predicted class
+        return jsonify(result), 200
+
+    except Exception as e:
+        # Log stack trace
+        logging.error(f"Error occurred: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+
+#####################################    Brain Tumor      ##################################################
+
+
+# @app.route('/predict_brain_tumor', methods=['POST'])
+# def predict_brain_tumor():
+    # try:
+    #     # Get the JSON request which contains the image URL
+    #     data = request.get_json()
+    #     image_url = data.get('image_url', None)
+
+    #     if not image_url:
+    #         logging.error("No image URL provided")
+    #         return jsonify({'error': 'No image URL provided'}), 400
+
+    #     # Load the pre-trained Brain Tumor model
+    #     brain_tumor_model = load_model('models/Brain_Tumor_Model.h5')
+
+    #     # Download the image from the provided URL
+    #     response = requests.get(image_url)
+    #     if response.status_code != 200:
+    #         logging.error("Failed to download image from URL")
+    #         return jsonify({'error': 'Failed to download image'}), 400
+
+    #     # Open the image using PIL from the byte stream
+    #     img = Image.open(BytesIO(response.content))
+
+    #     # Preprocess the image
+    #     img = img.resize((224, 224))  # Resize image to the model's input size
+    #     img_array = image.img_to_array(img)
+    #     img_array = np.expand_dims(img_array, axis=0)  # Add batch dimension
+    #     img_array = img_array / 255.0  # Normalize pixel values to [0, 1]
+
+    #     # Predict the brain tumor category
+    #     predictions = brain_tumor_model.predict(img_array)
+    #     index = np.argmax(predictions[0])
+    #     outputs = ['No Tumor', 'Tumor']
+    #     predicted_label = outputs[index]
+
+    #     # Log the prediction
+    #     logging.debug(f"Prediction: {predicted_label}")
+
+    #     # Return the prediction as a JSON response
+    #     return jsonify({'predicted_class': predicted_label}), 200
+
+    # except Exception as e:
+    #     # Log stack trace
+    #     logging.error(f"Error occurred: {str(e)}", exc_info=True)
+    #     return jsonify({'error': str(e)}), 500
+
+
+@blueprint.route('/predict_brain_tumor', methods=['POST'])
+def predict_brain_tumor():
+    try:
+        # Get the JSON request which contains the image URL
+        data = request.get_json()
+        image_url = data.get('image_url', None)
+
+        if not image_url:
+            logging.error("No image URL provided")
+            return jsonify({'error': 'No image URL provided'}), 400
+
+        # Download the image through the pooled, size-capped, cached fetcher
+        try:
+            fetched = image_fetcher.fetch(image_url)
+        except FetchError as e:
+            logging.error(f"Failed to download image from URL: {e}")
+            return jsonify({'error': 'Failed to download image'}), e.status_code
+
+        # A re-submitted scan is answered from the prediction result cache
+        cached = prediction_cache.get(image_prediction_key('brain_tumor', fetched))
+        if cached is not None:
+            return jsonify(cached), 200
+
+        # Decode, resize and normalize the image for the model (cached by content)
+        img_array = decoded_images.get(fetched.sha256, fetched.content, IMAGE_SPECS['brain_tumor'])
+
+        # Predict the brain tumor category
+        predictions, model_sha256 = inference.predict_with_hash('brain_tumor', img_array)
+        index = np.argmax(predictions[0])
+        outputs = ['No Tumor', 'Tumor']
+        predicted_label = outputs[index]
+
+        # Log the prediction
+        logging.debug(f"Prediction: {predicted_label}")
+
+        # Return the prediction as a JSON response
+        result = {'predicted_class': predicted_label}
+        prediction_cache.set(image_prediction_key('brain_tumor', fetched, model_sha256), result)
+        return jsonify(result), 200
+
+    except Exception as e:
+        # Log stack trace
+        logging.error(f"Error occurred: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+#####################################  Skin cancer   ##################################################
+
+
+@blueprint.route('/predict_skin_cancer', methods=['POST'])
+def predict_skin_cancer():
+    try:
+        # Get the JSON request which contains the image URL
+        data = request.get_json()
+        image_url = data.get('image_url', None)
+
+        if not image_url:
+            logging.error("No image URL provided")
+            return jsonify({'error': 'No image URL provided'}), 400
+
+        # Download the image through the pooled, size-capped, cached fetcher
+        try:
+            fetched = image_fetcher.fetch(image_url)
+        except FetchError as e:
+            logging.error(f"Failed to download image from URL: {e}")
+            return jsonify({'error': 'Failed to download image'}), e.status_code
+
+        # A re-submitted scan is answered from the prediction result cache
+        cached = prediction_cache.get(image_prediction_key('skin_cancer', fetched))
+        if cached is not None:
+            return jsonify(cached), 200
+
+        # Decode, resize and normalize the image for the model (cached by content)
+        img_array = decoded_images.get(fetched.sha256, fetched.content, IMAGE_SPECS['skin_cancer'])
+
+        # Predict the skin cancer category
+        predictions, model_sha256 = inference.predict_with_hash('skin_cancer', img_array)
+        index = np.argmax(predictions[0])
+        outputs = {
+            'akiec': 'Actinic Keratoses and Intraepithelial Carcinoma (pre-cancerous)',
+            'bcc': 'Basal Cell Carcinoma (a common type of skin cancer)',
+            'bkl': 'Benign Keratosis (non-cancerous lesion)',
+            'df': 'Dermatofibroma (benign skin lesion)',
+            'nv': 'Melanocytic Nevus (a common mole)',
+            'vasc': 'Vascular Lesions (non-cancerous lesions of blood vessels)',
+            'mel': 'Melanoma (most dangerous type of skin cancer)'
+        }
+        predicted_label = list(outputs.values())[index]
+        predicted_key = list(outputs.keys())[index]
+
+        # Log the prediction
+        logging.debug(f"Prediction: {predicted_key} - {predicted_label}")
+
+        # Return the prediction as a JSON response
+        result = {
+            'predicted_class': predicted_key,
+            'description': predicted_label
+        }
+        prediction_cache.set(image_prediction_key('skin_cancer', fetched, model_sha256), result)
+        return jsonify(result), 200
+
+    except Exception as e:
+        # Log stack trace
+        logging.error(f"Error occurred: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
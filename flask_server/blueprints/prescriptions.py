@@ -0,0 +1,309 @@
+import json
+import logging
+import os
+import uuid
+from io import BytesIO
+
+from flask import Blueprint, Response, jsonify, request, send_file, stream_with_context
+
+from startup import LazyResource
+from metrics import REGISTRY, stats_collector
+from result_cache import PredictionCache, InProcessBackend, SQLiteBackend
+from llm_cache import CachedGenerator
+from ocr_service import OCRService
+from prescriptions import generate_pdf, generate_qr_code, render_qr_code
+from bulk_prescriptions import BulkPrescriptionIssuer, BulkRecordError, validate_record
+from prescription_lookup import PrescriptionLookup, ensure_prescription_indexes
+from job_pipeline import JobQueueFull
+from notes_pipeline import (ALLOWED_EXTENSIONS, build_notes_pipeline, new_notes_job_context,
+                            notes_job_result, parse_medicine_list)
+from blueprints.common import firebase, loaded_stats, mongo, services, startup, twilio
+
+blueprint = Blueprint('prescriptions', __name__)
+
+# Fixed pool of PaddleOCR engines built once from the bundled model dirs;
+# OCR requests are dispatched to them through a bounded queue
+ocr_service = LazyResource('ocr', lambda: OCRService(
+    pool_size=int(os.getenv("OCR_POOL_SIZE", "1")),
+    queue_size=int(os.getenv("OCR_QUEUE_SIZE", "8"))), startup)
+services.ocr = ocr_service
+
+
+# Local medicine-name matcher over the drugs.com drug list; Gemini is only
+# asked when it is not confident
+MEDICINE_LIST_PATH = os.getenv(
+    "MEDICINE_LIST_PATH", "Dataset/drugs_side_effects_drugs_com.csv.zip")
+
+
+def load_medicine_extractor():
+    from medicine_extractor import MedicineExtractor
+    if not os.path.exists(MEDICINE_LIST_PATH):
+        logging.warning(f"Medicine list {MEDICINE_LIST_PATH} not found; using Gemini only")
+        return None
+    return MedicineExtractor.from_drugs_csv(
+        MEDICINE_LIST_PATH,
+        min_confidence=float(os.getenv("MEDICINE_MIN_CONFIDENCE", "0.8")))
+
+
+medicine_extractor = LazyResource('medicine_extractor', load_medicine_extractor, startup)
+services.medicine_extractor = medicine_extractor
+
+
+# Gemini replies cached by normalized prompt in a local SQLite file, with
+# identical in-flight prompts sharing one call
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "cache/llm.sqlite3")
+if LLM_CACHE_PATH:
+    os.makedirs(os.path.dirname(LLM_CACHE_PATH) or '.', exist_ok=True)
+    llm_cache_backend = SQLiteBackend(LLM_CACHE_PATH)
+else:
+    llm_cache_backend = InProcessBackend()
+llm_generator = CachedGenerator(
+    services.generate,
+    PredictionCache(llm_cache_backend, ttl=int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))),
+    validate=parse_medicine_list)
+services.generate = llm_generator
+
+################################# Prescriptions #############################################
+
+# # JWT middleware
+# def token_required(f):
+#     def decorator(*args, **kwargs):
+#         token = request.headers.get('x-auth-token')
+#         if not token:
+#             return jsonify({'error': 'Token is missing!'}), 401
+
+#         try:
+#             decoded_token = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+#             user_role = decoded_token.get('role')
+#             if user_role != 'pharmacist':
+#                 return jsonify({'error': 'Access forbidden: only pharmacists allowed'}), 403
+#         except jwt.ExpiredSignatureError:
+#             return jsonify({'error': 'Token has expired'}), 401
+#         except jwt.InvalidTokenError:
+#             return jsonify({'error': 'Invalid token'}), 401
+
+#         return f(*args, **kwargs)
+
+#     return decorator
+
+
+# Pharmacist QR scans read the download URL through an indexed, projected
+# query and a TTL cache that re-signs URLs close to expiry
+def load_prescription_lookup():
+    if os.getenv("PRESCRIPTION_ENSURE_INDEXES", "1") == "1":
+        ensure_prescription_indexes(services.prescriptions)
+    return PrescriptionLookup(
+        services.prescriptions, services.bucket,
+        ttl=int(os.getenv("PRESCRIPTION_CACHE_TTL", "300")),
+        max_entries=int(os.getenv("PRESCRIPTION_CACHE_SIZE", "10000")))
+
+
+prescription_lookup = LazyResource('prescription_lookup', load_prescription_lookup, startup)
+
+
+@blueprint.route('/prescription/<prescription_id>', methods=['GET'])
+def access_prescription(prescription_id):
+    # Fetch prescription details from the cache or the database
+    prescription = prescription_lookup.get().get(prescription_id)
+    if not prescription:
+        return jsonify({'error': 'Prescription not found'}), 404
+
+    # Retrieve the firebase_storage_url from the prescription document
+    firebase_storage_url = prescription.get('firebase_path')
+
+    if not firebase_storage_url:
+        return jsonify({'error': 'Download URL not found in prescription'}), 404
+
+    return jsonify({
+        'download_url': firebase_storage_url
+    })
+
+
+# Records accepted by one /prescriptions/bulk call
+BULK_PRESCRIPTION_MAX_RECORDS = int(os.getenv("BULK_PRESCRIPTION_MAX_RECORDS", "200"))
+
+bulk_prescriptions = BulkPrescriptionIssuer(
+    services,
+    render_processes=int(os.getenv("BULK_RENDER_PROCESSES", "0")) or None,
+    io_workers=int(os.getenv("BULK_IO_WORKERS", "16")))
+
+
+# Issue prescriptions for many patients at once, e.g. a whole ward round.
+# Body: {"prescriptions": [{"patient_name", "doctor_name", "medicines": [...]}, ...]}
+@blueprint.route('/prescriptions/bulk', methods=['POST'])
+def bulk_generate_prescriptions():
+    data = request.get_json(silent=True) or {}
+    records = data.get('prescriptions')
+    if not isinstance(records, list) or not records:
+        return jsonify({'error': 'No prescriptions provided'}), 400
+    if len(records) > BULK_PRESCRIPTION_MAX_RECORDS:
+        return jsonify({'error': f'At most {BULK_PRESCRIPTION_MAX_RECORDS} prescriptions per request'}), 413
+
+    manifest = bulk_prescriptions.issue(records)
+    created = sum(entry['status'] == 'created' for entry in manifest)
+    return jsonify({
+        'created': created,
+        'failed': len(manifest) - created,
+        'records': manifest,
+    }), 200 if created == len(manifest) else 207
+
+
+# Issue one prescription and download its QR code.  The patient, doctor and
+# medicines come from a JSON body {"patient_name", "doctor_name", "medicines":
+# [...]} or, on GET, from query arguments (medicines comma-separated)
+@blueprint.route('/generate_prescription', methods=['GET', 'POST'])
+def generate_prescription():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        data = {
+            'patient_name': request.args.get('patient_name'),
+            'doctor_name': request.args.get('doctor_name'),
+            'medicines': [medicine.strip() for value in request.args.getlist('medicines')
+                          for medicine in value.split(',') if medicine.strip()],
+        }
+    try:
+        patient_name, doctor_name, medicines = validate_record(data)
+    except BulkRecordError as e:
+        return jsonify({'error': str(e)}), 400
+
+    prescription_id = str(uuid.uuid4())
+    generate_pdf(prescription_id, medicines, patient_name, doctor_name, services)
+    qr_png = generate_qr_code(prescription_id, services)
+    return send_file(BytesIO(qr_png), mimetype='image/png', as_attachment=True,
+                     download_name='prescription_qr.png')
+
+
+def remove_qr_code():
+    qr_file_path = 'prescription_qr.png'
+    if os.path.exists(qr_file_path):
+        os.remove(qr_file_path)
+        print(f'Removed expired QR Code: "{qr_file_path}"')
+
+
+# def schedule_qr_code_removal():
+#     threading.Timer(300, remove_qr_code).start()  # 300 seconds = 5 minutes
+
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+######################################### Process Handwritten Notes #############################################
+
+# Download, OCR/parse, medicine extraction, rendering, uploads, the database
+# write and notifications run as a background job; independent stages run
+# concurrently and every stage is retried on transient errors
+notes_pipeline = build_notes_pipeline(
+    services,
+    max_workers=int(os.getenv("NOTES_JOB_WORKERS", "4")),
+    stage_workers=int(os.getenv("NOTES_STAGE_WORKERS", "8")),
+    retries=int(os.getenv("NOTES_STAGE_RETRIES", "2")),
+    max_pending=int(os.getenv("NOTES_MAX_PENDING_JOBS", "64")),
+    max_age=int(os.getenv("NOTES_JOB_MAX_AGE", "3600")))
+
+# Seconds a client is asked to wait when the job backlog is full
+NOTES_RETRY_AFTER_SECONDS = os.getenv("NOTES_RETRY_AFTER_SECONDS", "5")
+
+
+@blueprint.route('/upload_handwritten_notes', methods=['POST'])
+def upload_handwritten_notes():
+    # Get the URL and other details from the frontend
+    data = request.json
+    file_url = data.get('url')
+    patient_name = data.get('patient_name')
+    doctor_name = data.get('doctor_name')
+
+    # Validate the required inputs
+    if not file_url:
+        return jsonify({'error': 'No URL provided'}), 400
+    if not patient_name:
+        return jsonify({'error': 'No patient name provided'}), 400
+    if not doctor_name:
+        return jsonify({'error': 'No doctor name provided'}), 400
+
+    # Queue the job and return its id immediately; a full backlog is
+    # answered at once so the bounded OCR queue still pushes back on clients
+    try:
+        job = notes_pipeline.submit(
+            new_notes_job_context(file_url, patient_name, doctor_name))
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': NOTES_RETRY_AFTER_SECONDS}
+    return jsonify({
+        'job_id': job.id,
+        'status_url': f'/jobs/{job.id}',
+        'events_url': f'/jobs/{job.id}/events',
+        'qr_url': f'/jobs/{job.id}/qr',
+    }), 202
+
+
+def job_status(job):
+    status = job.to_dict()
+    if job.status == 'succeeded':
+        status['result'] = notes_job_result(job.context)
+    return status
+
+
+# Poll the status of a handwritten notes job
+@blueprint.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = notes_pipeline.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job_status(job)), 200
+
+
+# Subscribe to status changes of a job as server-sent events
+@blueprint.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    job = notes_pipeline.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    def generate():
+        version = None
+        while True:
+            if version is None or job.version != version:
+                version = job.version
+                yield f"data: {json.dumps(job_status(job))}\n\n"
+                if job.finished:
+                    return
+            # Send a keep-alive comment at least every 15 seconds
+            if job.wait_for_change(version, timeout=15) == version and not job.finished:
+                yield ": keep-alive\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+
+
+# Download the QR code of a finished job
+@blueprint.route('/jobs/<job_id>/qr', methods=['GET'])
+def get_job_qr(job_id):
+    job = notes_pipeline.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status == 'failed':
+        return jsonify({'error': job.error}), job.status_code or 500
+    if job.status != 'succeeded':
+        return jsonify({'status': job.status}), 202
+    # The PNG is dropped from the job once uploaded and rendered again here
+    qr_png = render_qr_code(job.context['prescription_id'])
+    return send_file(BytesIO(qr_png), mimetype='image/png', as_attachment=True,
+                     download_name=f'prescription_qr_{job.context["prescription_id"]}.png')
+
+
+warm_up_targets = [ocr_service, medicine_extractor, firebase, mongo, twilio, prescription_lookup]
+
+
+def stats():
+    return {
+        'ocr': loaded_stats(ocr_service),
+        'llm_cache': llm_generator.stats(),
+        'prescription_lookup': loaded_stats(prescription_lookup),
+        'notes_jobs': notes_pipeline.stats(),
+    }
+
+
+# OCR stage timings are exported as aarogya_stage_seconds{stage="ocr_*"}
+REGISTRY.register_collector(stats_collector('aarogya_ocr', lambda: loaded_stats(ocr_service)))
+REGISTRY.register_collector(stats_collector('aarogya_llm_cache', llm_generator.stats))
+REGISTRY.register_collector(stats_collector(
+    'aarogya_prescription_lookup', lambda: loaded_stats(prescription_lookup)))
@@ -0,0 +1,267 @@
+import json
+import logging
+import os
+
+import pandas as pd
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from startup import LazyResource, ensure_nltk_data
+from risk_engine import RiskScoringEngine
+from symptom_cache import SymptomNormalizationCache, dataset_symptom_phrases
+from symptom_index import RISK_VOCABULARY
+from model_store import file_sha256
+from metrics import REGISTRY, stats_collector, timed
+from blueprints.common import MODEL_ARTIFACT_DIR, loaded_stats, startup, symptom_index
+
+blueprint = Blueprint('risk', __name__)
+
+
+# NLTK's package import alone takes seconds, so the tokenizer, lemmatizer and
+# stop words are only loaded when a symptom misses the normalization cache.
+# Missing NLTK data is downloaded then, after an offline check.
+def load_nltk_normalizer():
+    ensure_nltk_data()
+    from nltk.stem import WordNetLemmatizer
+    from nltk.corpus import stopwords
+    from nltk.tokenize import word_tokenize
+    return word_tokenize, WordNetLemmatizer(), set(stopwords.words('english'))
+
+
+nltk_normalizer = LazyResource('nltk', load_nltk_normalizer, startup)
+
+
+class RiskAssessmentModel:
+    def __init__(self, smoothed_df, symptom_cache_size=4096, symptom_index=None):
+        # Load the smoothed DataFrame
+        self.smoothed_df = smoothed_df
+        # Build the log-probability scoring engine once
+        self.engine = RiskScoringEngine(smoothed_df)
+        # Memoize normalized symptom phrases so repeated symptoms skip NLTK
+        self.symptom_cache = SymptomNormalizationCache(
+            self.normalize_symptom, max_size=symptom_cache_size)
+        # Resolves normalized symptoms to table columns despite typos, plurals
+        # and word order; without it only exact column names are recognized
+        self.symptom_index = symptom_index
+
+    # Tokenize, lemmatize and remove stop words from a single symptom phrase
+    def normalize_symptom(self, symptom):
+        word_tokenize, lemmatizer, stop_words = nltk_normalizer.get()
+        tokens = word_tokenize(symptom.lower())
+        # Lemmatize and remove stop words
+        symp = [lemmatizer.lemmatize(
+            token) for token in tokens if token.isalpha() and token not in stop_words]
+        # Combine tokens back into a single string
+        return " ".join(symp)
+
+    # Preprocess user input symptoms (with tokenization, lemmatization, and stop word removal)
+    @timed('symptom_preprocess')
+    def preprocess_input(self, user_input):
+        symptoms = [symptom.strip() for symptom in user_input.split(',')]
+        return [self.symptom_cache.get(symptom) for symptom in symptoms]
+
+    # Preprocess the symptoms and resolve each one to a column of the risk
+    # table.  Returns the columns to score (the normalized phrase where
+    # nothing matched, which is scored as unknown) and one match per symptom
+    def resolve_symptoms(self, user_input):
+        symptoms_list = self.preprocess_input(user_input)
+        if self.symptom_index is None:
+            return symptoms_list, []
+        with timed('symptom_match'):
+            matches = [self.symptom_index.match(normalized, RISK_VOCABULARY, text=symptom.strip())
+                       for symptom, normalized in zip(user_input.split(','), symptoms_list)]
+        return [match.symptom or normalized
+                for match, normalized in zip(matches, symptoms_list)], matches
+
+    # Function to calculate normalized risk level probabilities based on user symptoms
+    def calculate_risk_probabilities(self, symptoms_list):
+        # Scored in log space against the precomputed matrix of the engine
+        with timed('risk_score'):
+            return self.engine.score(symptoms_list)
+
+    # Function to predict the risk level with the highest probability; also
+    # returns how each symptom was matched
+    def predict_risk_level(self, user_input):
+        symptoms_list, matches = self.resolve_symptoms(user_input)
+        risk_probs = self.calculate_risk_probabilities(symptoms_list)
+
+        # Find the risk level with the maximum probability
+        max_risk_level = max(risk_probs, key=risk_probs.get)
+        return max_risk_level, risk_probs[max_risk_level], matches
+
+    # Predict risk levels for many comma-separated symptom strings at once.
+    # Returns one result dictionary per input, in the same order; invalid
+    # items get an 'error' entry instead of failing the whole batch.
+    def predict_risk_levels(self, user_inputs):
+        results = [None] * len(user_inputs)
+        positions = []
+        symptom_lists = []
+        match_lists = []
+        for position, user_input in enumerate(user_inputs):
+            if isinstance(user_input, Exception):
+                results[position] = {'error': str(user_input)}
+            elif not isinstance(user_input, str) or not user_input.strip():
+                results[position] = {'error': 'Symptoms must be a non-empty string'}
+            else:
+                # One item that cannot be preprocessed fails on its own
+                try:
+                    symptoms_list, matches = self.resolve_symptoms(user_input)
+                except Exception as e:
+                    logging.error(f"Error preprocessing batch item {position}: {e}", exc_info=True)
+                    results[position] = {'error': str(e)}
+                    continue
+                positions.append(position)
+                symptom_lists.append(symptoms_list)
+                match_lists.append(matches)
+
+        # Score every valid item together as one matrix operation
+        with timed('risk_score'):
+            scored = self.engine.score_batch(symptom_lists)
+        for position, risk_probs, matches in zip(positions, scored, match_lists):
+            max_risk_level = max(risk_probs, key=risk_probs.get)
+            results[position] = {'risk_level': max_risk_level,
+                                 'probability': risk_probs[max_risk_level],
+                                 'matched_symptoms': [match.to_dict() for match in matches]}
+        return results
+
+
+def load_risk_model():
+    # Load your CSV and initialize the model as before
+    smoothed_df = pd.read_csv("Dataset/Final_csv.csv")
+    smoothed_df.set_index('risk level', inplace=True)
+    return RiskAssessmentModel(
+        smoothed_df, symptom_cache_size=int(os.getenv("SYMPTOM_CACHE_SIZE", "4096")),
+        symptom_index=symptom_index.get(trigger='eager'))
+
+
+# Initialize the model
+model = startup.run('risk_model', load_risk_model)
+
+# Normalized symptoms are saved next to the model artifacts and reloaded at
+# boot, so known symptoms are answered without NLTK; the file is keyed by the
+# content hash of both datasets
+SYMPTOM_CACHE_PATH = os.path.join(MODEL_ARTIFACT_DIR, 'symptom_normalizations.json')
+symptom_cache_fingerprint = {
+    'final_csv_sha256': file_sha256("Dataset/Final_csv.csv"),
+    'dataset_sha256': file_sha256("Dataset/dataset.csv"),
+}
+startup.run('symptom_cache_load', model.symptom_cache.load,
+            SYMPTOM_CACHE_PATH, symptom_cache_fingerprint)
+
+
+# Warm the symptom cache with every symptom phrase the datasets know about
+# and save it for the next boot
+def warm_symptom_cache():
+    warmed = model.symptom_cache.warm(dataset_symptom_phrases(
+        model.smoothed_df, pd.read_csv("Dataset/dataset.csv", usecols=['symptoms'])['symptoms']))
+    logging.info(f"Warmed symptom cache with {warmed} phrases")
+    if warmed:
+        os.makedirs(MODEL_ARTIFACT_DIR, exist_ok=True)
+        model.symptom_cache.save(SYMPTOM_CACHE_PATH, symptom_cache_fingerprint)
+    return warmed
+
+
+symptom_cache_warm = LazyResource('symptom_cache', warm_symptom_cache, startup)
+
+warm_up_targets = [symptom_cache_warm, nltk_normalizer]
+
+
+def stats():
+    return {'symptom_cache': model.symptom_cache.stats(),
+            'symptom_index': loaded_stats(symptom_index)}
+
+
+REGISTRY.register_collector(stats_collector('aarogya_symptom_cache', model.symptom_cache.stats))
+
+
+#####################################   Risk Assessemnt Model    ##################################################
+
+# Define a route for predicting the risk level based on symptoms
+@blueprint.route('/predict', methods=['POST'])
+def predict_risk():
+    try:
+        # Get the JSON request which contains symptoms (the body itself is
+        # never logged: it holds patient data)
+        with timed('parse'):
+            data = request.get_json()
+
+        # Extract symptoms from the request
+        symptoms = data.get('symptoms', None)
+        if symptoms is None:
+            logging.error("No symptoms provided")
+            return jsonify({'error': 'No symptoms provided'}), 400
+
+        # Predict the risk level using the model
+        risk_level, probability, matches = model.predict_risk_level(symptoms)
+
+        # Log the result
+        logging.debug(
+            f"Predicted risk level: {risk_level}, Probability: {probability}")
+
+        # Return the result as a JSON response, with the table column each
+        # symptom was matched to
+        return jsonify({'risk_level': risk_level, 'probability': probability,
+                        'matched_symptoms': [match.to_dict() for match in matches]}), 200
+    except Exception as e:
+        # Log stack trace
+        logging.error(f"Error occurred: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 500
+
+
+# Number of patients scored and streamed back per chunk of a batch request
+PREDICT_BATCH_CHUNK_SIZE = 1024
+
+
+def parse_batch_symptoms():
+    # NDJSON: one JSON value per line, either a string or {"symptoms": "..."}.
+    # A line that cannot be parsed becomes a per-item error.
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError as e:
+                items.append(ValueError(f'Invalid JSON line: {e}'))
+                continue
+            items.append(item.get('symptoms') if isinstance(item, dict) else item)
+        return items
+
+    # JSON: either a bare array or {"symptoms": [...]}
+    data = request.get_json()
+    if isinstance(data, dict):
+        data = data.get('symptoms', None)
+    if not isinstance(data, list):
+        return None
+    return [item.get('symptoms') if isinstance(item, dict) else item for item in data]
+
+
+# Define a route for predicting the risk level of many patients in one request
+@blueprint.route('/predict/batch', methods=['POST'])
+def predict_risk_batch():
+    try:
+        with timed('parse'):
+            items = parse_batch_symptoms()
+    except Exception as e:
+        logging.error(f"Error occurred: {str(e)}", exc_info=True)
+        return jsonify({'error': str(e)}), 400
+
+    if items is None:
+        logging.error("No symptoms array provided")
+        return jsonify({'error': 'No symptoms array provided'}), 400
+
+    # Stream NDJSON results back in input order, one chunk at a time.  The
+    # 200 header is already sent, so a failure ends the stream with a final
+    # error record instead of truncating it
+    def generate():
+        start = 0
+        try:
+            for start in range(0, len(items), PREDICT_BATCH_CHUNK_SIZE):
+                chunk = items[start:start + PREDICT_BATCH_CHUNK_SIZE]
+                for offset, result in enumerate(model.predict_risk_levels(chunk)):
+                    yield json.dumps({'index': start + offset, **result}) + '\n'
+        except Exception as e:
+            logging.error(f"Error occurred: {str(e)}", exc_info=True)
+            yield json.dumps({'error': str(e), 'failed_from_index': start}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
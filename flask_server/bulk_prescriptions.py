@@ -0,0 +1,191 @@
+import logging
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from metrics import timed
+from prescriptions import (logo_image_info, prescription_record, render_prescription_pdf,
+                           render_qr_code, upload_prescription_pdf, upload_qr_code)
+
+# Longest notification body; Twilio rejects SMS bodies over 1600 characters
+MAX_MESSAGE_LENGTH = 1500
+
+
+class BulkRecordError(Exception):
+    pass
+
+
+# Render one prescription's PDF and QR code; runs inside a pool worker,
+# which decodes the logo once and reuses it for every record it renders
+def render_record(prescription_id, medicines, patient_name, doctor_name):
+    return (render_prescription_pdf(prescription_id, medicines, patient_name, doctor_name),
+            render_qr_code(prescription_id))
+
+
+def validate_record(record):
+    if not isinstance(record, dict):
+        raise BulkRecordError('Record must be an object')
+    for field in ('patient_name', 'doctor_name'):
+        if not isinstance(record.get(field), str) or not record[field].strip():
+            raise BulkRecordError(f'Missing {field}')
+    medicines = record.get('medicines')
+    if not isinstance(medicines, list) or not medicines \
+            or not all(isinstance(m, str) and m.strip() for m in medicines):
+        raise BulkRecordError('medicines must be a non-empty list of names')
+    return record['patient_name'], record['doctor_name'], medicines
+
+
+# Pack (item, line) pairs into as few message bodies as fit max_length;
+# returns (body, items) for each message
+def batch_messages(lines, header='Prescription QR codes:', max_length=MAX_MESSAGE_LENGTH):
+    messages, body, items = [], header, []
+    for item, line in lines:
+        if items and len(body) + 1 + len(line) > max_length:
+            messages.append((body, items))
+            body, items = header, []
+        body += '\n' + line
+        items.append(item)
+    if items:
+        messages.append((body, items))
+    return messages
+
+
+class BulkPrescriptionIssuer:
+    """Issues many prescriptions in one call.
+
+    PDFs and QR codes are rendered across a process pool, blobs are uploaded
+    from a thread pool, all documents are written with one ``insert_many``
+    and the QR links go out in a few combined SMS/WhatsApp messages rather
+    than two per patient.  Every record ends up in the manifest with its own
+    status, so one bad record never fails the rest.
+    """
+
+    def __init__(self, services, render_processes=None, io_workers=16):
+        self.services = services
+        self.render_processes = render_processes
+        self.io_workers = io_workers
+        self._render_pool = None
+        self._io_pool = ThreadPoolExecutor(max_workers=io_workers,
+                                           thread_name_prefix='bulk-prescriptions')
+        self._lock = threading.Lock()
+
+    def _renderer(self):
+        with self._lock:
+            if self._render_pool is None:
+                # Workers import only the prescriptions module and decode
+                # the logo as they start
+                self._render_pool = ProcessPoolExecutor(
+                    max_workers=self.render_processes,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=logo_image_info)
+            return self._render_pool
+
+    @staticmethod
+    def _fail(entry, stage, error):
+        entry.update(status='failed', stage=stage, error=str(error))
+
+    def issue(self, records):
+        manifest = []
+        pending = []
+        for index, record in enumerate(records):
+            entry = {'index': index, 'status': 'pending'}
+            manifest.append(entry)
+            try:
+                patient_name, doctor_name, medicines = validate_record(record)
+            except BulkRecordError as e:
+                entry.update(status='invalid', error=str(e))
+                continue
+            entry['prescription_id'] = str(uuid.uuid4())
+            pending.append((entry, patient_name, doctor_name, medicines))
+
+        self._render(pending)
+        pending = [item for item in pending if item[0]['status'] == 'pending']
+        self._upload(pending)
+        pending = [item for item in pending if item[0]['status'] == 'pending']
+        self._save(pending)
+        saved = [item for item in pending if item[0]['status'] == 'created']
+        self._notify(saved)
+        return manifest
+
+    # Rendering happens in the pool processes, so it is timed here as a whole
+    @timed('bulk_render')
+    def _render(self, pending):
+        renderer = self._renderer()
+        futures = [renderer.submit(render_record, entry['prescription_id'], medicines,
+                                   patient_name, doctor_name)
+                   for entry, patient_name, doctor_name, medicines in pending]
+        for (entry, *_), future in zip(pending, futures):
+            try:
+                entry['_pdf'], entry['_qr'] = future.result()
+            except Exception as e:
+                self._fail(entry, 'render', e)
+
+    def _upload(self, pending):
+        bucket = self.services.bucket
+        uploads = [(entry,
+                    self._io_pool.submit(upload_prescription_pdf, bucket,
+                                         entry['prescription_id'], entry.pop('_pdf')),
+                    self._io_pool.submit(upload_qr_code, bucket,
+                                         entry['prescription_id'], entry.pop('_qr')))
+                   for entry, *_ in pending]
+        for entry, pdf_future, qr_future in uploads:
+            try:
+                entry['pdf_url'] = pdf_future.result()
+                entry['_qr_download_url'] = qr_future.result()
+            except Exception as e:
+                self._fail(entry, 'upload', e)
+
+    def _save(self, pending):
+        if not pending:
+            return
+        documents = [prescription_record(entry['prescription_id'], entry['pdf_url'],
+                                         patient_name, doctor_name)
+                     for entry, patient_name, doctor_name, _ in pending]
+        failed = {}
+        try:
+            with timed('db_write'):
+                self.services.prescriptions.insert_many(documents, ordered=False)
+        except Exception as e:
+            # pymongo's BulkWriteError lists the documents that were rejected;
+            # anything else means nothing can be assumed written
+            details = getattr(e, 'details', None)
+            if details and 'writeErrors' in details:
+                failed = {error['index']: error.get('errmsg', str(e))
+                          for error in details['writeErrors']}
+            else:
+                failed = dict.fromkeys(range(len(pending)), str(e))
+        for i, (entry, *_) in enumerate(pending):
+            if i in failed:
+                self._fail(entry, 'save', failed[i])
+            else:
+                entry['status'] = 'created'
+
+    def _notify(self, saved):
+        services = self.services
+        shortened = [(entry, patient_name,
+                      self._io_pool.submit(timed('url_shorten')(services.shorten),
+                                           entry.pop('_qr_download_url')))
+                     for entry, patient_name, *_ in saved]
+        lines = []
+        for entry, patient_name, future in shortened:
+            entry['notified'] = False
+            try:
+                entry['qr_url'] = future.result()
+                lines.append((entry, f"{patient_name}: {entry['qr_url']}"))
+            except Exception as e:
+                logging.error(f"Error shortening QR URL of {entry['prescription_id']}: {e}")
+
+        for body, entries in batch_messages(lines):
+            sent = True
+            for stage, from_, to in (
+                    ('sms_send', services.sms_from, services.notify_to),
+                    ('whatsapp_send', services.whatsapp_from, f'whatsapp:{services.notify_to}')):
+                try:
+                    with timed(stage):
+                        services.messages.create(from_=from_, body=body, to=to)
+                except Exception as e:
+                    sent = False
+                    logging.error(f"Error sending bulk prescription notification: {e}")
+            for entry in entries:
+                entry['notified'] = sent
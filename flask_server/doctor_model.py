@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+
+# Read the dataset and one-hot encode its comma-separated symptoms column
+def load_doctor_training_data(dataset_path):
+    data = pd.read_csv(dataset_path)
+    # One binary column per distinct symptom, in sorted (stable) order
+    X = data['symptoms'].str.get_dummies(sep=',').astype(np.float32)
+    y = data['doctor']
+    return X, y
+
+
+# Train the doctor recommendation model; the training columns are stored with
+# it so requests are encoded in exactly the order the trees were fitted on
+def train_doctor_model(dataset_path):
+    X, y = load_doctor_training_data(dataset_path)
+    model = RandomForestClassifier(n_estimators=100, random_state=42)
+    model.fit(X.to_numpy(), y)
+    return {'model': model, 'columns': list(X.columns)}
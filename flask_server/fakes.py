@@ -0,0 +1,157 @@
+import hashlib
+import threading
+import time
+import uuid
+
+from image_fetch import FetchError, FetchedContent
+from ocr_service import OCRResult
+
+
+# Local stand-ins for the external services in services.Services, used for
+# offline testing and benchmarking
+
+
+class FakeBlob:
+    def __init__(self, bucket, name):
+        self.bucket = bucket
+        self.name = name
+        self.public = False
+
+    def upload_from_filename(self, filename, content_type=None):
+        with open(filename, 'rb') as f:
+            self.upload_from_string(f.read(), content_type=content_type)
+
+    def upload_from_string(self, data, content_type=None):
+        if isinstance(data, str):
+            data = data.encode()
+        with self.bucket.lock:
+            self.bucket.objects[self.name] = (data, content_type)
+
+    def upload_from_file(self, file_obj, content_type=None, rewind=False):
+        if rewind:
+            file_obj.seek(0)
+        self.upload_from_string(file_obj.read(), content_type=content_type)
+
+    def make_public(self):
+        self.public = True
+
+    def generate_signed_url(self, expiration, **kwargs):
+        if hasattr(expiration, 'timestamp'):
+            expires = int(expiration.timestamp())
+        else:
+            expires = int(time.time() + expiration)
+        return (f"https://storage.local/{self.bucket.name}/{self.name}"
+                f"?Expires={expires}&Signature={uuid.uuid4().hex}")
+
+
+class FakeBucket:
+    def __init__(self, name='fake-bucket'):
+        self.name = name
+        self.objects = {}
+        self.lock = threading.Lock()
+
+    def blob(self, name):
+        return FakeBlob(self, name)
+
+
+class FakeCollection:
+    """Minimal in-memory MongoDB collection."""
+
+    def __init__(self):
+        self.documents = []
+        self.indexes = []
+        self.lock = threading.Lock()
+
+    def insert_one(self, document):
+        with self.lock:
+            self.documents.append(dict(document))
+
+    def insert_many(self, documents, ordered=True):
+        with self.lock:
+            self.documents.extend(dict(document) for document in documents)
+
+    def find_one(self, query, projection=None):
+        with self.lock:
+            for document in self.documents:
+                if all(document.get(key) == value for key, value in query.items()):
+                    if projection:
+                        return {key: value for key, value in document.items()
+                                if projection.get(key)}
+                    return dict(document)
+        return None
+
+    def update_one(self, query, update, upsert=False):
+        with self.lock:
+            for document in self.documents:
+                if all(document.get(key) == value for key, value in query.items()):
+                    document.update(update.get('$set', {}))
+                    return
+            if upsert:
+                self.documents.append({**query, **update.get('$set', {})})
+
+    def create_index(self, keys, **kwargs):
+        self.indexes.append((keys, kwargs))
+        return keys if isinstance(keys, str) else '_'.join(str(k) for k in keys)
+
+
+class FakeMessages:
+    """Records messages instead of sending them through Twilio."""
+
+    def __init__(self):
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def create(self, from_, body, to):
+        with self.lock:
+            self.sent.append({'from': from_, 'body': body, 'to': to})
+        return type('Message', (), {'sid': uuid.uuid4().hex})()
+
+
+def fake_shorten(url):
+    return 'https://tiny.local/' + hashlib.sha256(url.encode()).hexdigest()[:8]
+
+
+class FakeGenerator:
+    """Stand-in for the Gemini call: answers with a python list of the names
+    in ``medicines`` that appear in the prompt."""
+
+    def __init__(self, medicines=('Paracetamol', 'Amoxicillin', 'Ibuprofen'), delay=0.0):
+        self.medicines = medicines
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def __call__(self, prompt):
+        with self.lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        found = [m for m in self.medicines if m.lower() in prompt.lower()]
+        return f"```python\n{found!r}\n```"
+
+
+class FakeFetcher:
+    """Serves registered bodies by URL instead of going over the network."""
+
+    def __init__(self, files=None):
+        self.files = dict(files or {})
+
+    def add(self, url, content, content_type):
+        self.files[url] = (content, content_type)
+
+    def fetch(self, url):
+        if url not in self.files:
+            raise FetchError('Error fetching file from URL: HTTP 404', remote_status=404)
+        content, content_type = self.files[url]
+        return FetchedContent(url, content, hashlib.sha256(content).hexdigest(),
+                              content_type, from_cache=False)
+
+
+class FakeOCR:
+    """Returns fixed text for every image, one recognized line per line."""
+
+    def __init__(self, text='Paracetamol 500mg twice a day'):
+        self.text = text
+
+    def recognize(self, image, timeout=None):
+        return OCRResult(self.text.splitlines(), {})
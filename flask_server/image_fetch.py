@@ -0,0 +1,299 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import timed
+
+
+class FetchError(Exception):
+    """Raised when a remote file cannot be fetched; carries the HTTP status
+    the calling route should answer with and, when the remote host answered,
+    the status it returned."""
+
+    def __init__(self, message, status_code=400, remote_status=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.remote_status = remote_status
+
+
+class FetchedContent:
+    def __init__(self, url, content, sha256, content_type, from_cache):
+        self.url = url
+        self.content = content
+        self.sha256 = sha256
+        self.content_type = content_type
+        self.from_cache = from_cache
+
+
+class ContentCache:
+    """Content-addressed cache of fetched bodies.
+
+    Bodies are stored by SHA-256 in a byte-bounded in-memory LRU and,
+    when ``directory`` is set, as files on disk.  A separate URL index maps
+    each URL to the ETag, content hash and Content-Type of its last response.
+
+    Fetched files are patient data, so nothing is kept forever: disk blobs
+    are evicted least recently used first (by mtime) beyond
+    ``max_disk_bytes`` and once unused for ``max_age`` seconds, and the URL
+    index is an LRU of ``max_urls`` entries that expire after the same age.
+    """
+
+    def __init__(self, directory=None, max_memory_bytes=64 * 2**20, max_disk_bytes=512 * 2**20,
+                 max_age=24 * 3600, max_urls=10000):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age = max_age
+        self.max_urls = max_urls
+        self._blobs = OrderedDict()
+        self._memory_bytes = 0
+        self._urls = OrderedDict()
+        # Files on disk, least recently used first: sha256 -> (size, mtime)
+        # and URL index path -> mtime
+        self._disk_blobs = OrderedDict()
+        self._disk_bytes = 0
+        self._disk_urls = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(os.path.join(directory, 'blobs'), exist_ok=True)
+            os.makedirs(os.path.join(directory, 'urls'), exist_ok=True)
+            self._scan_disk()
+
+    def _blob_path(self, sha256):
+        return os.path.join(self.directory, 'blobs', sha256)
+
+    def _url_path(self, url):
+        return os.path.join(self.directory, 'urls',
+                            hashlib.sha256(url.encode()).hexdigest() + '.json')
+
+    # Index what a previous run left on disk, then apply the limits to it
+    def _scan_disk(self):
+        blobs, urls = [], []
+        for kind, found in (('blobs', blobs), ('urls', urls)):
+            with os.scandir(os.path.join(self.directory, kind)) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.tmp'):
+                        _remove(entry.path)
+                        continue
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, entry.name, stat.st_size))
+        with self._lock:
+            for mtime, name, size in sorted(blobs):
+                self._disk_blobs[name] = (size, mtime)
+                self._disk_bytes += size
+            for mtime, name, _ in sorted(urls):
+                self._disk_urls[os.path.join(self.directory, 'urls', name)] = mtime
+            self._prune_disk()
+
+    # Drop disk entries beyond the size and count limits or older than
+    # max_age; called with the lock held
+    def _prune_disk(self):
+        cutoff = time.time() - self.max_age
+        while self._disk_blobs:
+            sha256, (size, mtime) = next(iter(self._disk_blobs.items()))
+            if self._disk_bytes <= self.max_disk_bytes and mtime >= cutoff:
+                break
+            self._disk_blobs.popitem(last=False)
+            self._disk_bytes -= size
+            _remove(self._blob_path(sha256))
+        while self._disk_urls:
+            path, mtime = next(iter(self._disk_urls.items()))
+            if len(self._disk_urls) <= self.max_urls and mtime >= cutoff:
+                break
+            self._disk_urls.popitem(last=False)
+            _remove(path)
+
+    def _touch_disk_blob(self, sha256, size):
+        now = time.time()
+        try:
+            os.utime(self._blob_path(sha256), (now, now))
+        except OSError:
+            return
+        with self._lock:
+            previous = self._disk_blobs.pop(sha256, None)
+            self._disk_bytes += size - (previous[0] if previous else 0)
+            self._disk_blobs[sha256] = (size, now)
+            self._prune_disk()
+
+    def get_blob(self, sha256):
+        with self._lock:
+            if sha256 in self._blobs:
+                self._blobs.move_to_end(sha256)
+                return self._blobs[sha256]
+        if self.directory:
+            path = self._blob_path(sha256)
+            try:
+                if time.time() - os.path.getmtime(path) > self.max_age:
+                    _remove(path)
+                    return None
+                with open(path, 'rb') as f:
+                    content = f.read()
+            except OSError:
+                return None
+            self._touch_disk_blob(sha256, len(content))
+            self._remember_blob(sha256, content)
+            return content
+        return None
+
+    def put_blob(self, content):
+        sha256 = hashlib.sha256(content).hexdigest()
+        self._remember_blob(sha256, content)
+        if self.directory:
+            if not os.path.exists(self._blob_path(sha256)):
+                tmp_path = f'{self._blob_path(sha256)}.{threading.get_ident()}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(content)
+                os.replace(tmp_path, self._blob_path(sha256))
+            self._touch_disk_blob(sha256, len(content))
+        return sha256
+
+    def _remember_blob(self, sha256, content):
+        if len(content) > self.max_memory_bytes:
+            return
+        with self._lock:
+            if sha256 in self._blobs:
+                self._blobs.move_to_end(sha256)
+                return
+            self._blobs[sha256] = content
+            self._memory_bytes += len(content)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._blobs.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+
+    def _remember_url(self, url, entry):
+        with self._lock:
+            self._urls[url] = entry
+            self._urls.move_to_end(url)
+            while len(self._urls) > self.max_urls:
+                self._urls.popitem(last=False)
+
+    def get_url(self, url):
+        with self._lock:
+            entry = self._urls.get(url)
+            if entry is not None:
+                self._urls.move_to_end(url)
+        if entry is None and self.directory:
+            try:
+                with open(self._url_path(url)) as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+            self._remember_url(url, entry)
+        if entry is not None and time.time() - entry.get('fetched_at', 0) > self.max_age:
+            with self._lock:
+                self._urls.pop(url, None)
+            return None
+        return entry
+
+    def put_url(self, url, entry):
+        self._remember_url(url, entry)
+        if self.directory:
+            path = self._url_path(url)
+            tmp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self._disk_urls.pop(path, None)
+                self._disk_urls[path] = time.time()
+                self._prune_disk()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class ImageFetcher:
+    """Pooled HTTP fetcher with timeouts, a streaming body size cap and a
+    content-addressed cache.
+
+    A URL fetched before is revalidated with If-None-Match when the server
+    sent an ETag (a 304 skips the body download); without an ETag the cached
+    body is reused for ``url_ttl`` seconds.
+    """
+
+    def __init__(self, session=None, timeout=(3.05, 15), max_bytes=20 * 2**20,
+                 cache=None, url_ttl=3600, pool_size=16, chunk_size=64 * 1024):
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.cache = cache if cache is not None else ContentCache()
+        self.url_ttl = url_ttl
+        self.chunk_size = chunk_size
+        self._executor = ThreadPoolExecutor(max_workers=pool_size,
+                                            thread_name_prefix='fetch')
+
+    def fetch(self, url):
+        entry = self.cache.get_url(url)
+        cached = self.cache.get_blob(entry['sha256']) if entry else None
+
+        headers = {}
+        if cached is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            elif time.time() - entry.get('fetched_at', 0) < self.url_ttl:
+                return FetchedContent(url, cached, entry['sha256'],
+                                      entry.get('content_type'), from_cache=True)
+
+        with timed('file_fetch'):
+            try:
+                response = self.session.get(url, headers=headers, timeout=self.timeout, stream=True)
+            except requests.exceptions.RequestException as e:
+                raise FetchError(f'Error fetching file from URL: {e}') from e
+
+            with response:
+                if response.status_code == 304 and cached is not None:
+                    return FetchedContent(url, cached, entry['sha256'],
+                                          entry.get('content_type'), from_cache=True)
+                if response.status_code != 200:
+                    raise FetchError(
+                        f'Error fetching file from URL: HTTP {response.status_code}',
+                        remote_status=response.status_code)
+                content = self._read_capped(response)
+
+        sha256 = self.cache.put_blob(content)
+        content_type = response.headers.get('Content-Type')
+        self.cache.put_url(url, {
+            'etag': response.headers.get('ETag'),
+            'sha256': sha256,
+            'content_type': content_type,
+            'fetched_at': time.time(),
+        })
+        return FetchedContent(url, content, sha256, content_type, from_cache=False)
+
+    # Fetch in the background; returns a Future resolving to FetchedContent
+    def submit(self, url):
+        return self._executor.submit(self.fetch, url)
+
+    def _read_capped(self, response):
+        declared = response.headers.get('Content-Length')
+        if declared is not None and declared.isdigit() and int(declared) > self.max_bytes:
+            raise FetchError(f'Remote file exceeds {self.max_bytes} bytes', status_code=413)
+
+        chunks = []
+        received = 0
+        try:
+            for chunk in response.iter_content(chunk_size=self.chunk_size):
+                received += len(chunk)
+                if received > self.max_bytes:
+                    raise FetchError(
+                        f'Remote file exceeds {self.max_bytes} bytes', status_code=413)
+                chunks.append(chunk)
+        except requests.exceptions.RequestException as e:
+            raise FetchError(f'Error fetching file from URL: {e}') from e
+        return b''.join(chunks)
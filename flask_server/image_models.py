@@ -0,0 +1,19 @@
+import os
+
+from image_preprocessing import ImageSpec
+
+# The Keras image classifiers: model file and input format, (width, height)
+# and RGB channels
+IMAGE_MODELS = {
+    'kidney_stone': ("models/kidney_stone_detection_model.h5", ImageSpec((150, 150))),
+    'brain_tumor': ("models/Brain_Tumor_Model.h5", ImageSpec((224, 224))),
+    'skin_cancer': ("models/skin_cancer_model.h5", ImageSpec((224, 224))),
+}
+
+# Post-training quantization modes of the converted TFLite graphs
+QUANTIZATIONS = ('float32', 'float16', 'int8')
+
+
+# Converted graph next to the .h5 file, e.g. models/Brain_Tumor_Model.int8.tflite
+def tflite_path(keras_path, quantization='float32'):
+    return f"{os.path.splitext(keras_path)[0]}.{quantization}.tflite"
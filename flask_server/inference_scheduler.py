@@ -0,0 +1,151 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial
+
+import numpy as np
+
+from metrics import Histogram, timed
+
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64]
+QUEUE_WAIT_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0]
+
+
+class MicroBatcher:
+    """Collects concurrent single-image requests for one model into batches.
+
+    A worker thread takes the first queued request, then keeps collecting
+    until ``max_batch_size`` requests are queued or ``max_wait`` seconds have
+    passed, runs ``forward`` once on the stacked batch and resolves each
+    request's Future with its own rows of the output.  ``forward`` returns
+    ``(outputs, tag)``; the tag (e.g. the hash of the model that ran) is
+    passed along with every request's rows.
+    """
+
+    def __init__(self, name, forward, max_batch_size=16, max_wait=0.010):
+        self.name = name
+        self.forward = forward
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_waits = Histogram(QUEUE_WAIT_BUCKETS)
+        self._queue = queue.Queue()
+        self._buffer = None
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+    # Queue one input of shape (1, ...) and return a Future for its
+    # (output rows, tag)
+    def submit(self, inputs):
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((inputs, future, time.perf_counter()))
+        return future
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name=f'inference-{self.name}', daemon=True)
+                self._worker.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    # Copy the queued inputs into a reusable preallocated batch buffer; only
+    # the worker thread touches it and forward() finishes before it is reused
+    def _stack(self, inputs):
+        rows = sum(len(item) for item in inputs)
+        sample_shape, dtype = inputs[0].shape[1:], inputs[0].dtype
+        if (self._buffer is None or self._buffer.shape[1:] != sample_shape
+                or self._buffer.dtype != dtype or len(self._buffer) < rows):
+            self._buffer = np.empty(
+                (max(rows, self.max_batch_size),) + sample_shape, dtype=dtype)
+        return np.concatenate(inputs, out=self._buffer[:rows])
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            self.batch_sizes.observe(len(batch))
+            for _, _, enqueued in batch:
+                self.queue_waits.observe(started - enqueued)
+
+            try:
+                stacked = self._stack([inputs for inputs, _, _ in batch])
+                with timed(f'{self.name}_forward'):
+                    outputs, tag = self.forward(stacked)
+            except Exception as e:
+                logging.error(f"Batched inference for '{self.name}' failed: {e}", exc_info=True)
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            # Fan each output row back to the handler waiting for it
+            offset = 0
+            for inputs, future, _ in batch:
+                rows = len(inputs)
+                future.set_result((outputs[offset:offset + rows], tag))
+                offset += rows
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'batch_size': self.batch_sizes.snapshot(),
+            'queue_wait_seconds': self.queue_waits.snapshot(),
+        }
+
+
+class InferenceScheduler:
+    """One MicroBatcher per model of a ModelRegistry."""
+
+    def __init__(self, registry, max_batch_size=16, max_wait=0.010):
+        self.registry = registry
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._batchers = {}
+        self._lock = threading.Lock()
+
+    def _batcher(self, name):
+        batcher = self._batchers.get(name)
+        if batcher is None:
+            with self._lock:
+                batcher = self._batchers.get(name)
+                if batcher is None:
+                    # The model is fetched per batch so hot reloads apply
+                    batcher = MicroBatcher(
+                        name, partial(self._forward, name),
+                        max_batch_size=self.max_batch_size, max_wait=self.max_wait)
+                    self._batchers[name] = batcher
+        return batcher
+
+    # One forward pass; tagged with the hash of the model file that ran it
+    def _forward(self, name, batch):
+        loaded = self.registry.get_loaded(name)
+        return loaded.model.predict(batch, verbose=0), loaded.sha256
+
+    # Predict a (1, ...) input through the batch queue of the named model
+    def predict(self, name, inputs, timeout=None):
+        return self.predict_with_hash(name, inputs, timeout)[0]
+
+    # Like predict, returning (outputs, SHA-256 of the model file that made them)
+    def predict_with_hash(self, name, inputs, timeout=None):
+        return self._batcher(name).submit(inputs).result(timeout=timeout)
+
+    def stats(self):
+        return {name: batcher.stats() for name, batcher in self._batchers.items()}
@@ -0,0 +1,196 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class StageError(Exception):
+    """A stage failure that retrying cannot fix (bad input, missing config).
+
+    The job fails immediately with ``message`` and ``status_code``.
+    """
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class JobQueueFull(Exception):
+    """Raised by submit when ``max_pending`` jobs are already queued or
+    running; callers should answer 503 and have the client retry."""
+
+
+class Stage:
+    def __init__(self, name, run, retries=2, backoff=0.5):
+        self.name = name
+        self.run = run
+        self.retries = retries
+        self.backoff = backoff
+
+
+class Job:
+    """Status of one pipeline run; ``context`` is the dict the stages read
+    their inputs from and write their outputs to."""
+
+    def __init__(self, context):
+        self.id = uuid.uuid4().hex
+        self.context = context
+        self.status = 'queued'
+        self.stages = {}
+        self.error = None
+        self.status_code = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.version = 0
+        self._changed = threading.Condition()
+
+    def _update(self, **changes):
+        with self._changed:
+            for key, value in changes.items():
+                setattr(self, key, value)
+            self.updated_at = time.time()
+            self.version += 1
+            self._changed.notify_all()
+
+    def _update_stage(self, name, **changes):
+        with self._changed:
+            self.stages.setdefault(name, {}).update(changes)
+            self.updated_at = time.time()
+            self.version += 1
+            self._changed.notify_all()
+
+    @property
+    def finished(self):
+        return self.status in ('succeeded', 'failed')
+
+    # Block until the job changes after `version` (or times out); returns
+    # the current version
+    def wait_for_change(self, version, timeout=None):
+        with self._changed:
+            self._changed.wait_for(
+                lambda: self.version != version or self.finished, timeout=timeout)
+            return self.version
+
+    def to_dict(self):
+        with self._changed:
+            return {
+                'job_id': self.id,
+                'status': self.status,
+                'stages': {name: dict(stage) for name, stage in self.stages.items()},
+                'error': self.error,
+                'created_at': self.created_at,
+                'updated_at': self.updated_at,
+            }
+
+
+class JobPipeline:
+    """Runs jobs through an ordered list of stage groups on worker pools.
+
+    Stages inside one group are independent and run concurrently; a group
+    starts once the previous group has finished.  Each stage is retried with
+    exponential backoff unless it raises StageError.
+
+    At most ``max_pending`` jobs are queued or running; ``submit`` raises
+    JobQueueFull beyond that.  Finished jobs are kept for polling for
+    ``max_age`` seconds and until ``max_jobs`` newer ones have been
+    submitted, with the ``transient`` context keys (large intermediate
+    payloads) dropped as soon as they finish.
+    """
+
+    def __init__(self, groups, max_workers=4, stage_workers=8, max_jobs=1000,
+                 max_pending=64, max_age=3600, transient=()):
+        self.groups = [group if isinstance(group, (list, tuple)) else [group]
+                       for group in groups]
+        self.max_jobs = max_jobs
+        self.max_pending = max_pending
+        self.max_age = max_age
+        self.transient = tuple(transient)
+        self.pending = 0
+        self.rejected = 0
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._job_executor = ThreadPoolExecutor(max_workers=max_workers,
+                                                thread_name_prefix='job')
+        self._stage_executor = ThreadPoolExecutor(max_workers=stage_workers,
+                                                  thread_name_prefix='job-stage')
+
+    def submit(self, context):
+        job = Job(context)
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise JobQueueFull('Too many jobs in progress, try again later')
+            self.pending += 1
+            self._expire()
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        self._job_executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    # Forget finished jobs older than max_age; jobs are in submission order
+    def _expire(self):
+        cutoff = time.time() - self.max_age
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.updated_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def _run(self, job):
+        try:
+            job._update(status='running')
+            for group in self.groups:
+                futures = [self._stage_executor.submit(self._run_stage, job, stage)
+                           for stage in group]
+                wait(futures)
+                failure = next((f.exception() for f in futures if f.exception()), None)
+                if failure is not None:
+                    status_code = getattr(failure, 'status_code', 500)
+                    self._discard_transient(job)
+                    job._update(status='failed', error=str(failure), status_code=status_code)
+                    return
+            self._discard_transient(job)
+            job._update(status='succeeded')
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def _discard_transient(self, job):
+        for key in self.transient:
+            job.context.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {'pending': self.pending, 'max_pending': self.max_pending,
+                    'retained': len(self._jobs), 'rejected': self.rejected}
+
+    def _run_stage(self, job, stage):
+        for attempt in range(1, stage.retries + 2):
+            job._update_stage(stage.name, status='running', attempts=attempt)
+            start = time.perf_counter()
+            try:
+                stage.run(job.context)
+            except StageError as e:
+                job._update_stage(stage.name, status='failed', error=str(e),
+                                  seconds=time.perf_counter() - start)
+                raise
+            except Exception as e:
+                logging.error(f"Stage '{stage.name}' of job {job.id} failed "
+                              f"(attempt {attempt}): {e}", exc_info=True)
+                job._update_stage(stage.name, error=str(e),
+                                  seconds=time.perf_counter() - start)
+                if attempt > stage.retries:
+                    job._update_stage(stage.name, status='failed')
+                    raise
+                time.sleep(stage.backoff * 2 ** (attempt - 1))
+            else:
+                job._update_stage(stage.name, status='succeeded', error=None,
+                                  seconds=time.perf_counter() - start)
+                return
@@ -0,0 +1,85 @@
+import hashlib
+import threading
+from concurrent.futures import Future
+
+from metrics import timed
+from result_cache import PredictionCache
+
+
+class CachedGenerator:
+    """Caches ``generate(prompt) -> text`` by model name and normalized prompt.
+
+    Prompts are case-folded with collapsed whitespace before hashing, so the
+    same OCR text read twice maps to one entry.  Concurrent calls with the
+    same key share a single upstream call: the first caller runs it and the
+    others wait on its result.  Replies that ``validate`` rejects (by
+    raising) are returned but not cached, so a retry asks the model again.
+    """
+
+    def __init__(self, generate, cache=None, model_name='gemini-1.5-flash', validate=None):
+        self.generate = generate
+        self.cache = cache if cache is not None else PredictionCache()
+        self.model_name = model_name
+        self.validate = validate
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.upstream_calls = 0
+        self.coalesced = 0
+
+    def key(self, prompt):
+        normalized = " ".join(prompt.casefold().split())
+        digest = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+        return f'llm:{self.model_name}:{digest}'
+
+    def __call__(self, prompt):
+        key = self.key(prompt)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached['text']
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return future.result()
+
+        try:
+            # A call that finished between the lookup and the lock above has
+            # already stored its reply
+            cached = self.cache.backend.get(key)
+            if cached is not None:
+                text = cached['text']
+            else:
+                with self._lock:
+                    self.upstream_calls += 1
+                with timed('llm_call'):
+                    text = self.generate(prompt)
+                if self._cacheable(text):
+                    self.cache.set(key, {'text': text})
+            future.set_result(text)
+            return text
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def _cacheable(self, text):
+        if self.validate is None:
+            return True
+        try:
+            self.validate(text)
+            return True
+        except Exception:
+            return False
+
+    def stats(self):
+        with self._lock:
+            inflight = len(self._inflight)
+        return dict(self.cache.stats(), upstream_calls=self.upstream_calls,
+                    coalesced=self.coalesced, inflight=inflight)
@@ -0,0 +1,182 @@
+import re
+from collections import Counter, defaultdict
+from difflib import SequenceMatcher
+
+import pandas as pd
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# A segment that names a dosage form or a strength, with or without its
+# unit ("Dolo 650"), is expected to hold a medicine
+PRESCRIPTION_LINE = re.compile(
+    r"\b(tab|tabs|tablet|cap|caps|capsule|syp|syrup|inj|injection|oint|ointment|"
+    r"gel|drops?|susp|suspension)\b|\d+\s*(mg|mcg|ml|gm|g|iu)\b|[a-z]{3,}\s+\d+(\.\d+)?\b",
+    re.IGNORECASE)
+
+# Prescription segments: lines, and the comma or semicolon separated items
+# of a line that lists several medicines
+SEGMENT_SEPARATOR = re.compile(r"[\n,;]")
+
+# Single-word names in the drug list that are everyday or prescription words
+COMMON_WORDS = frozenset({
+    'cap', 'care', 'cold', 'cope', 'copd', 'cream', 'daily', 'day', 'extra', 'flu',
+    'gel', 'heavy', 'light', 'muse', 'night', 'one', 'oral', 'plus', 'relief',
+    'soma', 'solution', 'tab', 'tablet', 'tempo', 'topical', 'urban', 'uses', 'zinc',
+})
+
+# Key of the canonical name stored on a trie node
+_END = ''
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _trigrams(token):
+    padded = f'  {token} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# Drug, generic, brand and related drug names from the drugs.com dataset
+def load_medicine_names(path):
+    df = pd.read_csv(path, usecols=['drug_name', 'generic_name', 'brand_names', 'related_drugs'])
+    names = []
+    for column in ('drug_name', 'generic_name', 'brand_names'):
+        for value in df[column].dropna():
+            names.extend(value.split(','))
+    for value in df['related_drugs'].dropna():
+        # "name: https://www.drugs.com/... | name: ..."
+        names.extend(part.split(':')[0] for part in value.split('|'))
+    # Drop route qualifiers such as "acyclovir (topical)"
+    return [re.sub(r"\(.*", "", name).strip() for name in names]
+
+
+class MedicineMatch:
+    def __init__(self, name, text, score):
+        self.name = name
+        # Matched span of the input text
+        self.text = text
+        # 1.0 for an exact match, the similarity ratio for a fuzzy one
+        self.score = score
+
+
+class MedicineExtraction:
+    def __init__(self, matches, confidence):
+        self.matches = matches
+        self.confidence = confidence
+
+    @property
+    def medicines(self):
+        return list(dict.fromkeys(match.name for match in self.matches))
+
+
+class MedicineExtractor:
+    """Finds known medicine names in OCR text without a model call.
+
+    Names are compiled into a trie over word tokens and matched
+    longest-first in one pass over the text, so multi-word names
+    ("belladonna tincture") beat their prefixes.  Tokens left unmatched are
+    compared against single-word names that share trigrams with them, which
+    absorbs OCR slips like "Amoxicilin" or "Cimetidme".
+
+    ``confidence`` of an extraction is the mean match score scaled by the
+    share of prescription-looking segments (a line or comma-separated item
+    with a dosage form or strength) that contained a match, so an unknown
+    brand pulls it down.  An extraction with any fuzzy match is never
+    confident: a corrected name may be a different drug.
+    """
+
+    def __init__(self, names, fuzzy_threshold=0.84, min_fuzzy_length=5, min_confidence=0.8):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.min_fuzzy_length = min_fuzzy_length
+        self.min_confidence = min_confidence
+        self._trie = {}
+        self._single = {}
+        self._trigram_index = defaultdict(list)
+
+        for name in names:
+            tokens = tokenize(name)
+            if not tokens or not any(len(t) >= 3 and not t.isdigit() for t in tokens):
+                continue
+            if len(tokens) == 1 and tokens[0] in COMMON_WORDS:
+                continue
+            display = name[:1].upper() + name[1:]
+            node = self._trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node.setdefault(_END, display)
+            if len(tokens) == 1 and len(tokens[0]) >= min_fuzzy_length \
+                    and tokens[0] not in self._single:
+                self._single[tokens[0]] = node[_END]
+                for trigram in _trigrams(tokens[0]):
+                    self._trigram_index[trigram].append(tokens[0])
+
+    @classmethod
+    def from_drugs_csv(cls, path, **kwargs):
+        return cls(load_medicine_names(path), **kwargs)
+
+    def __len__(self):
+        return len(self._single)
+
+    def _longest_match(self, tokens, start):
+        node, name, end = self._trie, None, start
+        for i in range(start, len(tokens)):
+            node = node.get(tokens[i])
+            if node is None:
+                break
+            if _END in node:
+                name, end = node[_END], i + 1
+        return name, end
+
+    def _fuzzy_match(self, token):
+        if len(token) < self.min_fuzzy_length or not token.isalpha() or token in COMMON_WORDS:
+            return None, 0.0
+        shared = Counter()
+        for trigram in _trigrams(token):
+            shared.update(self._trigram_index.get(trigram, ()))
+        best, best_score = None, 0.0
+        for candidate, _ in shared.most_common(10):
+            score = SequenceMatcher(None, token, candidate).ratio()
+            if score > best_score:
+                best, best_score = candidate, score
+        if best_score < self.fuzzy_threshold:
+            return None, 0.0
+        return self._single[best], best_score
+
+    def extract_line(self, line):
+        tokens = tokenize(line)
+        matches = []
+        i = 0
+        while i < len(tokens):
+            name, end = self._longest_match(tokens, i)
+            if name is not None:
+                matches.append(MedicineMatch(name, ' '.join(tokens[i:end]), 1.0))
+                i = end
+                continue
+            name, score = self._fuzzy_match(tokens[i])
+            if name is not None:
+                matches.append(MedicineMatch(name, tokens[i], score))
+            i += 1
+        return matches
+
+    def extract(self, text):
+        matches = []
+        expected = covered = 0
+        for segment in SEGMENT_SEPARATOR.split(text):
+            segment_matches = self.extract_line(segment)
+            matches.extend(segment_matches)
+            if PRESCRIPTION_LINE.search(segment):
+                expected += 1
+                covered += bool(segment_matches)
+
+        if not matches:
+            return MedicineExtraction([], 0.0)
+        mean_score = sum(match.score for match in matches) / len(matches)
+        coverage = covered / expected if expected else 1.0
+        return MedicineExtraction(matches, mean_score * coverage)
+
+    def is_confident(self, extraction):
+        return (bool(extraction.matches)
+                and all(match.score == 1.0 for match in extraction.matches)
+                and extraction.confidence >= self.min_confidence)
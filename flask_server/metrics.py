@@ -0,0 +1,215 @@
+import bisect
+import functools
+import threading
+import time
+
+
+class Histogram:
+    """Thread-safe cumulative histogram with fixed upper bucket bounds."""
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    # Cumulative count per upper bound ("+Inf" last), plus sum and count
+    def snapshot(self):
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        cumulative = []
+        running = 0
+        for bound, bucket_count in zip(self.buckets + ['+Inf'], counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return {'buckets': cumulative, 'sum': total, 'count': count}
+
+
+class Counter:
+    """Thread-safe monotonically increasing count."""
+
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        with self._lock:
+            return self._value
+
+
+class MetricFamily:
+    """A named counter or histogram with one child per combination of label
+    values, created on first use."""
+
+    def __init__(self, name, help, kind, labelnames=(), factory=Counter):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._factory())
+        return child
+
+    def children(self):
+        with self._lock:
+            return list(self._children.items())
+
+
+# Seconds buckets for hot-path stages, from sub-millisecond lookups to OCR
+STAGE_BUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                 1.0, 2.5, 5.0, 10.0, 30.0]
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_bound(bound):
+    return bound if isinstance(bound, str) else repr(float(bound))
+
+
+class MetricsRegistry:
+    """Counters and histograms rendered in the Prometheus text format.
+
+    Components that already keep their own statistics register a collector
+    instead: a callable returning (name, help, kind, labels dict, value)
+    tuples read at scrape time.
+    """
+
+    def __init__(self):
+        self._families = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _family(self, name, help, kind, labelnames, factory):
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = MetricFamily(name, help, kind, labelnames, factory)
+            return family
+
+    def counter(self, name, help, labelnames=()):
+        return self._family(name, help, 'counter', labelnames, Counter)
+
+    def histogram(self, name, help, labelnames=(), buckets=STAGE_BUCKETS):
+        return self._family(name, help, 'histogram', labelnames, lambda: Histogram(buckets))
+
+    def register_collector(self, collector):
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        with self._lock:
+            families = list(self._families.values())
+            collectors = list(self._collectors)
+        lines = []
+        for family in families:
+            lines += [f'# HELP {family.name} {family.help}', f'# TYPE {family.name} {family.kind}']
+            for values, child in family.children():
+                if family.kind == 'counter':
+                    lines.append(f'{family.name}{_format_labels(family.labelnames, values)} {child.value}')
+                    continue
+                snapshot = child.snapshot()
+                for bound, count in snapshot['buckets']:
+                    labels = _format_labels(family.labelnames, values, [('le', _format_bound(bound))])
+                    lines.append(f'{family.name}_bucket{labels} {count}')
+                labels = _format_labels(family.labelnames, values)
+                lines.append(f'{family.name}_sum{labels} {snapshot["sum"]}')
+                lines.append(f'{family.name}_count{labels} {snapshot["count"]}')
+
+        collected = {}
+        for collector in collectors:
+            try:
+                samples = list(collector())
+            except Exception:
+                continue
+            for name, help, kind, labels, value in samples:
+                collected.setdefault((name, help, kind), []).append((labels, value))
+        for (name, help, kind), samples in collected.items():
+            lines += [f'# HELP {name} {help}', f'# TYPE {name} {kind}']
+            for labels, value in samples:
+                lines.append(f'{name}{_format_labels(labels, labels.values())} {float(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry served at /metrics
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'aarogya_stage_seconds', 'Wall time of each hot-path stage', ['stage'])
+STAGE_ERRORS = REGISTRY.counter(
+    'aarogya_stage_errors_total', 'Hot-path stages that raised', ['stage'])
+
+
+class timed:
+    """Record the wall time of a stage in STAGE_SECONDS (and a failure in
+    STAGE_ERRORS); usable as a context manager or a function decorator."""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self._histogram = STAGE_SECONDS.labels(stage)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(time.perf_counter() - self._start)
+        if exc_type is not None:
+            STAGE_ERRORS.labels(self.stage).inc()
+        return False
+
+    def __call__(self, function):
+        histogram, stage = self._histogram, self.stage
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            except Exception:
+                STAGE_ERRORS.labels(stage).inc()
+                raise
+            finally:
+                histogram.observe(time.perf_counter() - start)
+        return wrapper
+
+
+# Collector exposing the numeric fields of a component's stats() as gauges
+# named <prefix>_<field>; stats() may return None while it is not built
+def stats_collector(prefix, stats, labels=None):
+    def collect():
+        values = stats()
+        if values is None:
+            return []
+        return [(f'{prefix}_{key}', f'{key} reported by {prefix}', 'gauge', dict(labels or {}), value)
+                for key, value in values.items()
+                if isinstance(value, (int, float)) and not isinstance(value, bool)]
+    return collect
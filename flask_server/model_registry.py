@@ -0,0 +1,145 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from model_store import file_sha256
+
+
+def load_keras_model(path):
+    # Imported lazily so the registry itself does not pull in TensorFlow
+    import tensorflow as tf
+    return tf.keras.models.load_model(path)
+
+
+# Bytes held by a model's weights, the bulk of its resident memory
+def model_memory_bytes(model):
+    if hasattr(model, 'get_weights'):
+        return int(sum(weights.nbytes for weights in model.get_weights()))
+    return getattr(model, 'memory_bytes', None)
+
+
+class LoadedModel:
+    def __init__(self, model, sha256):
+        self.model = model
+        # SHA-256 of the file this model was loaded from
+        self.sha256 = sha256
+
+
+class _ModelEntry:
+    def __init__(self, name, path, loader):
+        self.name = name
+        self.path = path
+        self.loader = loader
+        # Replaced as a whole on (re)load, so a model and its file hash are
+        # always read together
+        self.loaded = None
+        self.mtime = None
+        self.last_checked = 0.0
+        self.load_seconds = None
+        self.memory_bytes = None
+        self.loads = 0
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """Process-wide registry of lazily loaded, resident models.
+
+    Each model is loaded on first ``get`` and then kept in memory.  When
+    ``hot_reload`` is enabled the model file's mtime is checked (at most every
+    ``reload_check_interval`` seconds) and the model is reloaded if the file
+    was replaced.
+    """
+
+    def __init__(self, hot_reload=True, reload_check_interval=1.0):
+        self.hot_reload = hot_reload
+        self.reload_check_interval = reload_check_interval
+        self._entries = {}
+
+    def register(self, name, path, loader=load_keras_model):
+        self._entries[name] = _ModelEntry(name, path, loader)
+
+    def names(self):
+        return list(self._entries)
+
+    def path(self, name):
+        return self._entries[name].path
+
+    # SHA-256 of the model file currently resident (loading it if needed)
+    def file_hash(self, name):
+        return self.get_loaded(name).sha256
+
+    def get(self, name):
+        return self.get_loaded(name).model
+
+    # The resident model and its file hash as one LoadedModel, for callers
+    # that must attribute a prediction to the exact file that made it
+    def get_loaded(self, name):
+        entry = self._entries[name]
+        loaded = entry.loaded
+        if loaded is not None and not self._file_changed(entry):
+            return loaded
+
+        with entry.lock:
+            # Another thread may have (re)loaded it while we waited for the lock
+            if entry.loaded is None or self._file_changed(entry, force=True):
+                self._load(entry)
+            return entry.loaded
+
+    def _file_changed(self, entry, force=False):
+        if not self.hot_reload or entry.mtime is None:
+            return False
+        now = time.monotonic()
+        if not force and now - entry.last_checked < self.reload_check_interval:
+            return False
+        entry.last_checked = now
+        try:
+            return os.path.getmtime(entry.path) != entry.mtime
+        except OSError:
+            # Keep serving the resident model if the file is briefly missing
+            # while being replaced
+            return False
+
+    def _load(self, entry):
+        mtime = os.path.getmtime(entry.path)
+        # Hashed before loading: a file replaced during the load changes the
+        # mtime recorded above, so the next check reloads both together
+        sha256 = file_sha256(entry.path)
+        start = time.perf_counter()
+        model = entry.loader(entry.path)
+        entry.load_seconds = time.perf_counter() - start
+        entry.memory_bytes = model_memory_bytes(model)
+        entry.loaded = LoadedModel(model, sha256)
+        entry.mtime = mtime
+        entry.last_checked = time.monotonic()
+        entry.loads += 1
+        logging.info(
+            f"Loaded model '{entry.name}' from {entry.path} in {entry.load_seconds:.2f}s")
+
+    # Load the given models (all by default) and run one dummy forward pass
+    # each so the first real request does not pay for graph tracing
+    def warm_up(self, names=None):
+        for name in names or self.names():
+            try:
+                model = self.get(name)
+                input_shape = getattr(model, 'input_shape', None)
+                if input_shape is not None:
+                    dummy = np.zeros((1,) + tuple(input_shape[1:]), dtype=np.float32)
+                    model.predict(dummy, verbose=0)
+            except Exception as e:
+                logging.error(f"Warm-up of model '{name}' failed: {e}", exc_info=True)
+
+    def stats(self):
+        return {
+            name: {
+                'path': entry.path,
+                'loaded': entry.loaded is not None,
+                'loads': entry.loads,
+                'load_seconds': entry.load_seconds,
+                'memory_bytes': entry.memory_bytes,
+                'sha256': entry.loaded.sha256 if entry.loaded else None,
+            }
+            for name, entry in self._entries.items()
+        }
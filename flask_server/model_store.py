@@ -0,0 +1,96 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Write a file through a uniquely named temporary file in the same
+# directory and rename it into place, so processes saving the same artifact
+# at once never write into each other's file
+def _write_atomically(path, write, mode='wb'):
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory or '.', prefix=f'{name}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ModelArtifactStore:
+    """Train-once store for scikit-learn models.
+
+    Each artifact is saved with joblib next to a small JSON metadata file
+    holding the SHA-256 of the dataset it was trained on plus any extra
+    fingerprint (e.g. library versions).  ``load_or_train`` only calls the
+    training function when that fingerprint changes.
+    """
+
+    def __init__(self, directory='artifacts'):
+        self.directory = directory
+
+    def artifact_path(self, name):
+        return os.path.join(self.directory, f'{name}.joblib')
+
+    def metadata_path(self, name):
+        return os.path.join(self.directory, f'{name}.json')
+
+    def read_metadata(self, name):
+        try:
+            with open(self.metadata_path(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # joblib is imported on use: model_registry imports this module at boot
+    def save(self, name, artifact, fingerprint):
+        import joblib
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to temporary files and rename so a crash never leaves a
+        # half-written artifact behind a valid metadata file
+        _write_atomically(self.artifact_path(name), lambda f: joblib.dump(artifact, f))
+        _write_atomically(
+            self.metadata_path(name),
+            lambda f: json.dump({**fingerprint, 'saved_at': time.time()}, f, indent=2), mode='w')
+
+    def load(self, name, mmap=False):
+        import joblib
+        return joblib.load(self.artifact_path(name), mmap_mode='r' if mmap else None)
+
+    # Load the artifact trained on dataset_path, retraining only when the
+    # dataset content hash or the extra fingerprint differ from the saved one
+    def load_or_train(self, name, dataset_path, train, extra_fingerprint=None, mmap=False):
+        fingerprint = {'dataset_sha256': file_sha256(dataset_path),
+                       **(extra_fingerprint or {})}
+        metadata = self.read_metadata(name)
+
+        if metadata is not None and os.path.exists(self.artifact_path(name)) and all(
+                metadata.get(key) == value for key, value in fingerprint.items()):
+            try:
+                artifact = self.load(name, mmap=mmap)
+                logging.info(f"Loaded model artifact '{name}' from {self.artifact_path(name)}")
+                return artifact
+            except Exception as e:
+                logging.warning(f"Could not load model artifact '{name}', retraining: {e}")
+
+        start = time.perf_counter()
+        artifact = train(dataset_path)
+        logging.info(
+            f"Trained model artifact '{name}' in {time.perf_counter() - start:.2f}s")
+        self.save(name, artifact, fingerprint)
+        return artifact
@@ -0,0 +1,264 @@
+import ast
+import logging
+import os
+import uuid
+
+from image_fetch import FetchError
+from job_pipeline import JobPipeline, Stage, StageError
+from metrics import timed
+from ocr_service import OCRBusyError
+from pdf_extraction import iter_pdf_pages
+from prescriptions import (qr_message, prescription_record, render_prescription_pdf,
+                           render_qr_code, upload_prescription_pdf, upload_qr_code)
+from services import MissingConfigurationError
+
+
+# Allowed file extensions
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'pdf', 'txt', 'plain'}
+
+# Longest time a request waits for its OCR result
+OCR_TIMEOUT_SECONDS = float(os.getenv("OCR_TIMEOUT_SECONDS", "60"))
+
+
+# Page limits of the PDF extraction stage; image-only (scanned) pages are
+# rendered at PDF_OCR_DPI and sent through the shared OCR engines
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "20000"))
+PDF_OCR_DPI = int(os.getenv("PDF_OCR_DPI", "200"))
+
+
+def process_pdf(pdf_path, ocr=None):
+    try:
+        pages = iter_pdf_pages(pdf_path, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS,
+                               ocr=ocr, dpi=PDF_OCR_DPI, ocr_timeout=OCR_TIMEOUT_SECONDS)
+        return "\n".join(page.text for page in pages if page.text)
+    except OCRBusyError:
+        raise
+    except Exception as e:
+        print(f"Error extracting text from PDF: {e}")
+        return ""
+
+
+def process_image(img_path, ocr):
+    # Perform OCR on the image with one of the shared engines
+    try:
+        result = ocr.recognize(img_path, timeout=OCR_TIMEOUT_SECONDS)
+        logging.debug(f"OCR stage timings: {result.timings}")
+        # Combine text from all recognized regions
+        return result.text
+    except OCRBusyError:
+        raise
+    except Exception as e:
+        print(f"Error during OCR processing: {e}")
+        return ""
+
+
+def medicine_prompt(full_text):
+    return f"Extract medicine from this text: {full_text} and give me a python list only with medicine names."
+
+
+# Pull the python list out of the model's reply
+def parse_medicine_list(text):
+    start = text.find("[")
+    end = text.rfind("]") + 1
+    if start == -1 or end == 0:
+        raise ValueError('No list found in the model response')
+    medicines = ast.literal_eval(text[start:end])
+    return [str(medicine) for medicine in medicines]
+
+
+#####################################   Pipeline stages   ##################################################
+
+# Each stage reads its inputs from and writes its outputs to the job context
+
+def fetch_file(services):
+    def run(context):
+        try:
+            fetched = services.fetcher.fetch(context['url'])
+        except FetchError as e:
+            # Too large and 4xx answers are final; network errors and 5xx
+            # are retried
+            if e.status_code == 413 or (e.remote_status and 400 <= e.remote_status < 500):
+                raise StageError(str(e), status_code=e.status_code)
+            raise
+
+        # Extract file extension from content type
+        content_type = (fetched.content_type or '').split(';')[0].strip()
+        file_extension = content_type.split('/')[-1]
+        if file_extension not in ALLOWED_EXTENSIONS:
+            raise StageError('Invalid file type')
+        context['file_extension'] = file_extension
+        context['content'] = fetched.content
+    return run
+
+
+def extract_text(services):
+    def run(context):
+        file_extension = context['file_extension']
+        if file_extension in {'txt', 'plain'}:
+            full_text = context['content'].decode('utf-8', errors='replace')
+        else:
+            # Save the file temporarily for the OCR / PDF readers
+            file_path = f'uploads/{uuid.uuid4().hex}.{file_extension}'
+            with open(file_path, 'wb') as f:
+                f.write(context['content'])
+            try:
+                if file_extension == 'pdf':
+                    with timed('pdf_extract'):
+                        full_text = process_pdf(file_path, services.ocr)
+                else:
+                    full_text = process_image(file_path, services.ocr)
+            except OCRBusyError as e:
+                # Retrying would only add load to the saturated OCR queue
+                raise StageError(str(e), status_code=503)
+            finally:
+                os.remove(file_path)
+
+        if not full_text:
+            raise StageError('No readable content found in the file')
+        context['full_text'] = full_text
+        # The fetched file (up to FETCH_MAX_BYTES) is not needed any more
+        context.pop('content', None)
+    return run
+
+
+# Use the local drug-list matcher when it is confident and only ask the
+# model otherwise
+def extract_medicines(services):
+    def run(context):
+        extractor = services.medicine_extractor
+        with timed('medicine_match'):
+            local = extractor.extract(context['full_text']) if extractor else None
+        if local is not None and extractor.is_confident(local):
+            context['medicines'] = local.medicines
+            context['medicine_source'] = 'local'
+            return
+
+        try:
+            reply = services.generate(medicine_prompt(context['full_text']))
+        except MissingConfigurationError as e:
+            if local is not None and local.medicines:
+                context['medicines'] = local.medicines
+                context['medicine_source'] = 'local'
+                return
+            raise StageError(str(e), status_code=500)
+        # A malformed reply raises here and the stage is retried
+        medicines = parse_medicine_list(reply)
+        if not medicines:
+            raise StageError('No medicines found in the text')
+        context['medicines'] = medicines
+        context['medicine_source'] = 'model'
+    return run
+
+
+def render_pdf(services):
+    def run(context):
+        context['pdf_bytes'] = render_prescription_pdf(
+            context['prescription_id'], context['medicines'],
+            context['patient_name'], context['doctor_name'])
+    return run
+
+
+def render_qr(services):
+    def run(context):
+        context['qr_png'] = render_qr_code(context['prescription_id'])
+    return run
+
+
+def upload_pdf(services):
+    def run(context):
+        context['pdf_url'] = upload_prescription_pdf(
+            services.bucket, context['prescription_id'], context['pdf_bytes'])
+        context.pop('pdf_bytes', None)
+    return run
+
+
+def upload_qr(services):
+    def run(context):
+        context['qr_download_url'] = upload_qr_code(
+            services.bucket, context['prescription_id'], context['qr_png'])
+        context.pop('qr_png', None)
+    return run
+
+
+# An upsert keyed on prescription_id, so a retry after a write that landed
+# but timed out does not store the prescription twice
+def save_record(services):
+    def run(context):
+        record = prescription_record(context['prescription_id'], context['pdf_url'],
+                                     context['patient_name'], context['doctor_name'])
+        with timed('db_write'):
+            services.prescriptions.update_one(
+                {'prescription_id': record['prescription_id']}, {'$set': record}, upsert=True)
+    return run
+
+
+def shorten_qr_url(services):
+    def run(context):
+        with timed('url_shorten'):
+            context['qr_short_url'] = services.shorten(context['qr_download_url'])
+    return run
+
+
+def send_sms(services):
+    def run(context):
+        with timed('sms_send'):
+            services.messages.create(
+                from_=services.sms_from, body=qr_message(context['qr_short_url']),
+                to=services.notify_to)
+    return run
+
+
+def send_whatsapp(services):
+    def run(context):
+        with timed('whatsapp_send'):
+            services.messages.create(
+                from_=services.whatsapp_from, body=qr_message(context['qr_short_url']),
+                to=f'whatsapp:{services.notify_to}')
+    return run
+
+
+# Context keys holding file, PDF and QR bytes; they are popped by the stages
+# that consume them and dropped from failed jobs, so retained jobs stay small
+NOTES_TRANSIENT_KEYS = ('content', 'pdf_bytes', 'qr_png')
+
+
+# Stage groups of the handwritten notes job; stages inside a group are
+# independent and run concurrently.  The message sends are never retried: a
+# send that went out and then timed out would message the patient twice
+def build_notes_pipeline(services, max_workers=4, stage_workers=8, retries=2, backoff=0.5,
+                         max_pending=64, max_age=3600):
+    def stage(name, factory, retries=retries):
+        return Stage(name, factory(services), retries=retries, backoff=backoff)
+
+    return JobPipeline([
+        stage('fetch', fetch_file),
+        stage('extract_text', extract_text),
+        stage('extract_medicines', extract_medicines),
+        [stage('render_pdf', render_pdf), stage('render_qr', render_qr)],
+        [stage('upload_pdf', upload_pdf), stage('upload_qr', upload_qr)],
+        [stage('save_record', save_record), stage('shorten_url', shorten_qr_url)],
+        [stage('send_sms', send_sms, retries=0),
+         stage('send_whatsapp', send_whatsapp, retries=0)],
+    ], max_workers=max_workers, stage_workers=stage_workers, max_pending=max_pending,
+        max_age=max_age, transient=NOTES_TRANSIENT_KEYS)
+
+
+def new_notes_job_context(file_url, patient_name, doctor_name):
+    return {
+        'url': file_url,
+        'patient_name': patient_name,
+        'doctor_name': doctor_name,
+        'prescription_id': str(uuid.uuid4()),
+    }
+
+
+# Public view of a finished job's outputs
+def notes_job_result(context):
+    return {
+        'prescription_id': context.get('prescription_id'),
+        'medicines': context.get('medicines'),
+        'medicine_source': context.get('medicine_source'),
+        'pdf_url': context.get('pdf_url'),
+        'qr_url': context.get('qr_short_url'),
+    }
@@ -0,0 +1,146 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import STAGE_SECONDS, Histogram
+
+
+STAGE_BUCKETS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# PaddleOCR attributes holding the detection, angle classification and
+# recognition predictors, and the stage name each one is reported under
+STAGE_ATTRIBUTES = {
+    'text_detector': 'detection',
+    'text_classifier': 'classification',
+    'text_recognizer': 'recognition',
+}
+
+
+class OCRBusyError(Exception):
+    """Raised when the OCR queue is full; callers should answer 503."""
+
+
+class OCRResult:
+    def __init__(self, lines, timings):
+        self.lines = lines
+        self.timings = timings
+
+    # One recognized line per text line, so readers can tell where a
+    # prescription line ends
+    @property
+    def text(self):
+        return '\n'.join(self.lines)
+
+
+# Build a PaddleOCR engine from the model directories bundled with the server,
+# so no default weights are downloaded
+def bundled_paddle_ocr(model_dir='./saved_models/en'):
+    from paddleocr import PaddleOCR
+    return PaddleOCR(
+        det_model_dir=f"{model_dir}/det",
+        rec_model_dir=f"{model_dir}/rec",
+        cls_model_dir=f"{model_dir}/cls",
+        use_angle_cls=True,
+        lang='en',
+        show_log=False,
+    )
+
+
+class _TimedStage:
+    # Wraps one predictor of an engine and records its wall time per call
+    def __init__(self, predictor, stage, timings):
+        self._predictor = predictor
+        self._stage = stage
+        self._timings = timings
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._predictor(*args, **kwargs)
+        finally:
+            self._timings[self._stage] = (self._timings.get(self._stage, 0.0)
+                                          + time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._predictor, name)
+
+
+class OCRService:
+    """Fixed pool of pre-initialized OCR engines behind a bounded queue.
+
+    Each worker thread owns one engine, built from the bundled model dirs
+    when the service starts.  ``submit`` raises OCRBusyError instead of
+    queueing when ``queue_size`` requests are already waiting.
+    """
+
+    def __init__(self, pool_size=1, queue_size=8, engine_factory=bundled_paddle_ocr):
+        self.pool_size = pool_size
+        self._queue = queue.Queue(maxsize=queue_size)
+        self.stage_seconds = {stage: Histogram(STAGE_BUCKETS)
+                              for stage in list(STAGE_ATTRIBUTES.values()) + ['total']}
+        self.rejected = 0
+
+        ready = []
+        self._workers = []
+        for i in range(pool_size):
+            timings = {}
+            engine = self._instrument(engine_factory(), timings)
+            ready.append(engine)
+            worker = threading.Thread(target=self._run, args=(engine, timings),
+                                      name=f'ocr-{i}', daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    @staticmethod
+    def _instrument(engine, timings):
+        for attribute, stage in STAGE_ATTRIBUTES.items():
+            predictor = getattr(engine, attribute, None)
+            if predictor is not None:
+                setattr(engine, attribute, _TimedStage(predictor, stage, timings))
+        return engine
+
+    # Queue an image (path or ndarray) for OCR; returns a Future of OCRResult
+    def submit(self, image):
+        future = Future()
+        try:
+            self._queue.put_nowait((image, future))
+        except queue.Full:
+            self.rejected += 1
+            raise OCRBusyError('OCR service is busy, try again later')
+        return future
+
+    def recognize(self, image, timeout=None):
+        return self.submit(image).result(timeout=timeout)
+
+    def _run(self, engine, timings):
+        while True:
+            image, future = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            timings.clear()
+            start = time.perf_counter()
+            try:
+                result = engine.ocr(image, cls=True)
+            except Exception as e:
+                logging.error(f"OCR failed: {e}", exc_info=True)
+                future.set_exception(e)
+                continue
+            timings['total'] = time.perf_counter() - start
+            for stage, seconds in timings.items():
+                self.stage_seconds[stage].observe(seconds)
+                STAGE_SECONDS.labels(f'ocr_{stage}').observe(seconds)
+
+            # PaddleOCR returns [None] when no text region was found
+            regions = result[0] if result and result[0] else []
+            future.set_result(OCRResult([line[1][0] for line in regions], dict(timings)))
+
+    def stats(self):
+        return {
+            'pool_size': self.pool_size,
+            'queued': self._queue.qsize(),
+            'rejected': self.rejected,
+            'stage_seconds': {stage: histogram.snapshot()
+                              for stage, histogram in self.stage_seconds.items()},
+        }
@@ -0,0 +1,141 @@
+import logging
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PyPDF2 import PdfReader
+
+
+class PageText:
+    def __init__(self, page_number, text, source):
+        self.page_number = page_number
+        self.text = text
+        # 'text' for the PDF text layer, 'ocr' for a rendered image-only page
+        self.source = source
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+# Shared process pool; 'spawn' so workers never inherit the server's threads.
+# Workers import this module only (app.py skips building the server when it
+# is imported as __mp_main__)
+def _pool(processes):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=processes, mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+
+def _page_has_images(page):
+    try:
+        resources = page.get('/Resources')
+        xobjects = resources.get_object().get('/XObject') if resources else None
+        if not xobjects:
+            return False
+        return any(xobject.get_object().get('/Subtype') == '/Image'
+                   for xobject in xobjects.get_object().values())
+    except Exception:
+        return False
+
+
+# Extract the text layer of pages [start, end); runs inside a pool worker
+def _extract_range(pdf_path, start, end):
+    reader = PdfReader(pdf_path)
+    pages = []
+    for number in range(start, end):
+        page = reader.pages[number]
+        try:
+            text = page.extract_text() or ''
+        except Exception as e:
+            logging.error(f"Error extracting text from PDF page {number}: {e}")
+            text = ''
+        image_only = not text.strip() and _page_has_images(page)
+        pages.append((number, text, image_only))
+    return pages
+
+
+# Render one page to an RGB array at `dpi` for OCR (needs PyMuPDF)
+def render_page(pdf_path, page_number, dpi=200):
+    import fitz
+    with fitz.open(pdf_path) as document:
+        pixmap = document[page_number].get_pixmap(dpi=dpi, alpha=False)
+        return np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(
+            pixmap.height, pixmap.width, pixmap.n).copy()
+
+
+def _ocr_page(pdf_path, page_number, ocr, dpi, timeout):
+    try:
+        rgb = render_page(pdf_path, page_number, dpi=dpi)
+    except ImportError:
+        logging.warning("PyMuPDF is not installed; image-only PDF pages are skipped")
+        return ''
+    # PaddleOCR expects BGR channel order like cv2.imread
+    return ocr.recognize(np.ascontiguousarray(rgb[..., ::-1]), timeout=timeout).text
+
+
+def iter_pdf_pages(pdf_path, max_pages=None, max_chars=None, ocr=None, dpi=200,
+                   processes=None, pages_per_task=4, parallel_threshold=8,
+                   ocr_timeout=None):
+    """Yield PageText for each page of a PDF, in page order.
+
+    Text layers are extracted across a process pool (inline for PDFs with
+    fewer than ``parallel_threshold`` pages, where the pool costs more than
+    it saves).  Pages without text that contain images are rendered at
+    ``dpi`` and routed through ``ocr``.  Extraction stops after ``max_pages``
+    pages or once ``max_chars`` characters have been yielded.
+    """
+    page_count = len(PdfReader(pdf_path).pages)
+    if max_pages is not None:
+        page_count = min(page_count, max_pages)
+
+    ranges = [(start, min(start + pages_per_task, page_count))
+              for start in range(0, page_count, pages_per_task)]
+    processes = processes or os.cpu_count() or 1
+
+    if page_count < parallel_threshold or processes == 1:
+        batches = (_extract_range(pdf_path, start, end) for start, end in ranges)
+        pending = None
+    else:
+        # Keep a bounded window of submitted ranges so an early stop leaves
+        # little wasted work behind
+        executor = _pool(processes)
+        remaining = deque(ranges)
+        pending = deque()
+
+        def fill():
+            while remaining and len(pending) < processes * 2:
+                start, end = remaining.popleft()
+                pending.append(executor.submit(_extract_range, pdf_path, start, end))
+
+        def drain():
+            fill()
+            while pending:
+                batch = pending.popleft().result()
+                fill()
+                yield batch
+        batches = drain()
+
+    budget = max_chars
+    try:
+        for batch in batches:
+            for number, text, image_only in batch:
+                source = 'text'
+                if image_only and ocr is not None:
+                    text, source = _ocr_page(pdf_path, number, ocr, dpi, ocr_timeout), 'ocr'
+                if budget is not None:
+                    text = text[:budget]
+                    budget -= len(text)
+                yield PageText(number, text, source)
+                if budget is not None and budget <= 0:
+                    return
+    finally:
+        if pending:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,108 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlsplit
+
+from metrics import timed
+from prescriptions import prescription_pdf_url
+from result_cache import InProcessBackend
+
+
+# Create the index the QR-scan lookup relies on; safe to run on every start
+def ensure_prescription_indexes(collection):
+    try:
+        return collection.create_index('prescription_id', name='prescription_id_1')
+    except Exception as e:
+        logging.error(f"Could not ensure prescription indexes: {e}")
+        return None
+
+
+def signed_url_expiry(url):
+    """Unix time at which a signed storage URL stops working, or None when
+    the URL carries no expiry (V2 ``Expires`` or V4 ``X-Goog-Date`` plus
+    ``X-Goog-Expires``)."""
+    params = parse_qs(urlsplit(url).query)
+    try:
+        if 'Expires' in params:
+            return float(params['Expires'][0])
+        if 'X-Goog-Date' in params and 'X-Goog-Expires' in params:
+            signed_at = datetime.strptime(params['X-Goog-Date'][0], '%Y%m%dT%H%M%SZ')
+            return signed_at.replace(tzinfo=timezone.utc).timestamp() + float(params['X-Goog-Expires'][0])
+    except ValueError:
+        return None
+    return None
+
+
+class PrescriptionLookup:
+    """Read-through cache of prescription download URLs by prescription id.
+
+    Misses read only ``firebase_path`` from MongoDB (any collection object
+    with ``find_one``/``update_one`` works, e.g. mongomock or fakes).
+    Stored URLs that expire within ``refresh_margin`` seconds are re-signed,
+    written back and cached until shortly before the new expiry, so a QR
+    scan never gets a dead link.
+    """
+
+    def __init__(self, collection, bucket, ttl=300, max_entries=10000, refresh_margin=600):
+        self.collection = collection
+        self.bucket = bucket
+        self.ttl = ttl
+        self.refresh_margin = refresh_margin
+        self._cache = InProcessBackend(max_entries)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.resigned = 0
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _fresh(self, url, now):
+        expires_at = signed_url_expiry(url)
+        return expires_at is None or expires_at - now > self.refresh_margin
+
+    # The prescription's document with only firebase_path, or None
+    def get(self, prescription_id):
+        now = time.time()
+        cached = self._cache.get(prescription_id)
+        if cached is not None and self._fresh(cached['firebase_path'], now):
+            self._count('hits')
+            return cached
+        self._count('misses')
+
+        with timed('db_read'):
+            prescription = self.collection.find_one(
+                {'prescription_id': prescription_id}, {'firebase_path': 1, '_id': 0})
+        if not prescription:
+            return None
+        url = prescription.get('firebase_path')
+        if not url:
+            return prescription
+
+        if not self._fresh(url, now):
+            url = prescription_pdf_url(self.bucket, prescription_id)
+            with timed('db_write'):
+                self.collection.update_one(
+                    {'prescription_id': prescription_id}, {'$set': {'firebase_path': url}})
+            self._count('resigned')
+
+        prescription = {'firebase_path': url}
+        ttl = self.ttl
+        expires_at = signed_url_expiry(url)
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - now - self.refresh_margin)
+        if ttl > 0:
+            self._cache.set(prescription_id, prescription, ttl)
+        return prescription
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._cache),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'resigned': self.resigned,
+        }
@@ -0,0 +1,212 @@
+import threading
+import zlib
+from datetime import timedelta, datetime
+from io import BytesIO
+
+import numpy as np
+import qrcode
+from fpdf import FPDF
+from PIL import Image
+
+from metrics import timed
+
+
+LOGO_PATH = 'aarogya-data-logo.png'
+# The logo is drawn 20 mm wide; 256 px keeps it above 300 dpi
+LOGO_MAX_PIXELS = 256
+
+_logo_info = None
+_logo_lock = threading.Lock()
+
+
+# Rows of raw pixels, each behind a PNG "None" filter byte, deflated: the
+# layout FPDF writes as a FlateDecode image with /Predictor 15
+def _flate_rows(pixels):
+    height = pixels.shape[0]
+    rows = np.zeros((height, 1 + pixels[0].size), dtype=np.uint8)
+    rows[:, 1:] = pixels.reshape(height, -1)
+    return zlib.compress(rows.tobytes())
+
+
+# FPDF image info for the logo, decoded and downsized once per process.
+# FPDF 1.7.2 would re-parse the 2000x2000 PNG in pure Python for every
+# document, which takes seconds.
+def logo_image_info():
+    global _logo_info
+    with _logo_lock:
+        if _logo_info is None:
+            with Image.open(LOGO_PATH) as img:
+                img = img.convert('RGBA')
+                img.thumbnail((LOGO_MAX_PIXELS, LOGO_MAX_PIXELS), Image.LANCZOS)
+                pixels = np.asarray(img)
+            height, width = pixels.shape[:2]
+            _logo_info = {
+                'w': width, 'h': height, 'cs': 'DeviceRGB', 'bpc': 8, 'f': 'FlateDecode',
+                'dp': f'/Predictor 15 /Colors 3 /BitsPerComponent 8 /Columns {width}',
+                'pal': '', 'trns': '',
+                'data': _flate_rows(pixels[..., :3]),
+                'smask': _flate_rows(pixels[..., 3]),
+            }
+        return _logo_info
+
+
+################################# PDF Creation Code #############################################
+
+class PDF(FPDF):
+    def header(self):
+        # Add the logo image from the shared decoded copy; each document gets
+        # its own dict because FPDF drops the image data once it is written
+        if LOGO_PATH not in self.images:
+            info = self.images[LOGO_PATH] = dict(logo_image_info(), i=len(self.images) + 1)
+            # Soft masks (the logo's alpha channel) need PDF 1.4, which FPDF's
+            # own PNG loader would have set
+            if 'smask' in info and self.pdf_version < '1.4':
+                self.pdf_version = '1.4'
+        # Adjust size to fit neatly
+        self.image(LOGO_PATH, 10, 8, 20)
+        # Add title
+        self.set_font('Arial', 'B', 14)
+        self.cell(0, 10, 'Medical Prescription', align='C', ln=1)
+        # Add current date and time
+        self.set_font('Arial', 'I', 10)
+        current_time = datetime.now().strftime('%d-%m-%Y %H:%M:%S')
+        self.cell(0, 10, f'Date: {current_time}', align='R', ln=1)
+        self.ln(10)  # Add spacing after the header
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.cell(
+            0, 10, f'Page {self.page_no()} | Generated on {datetime.now().strftime("%d-%m-%Y %H:%M:%S")}', 0, 0, 'C')
+
+    def add_prescription(self, patient_name, doctor_name, medicines):
+        self.set_font('Arial', 'B', 12)
+        self.cell(0, 10, f'Patient Name: {patient_name}', ln=1, border=1)
+        self.cell(0, 10, f'Doctor Name: {doctor_name}', ln=1, border=1)
+        self.ln(10)  # Add spacing between sections
+
+        # Add medicines section
+        self.set_font('Arial', 'I', 12)
+        self.cell(0, 10, 'Medicines:', ln=1)
+        self.ln(5)
+        self.set_font('Arial', '', 12)
+        for i, medicine in enumerate(medicines, 1):  # Enumerate for numbering
+            self.cell(10)  # Indent
+            self.cell(0, 10, f'{i}. {medicine}', ln=1)
+
+
+def pdf_blob_path(prescription_id):
+    return f'Prescription/{prescription_id}/pdf/medical_prescription_{prescription_id}.pdf'
+
+
+def qr_blob_path(prescription_id):
+    return f'Prescription/{prescription_id}/qr/prescription_qr.png'
+
+
+# Render the prescription PDF in memory and return its bytes
+@timed('pdf_render')
+def render_prescription_pdf(prescription_id, medicines, patient_name, doctor_name):
+    pdf = PDF()
+    pdf.add_page()
+
+    # Add prescription details to the PDF
+    pdf.add_prescription(patient_name, doctor_name, medicines)
+
+    # FPDF 1.7.2 builds the document as a latin-1 str
+    return pdf.output(dest='S').encode('latin-1')
+
+
+# Render the QR code pointing the pharmacist view at the prescription and
+# return it as PNG bytes
+@timed('qr_render')
+def render_qr_code(prescription_id):
+    # Redirect to React application with the prescription ID
+    access_url = f'http://localhost:5173/pharmacist/view-prescription/{prescription_id}'
+    qr = qrcode.QRCode(version=1, box_size=10, border=5)
+    qr.add_data(access_url)
+    qr.make(fit=True)
+
+    qr_img = qr.make_image(fill='black', back_color='white')
+    buffer = BytesIO()
+    qr_img.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+# Seconds a prescription PDF download URL stays valid
+PDF_URL_EXPIRATION = 36000
+
+
+# Upload the PDF to Firebase Storage and return its download URL
+@timed('pdf_upload')
+def upload_prescription_pdf(bucket, prescription_id, pdf_bytes):
+    blob = bucket.blob(pdf_blob_path(prescription_id))
+    blob.upload_from_string(pdf_bytes, content_type='application/pdf')
+    blob.make_public()
+    return prescription_pdf_url(bucket, prescription_id)
+
+
+# Sign a fresh download URL for an uploaded prescription PDF
+def prescription_pdf_url(bucket, prescription_id):
+    blob = bucket.blob(pdf_blob_path(prescription_id))
+    token = blob.generate_signed_url(expiration=PDF_URL_EXPIRATION).split(
+        "?")[1]  # Extract the token from the signed URL
+    file_path = pdf_blob_path(prescription_id).replace('/', '%2F')
+    return (
+        f"https://firebasestorage.googleapis.com/v0/b/{bucket.name}/o/"
+        f"{file_path}?alt=media&{token}"
+    )
+
+
+# Upload the QR code to Firebase Storage and return a signed download URL
+@timed('qr_upload')
+def upload_qr_code(bucket, prescription_id, qr_png):
+    blob = bucket.blob(qr_blob_path(prescription_id))
+    blob.upload_from_string(qr_png, content_type='image/png')
+
+    expiration = datetime.utcnow() + timedelta(hours=24)  # Valid for 24 hours
+    return blob.generate_signed_url(expiration=expiration)
+
+
+def prescription_record(prescription_id, firebase_storage_url, patient_name, doctor_name):
+    return {
+        'prescription_id': prescription_id,
+        'firebase_path': firebase_storage_url,
+        'file_name': f"medical_prescription_{prescription_id}.pdf",
+        'patient_name': patient_name,
+        'doctor_name': doctor_name
+    }
+
+
+def qr_message(short_url):
+    return f'Here is your prescription QR code: {short_url}'
+
+
+def generate_pdf(prescription_id, medicines, patient_name, doctor_name, services):
+    pdf_bytes = render_prescription_pdf(
+        prescription_id, medicines, patient_name, doctor_name)
+    firebase_storage_url = upload_prescription_pdf(
+        services.bucket, prescription_id, pdf_bytes)
+
+    # Store prescription details in MongoDB
+    with timed('db_write'):
+        services.prescriptions.insert_one(prescription_record(
+            prescription_id, firebase_storage_url, patient_name, doctor_name))
+    return pdf_bytes
+
+
+# Generate QR Code, upload it and send its short link by SMS and WhatsApp;
+# returns the PNG bytes
+def generate_qr_code(prescription_id, services):
+    qr_png = render_qr_code(prescription_id)
+    download_url = upload_qr_code(services.bucket, prescription_id, qr_png)
+    with timed('url_shorten'):
+        short_url = services.shorten(download_url)
+
+    with timed('sms_send'):
+        services.messages.create(
+            from_=services.sms_from, body=qr_message(short_url), to=services.notify_to)
+    with timed('whatsapp_send'):
+        services.messages.create(
+            from_=services.whatsapp_from, body=qr_message(short_url),
+            to=f'whatsapp:{services.notify_to}')
+    return qr_png
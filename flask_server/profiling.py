@@ -0,0 +1,66 @@
+import sys
+import threading
+import uuid
+from collections import Counter, OrderedDict
+
+
+class SamplingProfiler:
+    """Samples the Python stack of one thread every ``interval`` seconds
+    from a background thread, so the profiled request runs at full speed
+    apart from the sampling itself.  Stacks are aggregated in the collapsed
+    format flame graph tools read (``frame;frame;frame count``)."""
+
+    def __init__(self, thread_id, interval=0.005, max_samples=20000):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_samples = max_samples
+        self.samples = 0
+        self._stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval) and self.samples < self.max_samples:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            self._stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self._stacks.most_common())
+
+
+class ProfileStore:
+    """The most recent ``max_profiles`` request profiles by id."""
+
+    def __init__(self, max_profiles=50):
+        self.max_profiles = max_profiles
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile):
+        profile_id = uuid.uuid4().hex
+        with self._lock:
+            self._profiles[profile_id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id):
+        with self._lock:
+            return self._profiles.get(profile_id)
@@ -0,0 +1,139 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class InProcessBackend:
+    """Size-bounded LRU with per-entry expiry, local to one process."""
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisBackend:
+    """Shared backend on a Redis client (or any stand-in with get/setex).
+
+    Values are stored as JSON; Redis enforces the TTL and its own maxmemory
+    eviction policy bounds the size.
+    """
+
+    def __init__(self, client, prefix='aarogya:'):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        import redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl):
+        self.client.setex(self.prefix + key, int(max(1, ttl)), json.dumps(value))
+
+
+class SQLiteBackend:
+    """Persistent backend in a local SQLite file, for results that are worth
+    keeping across restarts.  Expiry uses wall-clock time; expired rows are
+    purged every ``purge_every`` writes.
+    """
+
+    def __init__(self, path, purge_every=256):
+        self.path = path
+        self.purge_every = purge_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS cache '
+            '(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)')
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT value FROM cache WHERE key = ? AND expires_at > ?',
+                (key, time.time())).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+                (key, json.dumps(value), time.time() + ttl))
+            self._writes += 1
+            if self._writes % self.purge_every == 0:
+                self._conn.execute('DELETE FROM cache WHERE expires_at <= ?', (time.time(),))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+
+class PredictionCache:
+    """Cache of JSON-serializable prediction results.
+
+    Keys combine the model id, the SHA-256 of the model file that produced
+    the result and the SHA-256 of the input, so replacing a model file makes
+    every old entry unreachable.
+    """
+
+    def __init__(self, backend=None, ttl=24 * 3600):
+        self.backend = backend if backend is not None else InProcessBackend()
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model_id, model_sha256, input_sha256):
+        return f'prediction:{model_id}:{model_sha256}:{input_sha256}'
+
+    def get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.backend.set(key, value, self.ttl)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
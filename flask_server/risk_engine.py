@@ -0,0 +1,81 @@
+import numpy as np
+
+
+# Probability assumed for a symptom that is not a column of the smoothed table
+UNKNOWN_SYMPTOM_PROBABILITY = 0.01
+
+
+class RiskScoringEngine:
+    """Log-space naive Bayes scorer built once from the smoothed risk table.
+
+    The smoothed DataFrame (risk levels as index, symptoms as columns) is
+    turned into a dense ``(n_levels, n_symptoms + 1)`` matrix of
+    log-probabilities.  The extra last column holds the log-probability used
+    for unrecognized symptoms, so a request is scored with a single gather
+    over column indices followed by a sum.
+    """
+
+    def __init__(self, smoothed_df, unknown_probability=UNKNOWN_SYMPTOM_PROBABILITY):
+        self.risk_levels = list(smoothed_df.index)
+        self.symptoms = list(smoothed_df.columns)
+
+        # Map every known symptom to its column in the log-probability matrix
+        self.symptom_index = {symptom: i for i, symptom in enumerate(self.symptoms)}
+        self.unknown_index = len(self.symptoms)
+
+        probabilities = smoothed_df.to_numpy(dtype=np.float64)
+        unknown_column = np.full((len(self.risk_levels), 1), unknown_probability)
+        # Zero probabilities are clamped so every entry stays finite
+        self.log_probs = np.log(np.maximum(
+            np.hstack([probabilities, unknown_column]), np.finfo(np.float64).tiny))
+
+    # Translate a list of preprocessed symptoms into matrix column indices
+    def indices(self, symptoms_list):
+        unknown = self.unknown_index
+        return np.fromiter(
+            (self.symptom_index.get(symptom, unknown) for symptom in symptoms_list),
+            dtype=np.intp, count=len(symptoms_list))
+
+    # Joint log-likelihood of the symptoms for every risk level
+    def log_likelihood(self, symptoms_list):
+        return self.log_probs[:, self.indices(symptoms_list)].sum(axis=1)
+
+    # Normalized posterior probabilities (uniform prior) for every risk level
+    def posteriors(self, symptoms_list):
+        return _softmax(self.log_likelihood(symptoms_list))
+
+    # Dictionary of risk level -> posterior probability
+    def score(self, symptoms_list):
+        posteriors = self.posteriors(symptoms_list)
+        return {level: float(p) for level, p in zip(self.risk_levels, posteriors)}
+
+    # Posterior matrix of shape (n_patients, n_levels) for many symptom lists.
+    # Symptom occurrences are counted into a (n_patients, n_symptoms + 1)
+    # matrix so the whole batch is scored with one matrix product.
+    def posteriors_batch(self, symptom_lists):
+        n_columns = self.unknown_index + 1
+        lengths = np.fromiter((len(symptoms) for symptoms in symptom_lists),
+                              dtype=np.intp, count=len(symptom_lists))
+        columns = self.indices(
+            [symptom for symptoms in symptom_lists for symptom in symptoms])
+        rows = np.repeat(np.arange(len(symptom_lists)), lengths)
+        counts = np.bincount(rows * n_columns + columns,
+                             minlength=len(symptom_lists) * n_columns)
+        counts = counts.reshape(len(symptom_lists), n_columns).astype(np.float64)
+        return _softmax(counts @ self.log_probs.T)
+
+    # List of risk level -> posterior dictionaries, in input order
+    def score_batch(self, symptom_lists):
+        if not symptom_lists:
+            return []
+        return [{level: float(p) for level, p in zip(self.risk_levels, row)}
+                for row in self.posteriors_batch(symptom_lists)]
+
+
+def _softmax(log_values, axis=-1):
+    # Subtract the maximum before exponentiating so long symptom lists
+    # never underflow to 0.0
+    shifted = log_values - np.max(log_values, axis=axis, keepdims=True)
+    np.exp(shifted, out=shifted)
+    shifted /= shifted.sum(axis=axis, keepdims=True)
+    return shifted
@@ -0,0 +1,99 @@
+import os
+import threading
+
+from startup import LazyResource
+
+
+class Services:
+    """External services used by the prescription flows.
+
+    Every attribute only needs the small interface the code actually calls,
+    so each one can be replaced by a local fake (see fakes.py):
+
+    - bucket: Firebase Storage bucket (``blob(path)``, ``name``)
+    - prescriptions: MongoDB collection (``insert_one``, ``find_one``, ...)
+    - messages: Twilio ``client.messages`` (``create(from_, body, to)``)
+    - shorten: ``shorten(url) -> short_url``
+    - generate: ``generate(prompt) -> text`` from the Gemini model
+    - fetcher: ImageFetcher
+    - ocr: OCRService
+    - medicine_extractor: MedicineExtractor tried before ``generate``
+
+    Any attribute may also be a startup.LazyResource; it is built on first
+    access and the built value is returned from then on.
+    """
+
+    def __init__(self, bucket=None, prescriptions=None, messages=None, shorten=None,
+                 generate=None, fetcher=None, ocr=None, sms_from=None,
+                 whatsapp_from=None, notify_to=None, medicine_extractor=None):
+        self.bucket = bucket
+        self.prescriptions = prescriptions
+        self.messages = messages
+        self.shorten = shorten
+        self.generate = generate
+        self.fetcher = fetcher
+        self.ocr = ocr
+        self.sms_from = sms_from
+        self.whatsapp_from = whatsapp_from
+        self.notify_to = notify_to
+        self.medicine_extractor = medicine_extractor
+
+    def __getattribute__(self, name):
+        value = object.__getattribute__(self, name)
+        if isinstance(value, LazyResource):
+            return value.get()
+        return value
+
+
+class MissingConfigurationError(Exception):
+    pass
+
+
+# Firebase Storage bucket from FIREBASE_CREDENTIALS / FIREBASE_BUCKET
+def firebase_bucket():
+    import firebase_admin
+    from firebase_admin import credentials, storage
+    cred = credentials.Certificate(os.getenv("FIREBASE_CREDENTIALS"))
+    firebase_admin.initialize_app(cred, {'storageBucket': os.getenv("FIREBASE_BUCKET")})
+    return storage.bucket()
+
+
+# The prescriptions collection of the MONGO_URI deployment
+def mongo_prescriptions():
+    from pymongo.mongo_client import MongoClient
+    from pymongo.server_api import ServerApi
+    client = MongoClient(os.getenv("MONGO_URI"), server_api=ServerApi('1'))
+    db = client['healthcare_chatbot']
+    return db['prescriptions']
+
+
+def twilio_messages():
+    from twilio.rest import Client
+    client = Client(os.getenv("ACCOUNT_SID"), os.getenv("TWILIO_AUTH_TOKEN"))
+    return client.messages
+
+
+def tinyurl_shorten(url):
+    import pyshorteners
+    return pyshorteners.Shortener().tinyurl.short(url)
+
+
+_gemini_models = {}
+_gemini_lock = threading.Lock()
+
+
+# Generate text with Gemini; the API key is read on every call so it can be
+# configured without restarting the server, but genai is only reconfigured
+# when the key changes
+def gemini_generate(prompt, model_name="gemini-1.5-flash"):
+    import google.generativeai as genai
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        raise MissingConfigurationError('AI API key not configured')
+    with _gemini_lock:
+        model = _gemini_models.get((api_key, model_name))
+        if model is None:
+            genai.configure(api_key=api_key)
+            _gemini_models.clear()
+            model = _gemini_models[(api_key, model_name)] = genai.GenerativeModel(model_name)
+    return model.generate_content(prompt).text
@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+
+
+class StartupReport:
+    """Time spent bringing up each subsystem, eagerly at import or lazily on
+    first use, for the /startup route and the boot log."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self._subsystems = {}
+        self._lock = threading.Lock()
+
+    def register(self, name):
+        with self._lock:
+            self._subsystems.setdefault(name, {'state': 'pending', 'seconds': None})
+
+    def record(self, name, seconds, error=None, trigger='eager'):
+        with self._lock:
+            self._subsystems[name] = {
+                'state': 'failed' if error else 'ready',
+                'seconds': round(seconds, 4),
+                'trigger': trigger,
+                'ready_at': round(time.time() - self.started_at, 4),
+                **({'error': str(error)} if error else {}),
+            }
+
+    # Run an eager startup step and record how long it took
+    def run(self, name, step, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = step(*args, **kwargs)
+        except Exception as e:
+            self.record(name, time.perf_counter() - start, error=e)
+            raise
+        self.record(name, time.perf_counter() - start)
+        return result
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'uptime_seconds': round(time.time() - self.started_at, 4),
+                'subsystems': {name: dict(info) for name, info in self._subsystems.items()},
+            }
+
+
+class LazyResource:
+    """A value built by ``factory()`` on first ``get()`` (or ``warm_up()``)
+    and shared afterwards.  A failed build is not cached, so the next call
+    tries again."""
+
+    def __init__(self, name, factory, report=None):
+        self.name = name
+        self.factory = factory
+        self.report = report
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        if report is not None:
+            report.register(name)
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def get(self, trigger='first use'):
+        if self._loaded:
+            return self._value
+        with self._lock:
+            if not self._loaded:
+                start = time.perf_counter()
+                try:
+                    self._value = self.factory()
+                except Exception as e:
+                    if self.report is not None:
+                        self.report.record(self.name, time.perf_counter() - start,
+                                           error=e, trigger=trigger)
+                    raise
+                self._loaded = True
+                seconds = time.perf_counter() - start
+                if self.report is not None:
+                    self.report.record(self.name, seconds, trigger=trigger)
+                logging.info(f"Initialized {self.name} in {seconds:.2f}s ({trigger})")
+        return self._value
+
+    def warm_up(self):
+        return self.get(trigger='warm-up')
+
+
+# Build the named resources in a background thread, logging failures
+def warm_up_in_background(resources, names):
+    def run():
+        for name in names:
+            resource = resources.get(name)
+            if resource is None:
+                logging.warning(f"Unknown warm-up target: {name}")
+                continue
+            try:
+                resource.warm_up()
+            except Exception as e:
+                logging.error(f"Warm-up of {name} failed: {e}")
+
+    thread = threading.Thread(target=run, name='warm-up', daemon=True)
+    thread.start()
+    return thread
+
+
+# (resource path, download package) of the NLTK data the risk model needs
+NLTK_RESOURCES = [
+    ('tokenizers/punkt', 'punkt'),
+    ('tokenizers/punkt_tab', 'punkt_tab'),
+    ('corpora/stopwords', 'stopwords'),
+    ('corpora/wordnet', 'wordnet'),
+]
+
+
+def ensure_nltk_data(resources=NLTK_RESOURCES):
+    """Download only the NLTK packages that are not installed yet; the
+    offline check keeps boots from touching the network."""
+    import nltk
+
+    missing = []
+    for path, package in resources:
+        try:
+            nltk.data.find(path)
+        except LookupError:
+            missing.append(package)
+    for package in missing:
+        logging.info(f"Downloading NLTK package {package}")
+        if not nltk.download(package, quiet=True):
+            logging.error(f"Could not download NLTK package {package}")
+    return missing
@@ -0,0 +1,115 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+class SymptomNormalizationCache:
+    """Bounded LRU cache from a raw symptom phrase to its normalized form.
+
+    ``normalize`` is the expensive function being memoized (NLTK tokenize,
+    stop-word removal and lemmatization).  Keys are lowercased with collapsed
+    whitespace, which the normalizer would do anyway, so "Chest  Pain" and
+    "chest pain" share one entry.
+    """
+
+    def __init__(self, normalize, max_size=4096):
+        self.normalize = normalize
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(phrase):
+        return " ".join(phrase.lower().split())
+
+    def get(self, phrase):
+        key = self.key(phrase)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Normalize outside the lock so a slow NLTK call never blocks hits
+        normalized = self.normalize(key)
+        self._store(key, normalized)
+        return normalized
+
+    def _store(self, key, normalized):
+        with self._lock:
+            self._entries[key] = normalized
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    # Pre-populate the cache without touching the hit/miss counters
+    def warm(self, phrases):
+        warmed = 0
+        for phrase in phrases:
+            if not isinstance(phrase, str) or not phrase.strip():
+                continue
+            key = self.key(phrase)
+            with self._lock:
+                if key in self._entries:
+                    continue
+            self._store(key, self.normalize(key))
+            warmed += 1
+        return warmed
+
+    # Save the cached normalizations so the next process can start warm
+    # without importing NLTK
+    def save(self, path, fingerprint=None):
+        with self._lock:
+            entries = dict(self._entries)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'fingerprint': fingerprint, 'entries': entries}, f)
+        os.replace(tmp_path, path)
+        return len(entries)
+
+    # Load entries saved by save(); a file with another fingerprint is ignored
+    def load(self, path, fingerprint=None):
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if saved.get('fingerprint') != fingerprint:
+            return 0
+        loaded = 0
+        for key, normalized in saved.get('entries', {}).items():
+            self._store(key, normalized)
+            loaded += 1
+        return loaded
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+# Raw symptom phrases known to the bundled datasets, used to warm the cache:
+# the symptom columns of Final_csv.csv and the comma-separated `symptoms`
+# column of dataset.csv
+def dataset_symptom_phrases(smoothed_df, symptoms_series):
+    phrases = list(smoothed_df.columns)
+    for symptoms in symptoms_series.dropna():
+        phrases.extend(symptom.strip() for symptom in symptoms.split(','))
+    return phrases
@@ -0,0 +1,46 @@
+import numpy as np
+from scipy import sparse
+
+
+class SymptomEncoder:
+    """Binary symptom feature encoder for the doctor recommendation model.
+
+    Holds a precomputed symptom -> column index map in the same order as the
+    training matrix, so a request is encoded straight into a NumPy row (or a
+    CSR matrix for batches) without building a pandas DataFrame.
+    """
+
+    def __init__(self, columns, dtype=np.float32):
+        self.columns = list(columns)
+        self.column_index = {column: i for i, column in enumerate(self.columns)}
+        self.dtype = dtype
+
+    @property
+    def n_features(self):
+        return len(self.columns)
+
+    # Symptoms that correspond to a feature column, in input order
+    def known(self, symptoms):
+        return [symptom for symptom in symptoms if symptom in self.column_index]
+
+    # Encode one list of symptoms as a dense (1, n_features) row
+    def encode(self, symptoms):
+        row = np.zeros((1, self.n_features), dtype=self.dtype)
+        indices = [self.column_index[s] for s in symptoms if s in self.column_index]
+        row[0, indices] = 1
+        return row
+
+    # Encode many symptom lists as a (n_rows, n_features) matrix, CSR by default
+    def encode_batch(self, symptom_lists, as_sparse=True):
+        indptr = [0]
+        indices = []
+        for symptoms in symptom_lists:
+            # Duplicate symptoms must not be summed into a value of 2
+            indices.extend(sorted({self.column_index[s]
+                                   for s in symptoms if s in self.column_index}))
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=self.dtype)
+        matrix = sparse.csr_matrix(
+            (data, np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int32)),
+            shape=(len(symptom_lists), self.n_features))
+        return matrix if as_sparse else matrix.toarray()
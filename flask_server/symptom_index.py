@@ -0,0 +1,237 @@
+import csv
+import re
+import threading
+from collections import Counter, OrderedDict, defaultdict
+from difflib import SequenceMatcher
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Vocabulary names: the normalized column names of the risk table and the
+# raw symptom phrases the doctor model was trained on
+RISK_VOCABULARY = 'risk'
+DOCTOR_VOCABULARY = 'doctor'
+
+
+# Everyday words mapped to the word the datasets use for the same thing,
+# so "stomach ache" finds "abdominal pain"; both vocabularies and queries
+# are keyed through it
+SYNONYMS = {
+    'stomach': 'abdominal',
+    'belly': 'abdominal',
+    'tummy': 'abdominal',
+    'ache': 'pain',
+    'aches': 'pain',
+    'aching': 'pain',
+}
+
+
+# Lowercase words joined by single spaces, with synonyms replaced, so case,
+# punctuation, stray whitespace and lay wording never decide whether a
+# symptom is known
+def symptom_key(text):
+    return ' '.join(SYNONYMS.get(token, token) for token in TOKEN_PATTERN.findall(text.lower()))
+
+
+# Words run together before synonyms are applied, so a compound split by
+# a space ("head ache") still finds its one-word term ("headache")
+def compact_key(text):
+    return ''.join(TOKEN_PATTERN.findall(text.lower()))
+
+
+# Function words of the vocabularies' phrasing; they carry no symptom, so
+# "pain in the lower abdomen" and "pain lower abdomen" compare as equal
+STOP_WORDS = frozenset({'a', 'an', 'and', 'at', 'during', 'in', 'is', 'it', 'my', 'of', 'on',
+                        'or', 'that', 'the', 'to', 'when', 'with'})
+
+
+# Words of a key that name part of a symptom
+def content_tokens(key):
+    tokens = key.split()
+    return frozenset(token for token in tokens if token not in STOP_WORDS) or frozenset(tokens)
+
+
+def _trigrams(key):
+    padded = f'  {key} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# Symptom phrases of both datasets, keyed by vocabulary name, read with the
+# csv module so no pandas frame is built for them
+def dataset_vocabularies(risk_table_path, dataset_path):
+    with open(risk_table_path, newline='') as f:
+        risk_columns = [column for column in next(csv.reader(f)) if column != 'risk level']
+    doctor_symptoms = {}
+    with open(dataset_path, newline='') as f:
+        for row in csv.DictReader(f):
+            # Split exactly like the doctor model's get_dummies(sep=',')
+            doctor_symptoms.update(dict.fromkeys((row['symptoms'] or '').split(',')))
+    doctor_symptoms.pop('', None)
+    return {RISK_VOCABULARY: risk_columns, DOCTOR_VOCABULARY: list(doctor_symptoms)}
+
+
+class SymptomMatch:
+    def __init__(self, text, symptom, method, score):
+        # Symptom as the user wrote it
+        self.text = text
+        # Vocabulary term it resolved to, or None
+        self.symptom = symptom
+        # 'exact', 'token' or 'fuzzy'; None when nothing was close enough
+        self.method = method
+        # 1.0 for an exact match, the word overlap or similarity ratio otherwise
+        self.score = score
+
+    def to_dict(self):
+        return {'input': self.text, 'symptom': self.symptom, 'match': self.method,
+                'score': round(self.score, 3)}
+
+
+class SymptomIndex:
+    """One index over the symptom vocabularies of both text models.
+
+    Every term is stored once under its ``symptom_key`` with the exact
+    spelling each vocabulary uses for it; the key folds lay synonyms
+    ("stomach", "ache") into the datasets' words.  A lookup tries the key in
+    a hash map first.  Otherwise every content word of the query is
+    corrected to a word of the requested vocabulary: kept when the
+    vocabulary uses it, else replaced by the most similar vocabulary word
+    sharing character trigrams with it when that reaches
+    ``token_threshold`` ("feaver", "pian").  A word that cannot be
+    corrected leaves the symptom unresolved, so "dry cough" never quietly
+    becomes "cough".  Terms containing every corrected word (token
+    inverted index) are scored by word overlap weighted by the corrections'
+    similarity, which absorbs reordered and function words ("pain chest",
+    "pain in lower abdomen"), and the best one is returned when it reaches
+    ``threshold``.  Results of these lookups are kept in a small LRU, so
+    repeated misspellings cost about as much as an exact hit.
+    """
+
+    def __init__(self, vocabularies, threshold=0.7, token_threshold=0.75, max_candidates=10,
+                 memo_size=4096):
+        self.threshold = threshold
+        self.token_threshold = token_threshold
+        self.max_candidates = max_candidates
+        self.memo_size = memo_size
+        self._ids = {}
+        self._compact_ids = {}
+        self._keys = []
+        self._spellings = []
+        self._token_sets = []
+        self._token_index = defaultdict(list)
+        # Words used by each vocabulary, and every word by character trigram
+        self._vocabulary_tokens = defaultdict(set)
+        self._trigram_index = defaultdict(list)
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+        for vocabulary, terms in vocabularies.items():
+            for term in terms:
+                key = symptom_key(term)
+                if not key:
+                    continue
+                term_id = self._ids.get(key)
+                if term_id is None:
+                    term_id = self._ids[key] = len(self._keys)
+                    tokens = content_tokens(key)
+                    self._compact_ids.setdefault(compact_key(term), term_id)
+                    self._keys.append(key)
+                    self._spellings.append({})
+                    self._token_sets.append(tokens)
+                    for token in tokens:
+                        if token not in self._token_index:
+                            for trigram in _trigrams(token):
+                                self._trigram_index[trigram].append(token)
+                        self._token_index[token].append(term_id)
+                self._spellings[term_id].setdefault(vocabulary, term)
+                self._vocabulary_tokens[vocabulary].update(self._token_sets[term_id])
+
+    @classmethod
+    def from_datasets(cls, risk_table_path, dataset_path, **kwargs):
+        return cls(dataset_vocabularies(risk_table_path, dataset_path), **kwargs)
+
+    def __len__(self):
+        return len(self._keys)
+
+    # The vocabulary word a query word stands for and their similarity, or
+    # (None, 0.0) when no word is close enough
+    def _correct(self, token, vocabulary):
+        known = self._vocabulary_tokens[vocabulary]
+        if token in known:
+            return token, 1.0
+        shared = Counter()
+        for trigram in _trigrams(token):
+            shared.update(word for word in self._trigram_index.get(trigram, ()) if word in known)
+        best, best_score = None, 0.0
+        for word, _ in sorted(shared.most_common(self.max_candidates)):
+            score = SequenceMatcher(None, token, word).ratio()
+            if score > best_score:
+                best, best_score = word, score
+        if best_score < self.token_threshold:
+            return None, 0.0
+        return best, best_score
+
+    def _best_candidate(self, key, vocabulary):
+        corrected = {}
+        for token in content_tokens(key):
+            word, score = self._correct(token, vocabulary)
+            if word is None:
+                return None, None, 0.0
+            corrected[word] = max(score, corrected.get(word, 0.0))
+
+        best_id, best_score = None, 0.0
+        term_ids = set.intersection(*(set(self._token_index[word]) for word in corrected))
+        for term_id in sorted(term_ids):
+            if vocabulary not in self._spellings[term_id]:
+                continue
+            tokens = self._token_sets[term_id]
+            score = sum(corrected.values()) / len(tokens | corrected.keys())
+            if score > best_score:
+                best_id, best_score = term_id, score
+        method = 'token' if all(score == 1.0 for score in corrected.values()) else 'fuzzy'
+        return best_id, method, best_score
+
+    def _cached_candidate(self, key, vocabulary):
+        memo_key = (key, vocabulary)
+        with self._lock:
+            candidate = self._memo.get(memo_key)
+            if candidate is not None:
+                self._memo.move_to_end(memo_key)
+                return candidate
+        candidate = self._best_candidate(key, vocabulary)
+        with self._lock:
+            self._memo[memo_key] = candidate
+            while len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return candidate
+
+    # Resolve one symptom against a vocabulary; ``text`` is reported as the
+    # input when the query is a preprocessed form of it
+    def match(self, query, vocabulary, text=None):
+        text = query if text is None else text
+        key = symptom_key(query)
+        term_id = self._ids.get(key)
+        if term_id is None:
+            term_id = self._compact_ids.get(compact_key(query))
+        if term_id is not None and vocabulary in self._spellings[term_id]:
+            result = SymptomMatch(text, self._spellings[term_id][vocabulary], 'exact', 1.0)
+        elif key:
+            term_id, method, score = self._cached_candidate(key, vocabulary)
+            if score >= self.threshold:
+                result = SymptomMatch(text, self._spellings[term_id][vocabulary], method, score)
+            else:
+                result = SymptomMatch(text, None, None, score)
+        else:
+            result = SymptomMatch(text, None, None, 0.0)
+        with self._lock:
+            self._counts[result.method or 'unmatched'] += 1
+        return result
+
+    def stats(self):
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            'terms': len(self._keys),
+            'threshold': self.threshold,
+            **{method: counts.get(method, 0) for method in ('exact', 'token', 'fuzzy', 'unmatched')},
+        }
@@ -0,0 +1,26 @@
+import os
+import sys
+
+import pytest
+
+# The server reads its datasets and assets relative to flask_server/, and
+# the tests run fully offline against the fakes in fakes.py
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVER_DIR)
+os.chdir(SERVER_DIR)
+os.environ.setdefault('USE_FAKE_SERVICES', '1')
+os.environ.setdefault('SERVICE_PROFILE', 'prescriptions')
+os.environ.setdefault('LLM_CACHE_PATH', '')
+os.environ.setdefault('FETCH_CACHE_DIR', '')
+os.environ.setdefault('WARM_UP', '')
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
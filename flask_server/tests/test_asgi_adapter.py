@@ -0,0 +1,81 @@
+import asyncio
+import json
+
+from flask import Flask, Response, request, stream_with_context
+
+from asgi_adapter import BoundedASGIApp, Lane
+
+
+def asgi_app(wsgi_app, stream_workers=4):
+    return BoundedASGIApp(
+        wsgi_app,
+        lanes=[Lane('compute', workers=1, queue_size=1), Lane('io', workers=2, queue_size=2)],
+        routes=[('/predict', 'compute'), ('/generate_prescription', 'compute')],
+        default_lane='io',
+        stream_workers=stream_workers)
+
+
+def call(app, method, path, body=b''):
+    """Runs one HTTP request through an ASGI app; returns (status, body)."""
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'',
+             'headers': [(b'content-type', b'application/json')]}
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    status = next(m['status'] for m in sent if m['type'] == 'http.response.start')
+    return status, b''.join(m.get('body', b'') for m in sent if m['type'] == 'http.response.body')
+
+
+def test_stream_with_context_survives_chunks_on_different_threads():
+    flask_app = Flask(__name__)
+
+    @flask_app.route('/echo', methods=['POST'])
+    def echo():
+        def generate():
+            for word in request.get_json():
+                # Reading the request needs the contexts pushed by
+                # stream_with_context on the first chunk
+                yield f'{request.path}:{word}\n'
+        return Response(stream_with_context(generate()), mimetype='text/plain')
+
+    status, body = call(asgi_app(flask_app), 'POST', '/echo',
+                        json.dumps(['a', 'b', 'c', 'd']).encode())
+
+    assert status == 200
+    assert body.decode().splitlines() == ['/echo:a', '/echo:b', '/echo:c', '/echo:d']
+
+
+def test_predict_batch_streams_through_the_adapter(monkeypatch):
+    from app import create_app
+    from blueprints import risk
+
+    def predict_risk_levels(chunk):
+        return [{'risk_level': 'low', 'symptoms': symptoms} for symptoms in chunk]
+
+    monkeypatch.setattr(risk, 'PREDICT_BATCH_CHUNK_SIZE', 1)
+    monkeypatch.setattr(risk.model, 'predict_risk_levels', predict_risk_levels)
+    status, body = call(asgi_app(create_app(blueprints='risk')), 'POST', '/predict/batch',
+                        json.dumps(['fever', 'cough', 'headache']).encode())
+
+    assert status == 200
+    records = [json.loads(line) for line in body.decode().splitlines()]
+    assert [record['index'] for record in records] == [0, 1, 2]
+    assert 'error' not in records[-1]
+
+
+def test_lane_prefixes_match_whole_path_segments():
+    app = asgi_app(Flask(__name__))
+
+    assert app.lane_for('/predict').name == 'compute'
+    assert app.lane_for('/predict/batch').name == 'compute'
+    assert app.lane_for('/predict_kidney_image').name == 'io'
+    assert app.lane_for('/jobs/1/events').name == 'io'
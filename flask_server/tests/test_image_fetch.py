@@ -0,0 +1,127 @@
+import os
+import time
+
+import pytest
+
+from image_fetch import ContentCache, FetchError, ImageFetcher
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+
+class FakeSession:
+    """Answers with the queued responses and records the request headers."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None, stream=False):
+        self.requests.append((url, dict(headers or {})))
+        return self.responses.pop(0)
+
+
+URL = 'https://files.local/scan.png'
+
+
+def test_etag_revalidation_reuses_cached_body_on_304():
+    session = FakeSession(
+        FakeResponse(200, b'image-bytes', {'ETag': '"v1"', 'Content-Type': 'image/png'}),
+        FakeResponse(304))
+    fetcher = ImageFetcher(session=session, cache=ContentCache())
+
+    first = fetcher.fetch(URL)
+    second = fetcher.fetch(URL)
+
+    assert not first.from_cache
+    assert second.from_cache
+    assert second.content == b'image-bytes'
+    assert second.content_type == 'image/png'
+    assert session.requests[1][1] == {'If-None-Match': '"v1"'}
+
+
+def test_changed_etag_downloads_the_new_body():
+    session = FakeSession(
+        FakeResponse(200, b'old', {'ETag': '"v1"'}),
+        FakeResponse(200, b'new', {'ETag': '"v2"'}))
+    fetcher = ImageFetcher(session=session, cache=ContentCache())
+
+    fetcher.fetch(URL)
+    refreshed = fetcher.fetch(URL)
+
+    assert refreshed.content == b'new'
+    assert not refreshed.from_cache
+
+
+def test_body_over_the_cap_is_rejected_with_413():
+    session = FakeSession(FakeResponse(200, b'x' * 100))
+    fetcher = ImageFetcher(session=session, cache=ContentCache(), max_bytes=64, chunk_size=16)
+
+    with pytest.raises(FetchError) as excinfo:
+        fetcher.fetch(URL)
+    assert excinfo.value.status_code == 413
+
+
+def test_declared_length_over_the_cap_is_rejected_before_download():
+    session = FakeSession(FakeResponse(200, b'', {'Content-Length': '1000'}))
+    fetcher = ImageFetcher(session=session, cache=ContentCache(), max_bytes=64)
+
+    with pytest.raises(FetchError) as excinfo:
+        fetcher.fetch(URL)
+    assert excinfo.value.status_code == 413
+
+
+def test_disk_blobs_are_evicted_least_recently_used_over_the_byte_limit(tmp_path):
+    cache = ContentCache(str(tmp_path), max_memory_bytes=0, max_disk_bytes=250)
+    first = cache.put_blob(b'a' * 100)
+    second = cache.put_blob(b'b' * 100)
+    assert cache.get_blob(first) == b'a' * 100
+
+    cache.put_blob(b'c' * 100)
+
+    assert cache.get_blob(second) is None
+    assert cache.get_blob(first) == b'a' * 100
+    assert len(os.listdir(tmp_path / 'blobs')) == 2
+
+
+def test_disk_blobs_and_urls_expire_after_max_age(tmp_path):
+    cache = ContentCache(str(tmp_path), max_memory_bytes=0, max_age=60)
+    sha256 = cache.put_blob(b'scan')
+    cache.put_url(URL, {'sha256': sha256, 'etag': '"v1"', 'fetched_at': time.time() - 120})
+    stale = time.time() - 120
+    os.utime(tmp_path / 'blobs' / sha256, (stale, stale))
+
+    assert cache.get_blob(sha256) is None
+    assert cache.get_url(URL) is None
+    assert not os.listdir(tmp_path / 'blobs')
+
+
+def test_url_index_is_bounded(tmp_path):
+    cache = ContentCache(str(tmp_path), max_urls=2)
+    for i in range(3):
+        cache.put_url(f'{URL}?page={i}', {'sha256': 'x', 'fetched_at': time.time()})
+
+    assert len(os.listdir(tmp_path / 'urls')) == 2
+    assert len(cache._urls) == 2
+
+
+def test_limits_apply_to_what_a_previous_run_left_on_disk(tmp_path):
+    ContentCache(str(tmp_path), max_memory_bytes=0).put_blob(b'z' * 100)
+
+    ContentCache(str(tmp_path), max_disk_bytes=50)
+
+    assert not os.listdir(tmp_path / 'blobs')
@@ -0,0 +1,44 @@
+import hashlib
+from io import BytesIO
+
+from PIL import Image
+
+from image_preprocessing import DecodedImageCache, ImageSpec
+
+SPEC = ImageSpec((32, 32))
+# One cached (1, 32, 32, 3) float32 array
+ENTRY_BYTES = 32 * 32 * 3 * 4
+
+
+def png(color):
+    buffer = BytesIO()
+    Image.new('RGB', (64, 64), color).save(buffer, format='PNG')
+    data = buffer.getvalue()
+    return hashlib.sha256(data).hexdigest(), data
+
+
+def test_repeated_image_is_served_from_the_cache():
+    cache = DecodedImageCache()
+    sha256, data = png('red')
+
+    first = cache.get(sha256, data, SPEC)
+
+    assert first.shape == (1, 32, 32, 3)
+    assert cache.get(sha256, data, SPEC) is first
+    assert not first.flags.writeable
+
+
+def test_cache_is_bounded_by_bytes():
+    cache = DecodedImageCache(max_bytes=2 * ENTRY_BYTES)
+    images = [png(color) for color in ('red', 'green', 'blue')]
+    arrays = [cache.get(sha256, data, SPEC) for sha256, data in images]
+
+    assert cache.get(*images[2], SPEC) is arrays[2]
+    assert cache.get(*images[0], SPEC) is not arrays[0]
+
+
+def test_zero_bytes_disables_the_cache():
+    cache = DecodedImageCache(max_bytes=0)
+    sha256, data = png('red')
+
+    assert cache.get(sha256, data, SPEC) is not cache.get(sha256, data, SPEC)
@@ -0,0 +1,53 @@
+import os
+
+import numpy as np
+
+from inference_scheduler import InferenceScheduler
+from model_registry import ModelRegistry
+from model_store import file_sha256
+
+
+class FileModel:
+    """Predicts the first byte of the file it was loaded from."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.value = f.read()[0]
+
+    def predict(self, batch, verbose=0):
+        return np.full((len(batch), 1), self.value, dtype=np.float32)
+
+
+def write_model(path, content, mtime):
+    path.write_bytes(content)
+    os.utime(path, (mtime, mtime))
+
+
+def test_prediction_carries_the_hash_of_the_model_that_made_it(tmp_path):
+    path = tmp_path / 'model.bin'
+    write_model(path, b'\x01old', 1_000_000)
+    registry = ModelRegistry(reload_check_interval=0)
+    registry.register('scan', str(path), loader=FileModel)
+    inference = InferenceScheduler(registry, max_wait=0)
+
+    outputs, sha256 = inference.predict_with_hash('scan', np.zeros((1, 2), dtype=np.float32))
+    assert outputs.tolist() == [[1.0]]
+    assert sha256 == file_sha256(str(path))
+
+    # A hot reload swaps the model and its hash together
+    write_model(path, b'\x02new', 2_000_000)
+    outputs, sha256 = inference.predict_with_hash('scan', np.zeros((1, 2), dtype=np.float32))
+    assert outputs.tolist() == [[2.0]]
+    assert sha256 == file_sha256(str(path)) == registry.file_hash('scan')
+    assert registry.stats()['scan']['loads'] == 2
+
+
+def test_predict_returns_only_the_rows(tmp_path):
+    path = tmp_path / 'model.bin'
+    write_model(path, b'\x03', 1_000_000)
+    registry = ModelRegistry()
+    registry.register('scan', str(path), loader=FileModel)
+
+    outputs = InferenceScheduler(registry).predict('scan', np.zeros((1, 2), dtype=np.float32))
+
+    assert outputs.tolist() == [[3.0]]
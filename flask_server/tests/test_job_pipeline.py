@@ -0,0 +1,181 @@
+import threading
+
+import pytest
+
+from fakes import (FakeBucket, FakeCollection, FakeFetcher, FakeGenerator, FakeMessages,
+                   fake_shorten)
+from job_pipeline import JobPipeline, JobQueueFull, Stage, StageError
+from notes_pipeline import build_notes_pipeline, new_notes_job_context
+from ocr_service import OCRBusyError
+from services import Services
+
+
+def wait_finished(job, timeout=10):
+    version = None
+    while not job.finished:
+        version = job.wait_for_change(version, timeout=timeout)
+    return job
+
+
+class Flaky:
+    """Fails ``failures`` times with ``error`` before succeeding."""
+
+    def __init__(self, failures, error):
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def __call__(self, context):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        context['done'] = True
+
+
+def test_transient_failures_are_retried():
+    stage = Flaky(2, ConnectionError('reset'))
+    pipeline = JobPipeline([Stage('flaky', stage, retries=2, backoff=0)])
+
+    job = wait_finished(pipeline.submit({}))
+
+    assert job.status == 'succeeded'
+    assert stage.calls == 3
+    assert job.stages['flaky']['attempts'] == 3
+
+
+def test_exhausted_retries_fail_with_500():
+    stage = Flaky(5, ConnectionError('reset'))
+    pipeline = JobPipeline([Stage('flaky', stage, retries=1, backoff=0)])
+
+    job = wait_finished(pipeline.submit({}))
+
+    assert job.status == 'failed'
+    assert job.status_code == 500
+    assert stage.calls == 2
+
+
+def test_stage_error_fails_at_once_with_its_status_code():
+    stage = Flaky(5, StageError('Invalid file type', status_code=415))
+    pipeline = JobPipeline([Stage('check', stage, retries=3, backoff=0)])
+
+    job = wait_finished(pipeline.submit({}))
+
+    assert (job.status, job.status_code, job.error) == ('failed', 415, 'Invalid file type')
+    assert stage.calls == 1
+
+
+def test_later_groups_do_not_run_after_a_failure():
+    after = Flaky(0, None)
+    pipeline = JobPipeline([Stage('bad', Flaky(1, StageError('bad')), retries=0),
+                            Stage('after', after)])
+
+    wait_finished(pipeline.submit({}))
+
+    assert after.calls == 0
+
+
+def test_submit_rejects_when_backlog_is_full():
+    release = threading.Event()
+    pipeline = JobPipeline([Stage('block', lambda context: release.wait(10))],
+                           max_workers=1, max_pending=2)
+    jobs = [pipeline.submit({}), pipeline.submit({})]
+
+    with pytest.raises(JobQueueFull):
+        pipeline.submit({})
+    release.set()
+    for job in jobs:
+        wait_finished(job)
+    assert pipeline.submit({}) is not None
+    assert pipeline.stats()['rejected'] == 1
+
+
+def test_finished_jobs_expire_by_age():
+    pipeline = JobPipeline([Stage('noop', lambda context: None)], max_age=0)
+    job = wait_finished(pipeline.submit({}))
+    assert pipeline.get(job.id) is None
+
+
+class BusyOCR:
+    def __init__(self):
+        self.calls = 0
+
+    def recognize(self, image, timeout=None):
+        self.calls += 1
+        raise OCRBusyError('OCR service is busy, try again later')
+
+
+NOTES_URL = 'https://files.local/notes'
+
+
+def notes_services(content=b'\x89PNG fake', content_type='image/png', ocr=None):
+    return Services(bucket=FakeBucket(), prescriptions=FakeCollection(),
+                    messages=FakeMessages(), shorten=fake_shorten, generate=FakeGenerator(),
+                    fetcher=FakeFetcher({NOTES_URL: (content, content_type)}), ocr=ocr,
+                    sms_from='+1', whatsapp_from='whatsapp:+1', notify_to='+2')
+
+
+def test_ocr_backlog_fails_the_job_with_503_without_retrying():
+    ocr = BusyOCR()
+    pipeline = build_notes_pipeline(notes_services(ocr=ocr), backoff=0)
+
+    job = wait_finished(pipeline.submit(new_notes_job_context(NOTES_URL, 'P', 'D')))
+
+    assert (job.status, job.status_code) == ('failed', 503)
+    assert ocr.calls == 1
+    assert 'content' not in job.context
+
+
+def test_finished_notes_job_keeps_no_file_or_document_bytes():
+    services = notes_services(content=b'Paracetamol 500mg twice a day', content_type='text/plain')
+    pipeline = build_notes_pipeline(services, backoff=0)
+
+    job = wait_finished(pipeline.submit(new_notes_job_context(NOTES_URL, 'P', 'D')))
+
+    assert job.status == 'succeeded', job.error
+    assert job.context['medicines'] == ['Paracetamol']
+    assert not {'content', 'pdf_bytes', 'qr_png'} & job.context.keys()
+
+
+class TimingOutAfterWrite:
+    """Performs the call, then fails as if the reply timed out."""
+
+    def __init__(self, target, failures=1):
+        self.target = target
+        self.failures = failures
+
+    def __getattr__(self, name):
+        method = getattr(self.target, name)
+
+        def call(*args, **kwargs):
+            method(*args, **kwargs)
+            if self.failures:
+                self.failures -= 1
+                raise TimeoutError('read timed out')
+        return call
+
+
+def test_timed_out_message_send_is_not_retried():
+    services = notes_services(content=b'Paracetamol 500mg twice a day', content_type='text/plain')
+    messages = services.messages
+    services.messages = TimingOutAfterWrite(messages, failures=2)
+    pipeline = build_notes_pipeline(services, backoff=0)
+
+    job = wait_finished(pipeline.submit(new_notes_job_context(NOTES_URL, 'P', 'D')))
+
+    assert (job.status, job.status_code) == ('failed', 500)
+    assert len(messages.sent) == 2
+    assert {job.stages[name]['attempts'] for name in ('send_sms', 'send_whatsapp')} == {1}
+
+
+def test_retried_save_stores_the_prescription_once():
+    services = notes_services(content=b'Paracetamol 500mg twice a day', content_type='text/plain')
+    collection = services.prescriptions
+    services.prescriptions = TimingOutAfterWrite(collection)
+    pipeline = build_notes_pipeline(services, backoff=0)
+
+    job = wait_finished(pipeline.submit(new_notes_job_context(NOTES_URL, 'P', 'D')))
+
+    assert job.status == 'succeeded', job.error
+    assert job.stages['save_record']['attempts'] == 2
+    assert [document['prescription_id'] for document in collection.documents] == \
+        [job.context['prescription_id']]
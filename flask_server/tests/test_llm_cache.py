@@ -0,0 +1,98 @@
+import threading
+import time
+
+from fakes import FakeGenerator
+from llm_cache import CachedGenerator
+from notes_pipeline import parse_medicine_list
+from result_cache import InProcessBackend, PredictionCache, SQLiteBackend
+
+PROMPT = 'Extract medicine from this text: Paracetamol 500mg twice a day'
+
+
+def test_concurrent_identical_prompts_make_one_upstream_call():
+    generate = FakeGenerator(delay=0.2)
+    cached = CachedGenerator(generate)
+    start = threading.Barrier(8)
+    replies = []
+
+    def ask():
+        start.wait()
+        replies.append(cached(PROMPT))
+
+    threads = [threading.Thread(target=ask) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert generate.calls == 1
+    assert len(replies) == 8 and len(set(replies)) == 1
+    stats = cached.stats()
+    assert stats['upstream_calls'] == 1
+    assert stats['coalesced'] == 7
+    assert stats['inflight'] == 0
+
+
+def test_prompts_differing_in_case_and_whitespace_share_an_entry():
+    generate = FakeGenerator()
+    cached = CachedGenerator(generate)
+
+    cached(PROMPT)
+    cached('  extract MEDICINE from this text:\nparacetamol 500mg   twice a day ')
+
+    assert generate.calls == 1
+
+
+def test_stats_count_hits_and_misses():
+    cached = CachedGenerator(FakeGenerator())
+
+    cached(PROMPT)
+    cached(PROMPT)
+    cached(PROMPT)
+
+    stats = cached.stats()
+    assert (stats['hits'], stats['misses']) == (2, 1)
+    assert round(stats['hit_rate'], 3) == 0.667
+
+
+def test_expired_entry_is_regenerated():
+    generate = FakeGenerator()
+    cached = CachedGenerator(generate, PredictionCache(InProcessBackend(), ttl=0.05))
+
+    cached(PROMPT)
+    time.sleep(0.1)
+    cached(PROMPT)
+
+    assert generate.calls == 2
+
+
+def test_rejected_replies_are_not_cached():
+    calls = []
+
+    def generate(prompt):
+        calls.append(prompt)
+        return 'Sorry, I cannot read this prescription.'
+    cached = CachedGenerator(generate, validate=parse_medicine_list)
+
+    assert cached(PROMPT) == cached(PROMPT)
+    assert len(calls) == 2
+
+
+def test_sqlite_store_survives_a_restart(tmp_path):
+    path = str(tmp_path / 'llm.sqlite')
+    first = FakeGenerator()
+    reply = CachedGenerator(first, PredictionCache(SQLiteBackend(path), ttl=60))(PROMPT)
+
+    second = FakeGenerator()
+    restarted = CachedGenerator(second, PredictionCache(SQLiteBackend(path), ttl=60))
+
+    assert restarted(PROMPT) == reply
+    assert second.calls == 0
+    assert len(restarted.cache.backend) == 1
+
+
+def test_sqlite_store_ignores_expired_rows(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / 'llm.sqlite'))
+    backend.set('llm:old', {'text': '[]'}, ttl=-1)
+
+    assert backend.get('llm:old') is None
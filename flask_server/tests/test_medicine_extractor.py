@@ -0,0 +1,77 @@
+from fakes import FakeGenerator, FakeOCR
+from medicine_extractor import MedicineExtractor
+from notes_pipeline import extract_medicines, extract_text
+from services import Services
+
+NAMES = ['amoxicillin', 'cimetidine', 'paracetamol', 'belladonna', 'belladonna tincture',
+         'Zinc', 'ibuprofen', 'allegra', 'zyprexa']
+
+
+def extractor(**kwargs):
+    return MedicineExtractor(NAMES, **kwargs)
+
+
+def test_ocr_misspellings_match_by_trigram_similarity():
+    extraction = extractor().extract('Tab Amoxicilin 500mg\nCimetidme 200 mg')
+
+    assert extraction.medicines == ['Amoxicillin', 'Cimetidine']
+    assert all(0.84 <= match.score < 1.0 for match in extraction.matches)
+    assert [match.text for match in extraction.matches] == ['amoxicilin', 'cimetidme']
+
+
+def test_multi_word_names_beat_their_prefixes():
+    extraction = extractor().extract('Belladonna tincture 10 drops')
+
+    assert extraction.medicines == ['Belladonna tincture']
+    assert extraction.matches[0].score == 1.0
+
+
+def test_words_that_are_not_close_enough_stay_unmatched():
+    extraction = extractor().extract('Take amoxil plenty of water and zinc')
+
+    assert extraction.medicines == []
+    assert extraction.confidence == 0.0
+
+
+def test_unmatched_prescription_line_lowers_confidence():
+    extraction = extractor().extract('Paracetamol 500mg\nTab Xylomet 10mg')
+
+    assert extraction.medicines == ['Paracetamol']
+    assert extraction.confidence == 0.5
+    assert not extractor().is_confident(extraction)
+    assert extractor().is_confident(extractor().extract('Ibuprofen 400mg'))
+
+
+def test_unknown_brands_in_a_comma_separated_line_lower_confidence():
+    extraction = extractor().extract(
+        'Rx: Dolo 650 1-0-1 for fever, Azithral 500 once daily, Allegra 120')
+
+    assert extraction.medicines == ['Allegra']
+    assert round(extraction.confidence, 3) == 0.333
+    assert not extractor().is_confident(extraction)
+
+
+def test_fuzzy_matches_are_never_confident():
+    extraction = extractor().extract('Tab Zyrtexa 10mg')
+
+    assert extraction.medicines == ['Zyprexa']
+    assert extraction.confidence > 0.8
+    assert not extractor().is_confident(extraction)
+
+
+def test_ocr_lines_reach_the_extractor_and_unknown_brands_fall_back_to_the_model(tmp_path,
+                                                                                 monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / 'uploads').mkdir()
+    generate = FakeGenerator(medicines=('Dolo', 'Azithral', 'Allegra'))
+    services = Services(ocr=FakeOCR('Dolo 650 1-0-1\nAzithral 500 once daily\nAllegra 120'),
+                        generate=generate, medicine_extractor=extractor())
+    context = {'file_extension': 'png', 'content': b'scan'}
+
+    extract_text(services)(context)
+    extract_medicines(services)(context)
+
+    assert context['full_text'].splitlines()[0] == 'Dolo 650 1-0-1'
+    assert context['medicine_source'] == 'model'
+    assert context['medicines'] == ['Dolo', 'Azithral', 'Allegra']
+    assert generate.calls == 1
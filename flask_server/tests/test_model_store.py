@@ -0,0 +1,60 @@
+import os
+import threading
+
+from model_store import ModelArtifactStore
+
+
+def dataset(tmp_path, content='symptoms,doctor\nfever,family doctor\n'):
+    path = tmp_path / 'dataset.csv'
+    path.write_text(content)
+    return str(path)
+
+
+def test_saved_artifact_round_trips(tmp_path):
+    store = ModelArtifactStore(str(tmp_path / 'artifacts'))
+
+    store.save('doctor', {'weights': [1, 2, 3]}, {'dataset_sha256': 'abc'})
+
+    assert store.load('doctor') == {'weights': [1, 2, 3]}
+    assert store.read_metadata('doctor')['dataset_sha256'] == 'abc'
+    assert sorted(os.listdir(tmp_path / 'artifacts')) == ['doctor.joblib', 'doctor.json']
+
+
+def test_load_or_train_trains_once_per_dataset(tmp_path):
+    store = ModelArtifactStore(str(tmp_path / 'artifacts'))
+    path = dataset(tmp_path)
+    trained = []
+
+    def train(dataset_path):
+        trained.append(dataset_path)
+        return {'rows': len(trained)}
+
+    assert store.load_or_train('doctor', path, train) == {'rows': 1}
+    assert store.load_or_train('doctor', path, train) == {'rows': 1}
+    dataset(tmp_path, 'symptoms,doctor\ncough,family doctor\n')
+    assert store.load_or_train('doctor', path, train) == {'rows': 2}
+
+
+def test_concurrent_saves_leave_one_whole_artifact(tmp_path):
+    store = ModelArtifactStore(str(tmp_path / 'artifacts'))
+    start = threading.Barrier(8)
+    errors = []
+
+    def save(worker):
+        start.wait()
+        try:
+            store.save('doctor', {'worker': worker, 'payload': [worker] * 50000},
+                       {'dataset_sha256': 'abc'})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    artifact = store.load('doctor')
+    assert artifact['payload'] == [artifact['worker']] * 50000
+    assert sorted(os.listdir(tmp_path / 'artifacts')) == ['doctor.joblib', 'doctor.json']
@@ -0,0 +1,49 @@
+import threading
+
+import pytest
+
+from ocr_service import OCRBusyError, OCRService
+
+
+class GatedEngine:
+    """OCR engine that blocks until the test opens the gate."""
+
+    def __init__(self, gate, started):
+        self.gate = gate
+        self.started = started
+        self.text_recognizer = lambda image: image
+
+    def ocr(self, image, cls=True):
+        self.started.set()
+        self.gate.wait(timeout=5)
+        return [[(None, (f'text of {image}', 0.99))]]
+
+
+def test_full_queue_rejects_with_busy_error():
+    gate, started = threading.Event(), threading.Event()
+    service = OCRService(pool_size=1, queue_size=1,
+                         engine_factory=lambda: GatedEngine(gate, started))
+
+    running = service.submit('first')
+    assert started.wait(timeout=5)
+    queued = service.submit('second')
+    with pytest.raises(OCRBusyError):
+        service.submit('third')
+    assert service.stats()['rejected'] == 1
+
+    gate.set()
+    assert running.result(timeout=5).text == 'text of first'
+    assert queued.result(timeout=5).text == 'text of second'
+    # Once the queue drains, new work is accepted again
+    assert service.recognize('fourth', timeout=5).text == 'text of fourth'
+
+
+def test_engine_failure_reaches_the_caller():
+    class BrokenEngine:
+        def ocr(self, image, cls=True):
+            raise RuntimeError('model crashed')
+
+    service = OCRService(pool_size=1, queue_size=2, engine_factory=BrokenEngine)
+
+    with pytest.raises(RuntimeError, match='model crashed'):
+        service.recognize('scan', timeout=5)
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+from fpdf import FPDF
+from PIL import Image
+
+from ocr_service import OCRResult
+from pdf_extraction import iter_pdf_pages
+
+
+class RecordingOCR:
+    """Answers every page with one line and keeps the images it was given."""
+
+    def __init__(self):
+        self.images = []
+
+    def recognize(self, image, timeout=None):
+        self.images.append(image)
+        return OCRResult(['Paracetamol 500mg', 'twice a day'], {})
+
+
+def make_pdf(tmp_path, pages):
+    """PDF whose pages hold the given text, or a scanned image for None."""
+    scan = tmp_path / 'scan.png'
+    Image.new('RGB', (40, 40), 'white').save(scan)
+    pdf = FPDF()
+    pdf.set_font('Arial', size=12)
+    for text in pages:
+        pdf.add_page()
+        if text is None:
+            pdf.image(str(scan), 10, 10, 100)
+        else:
+            pdf.cell(0, 10, text)
+    path = tmp_path / 'notes.pdf'
+    pdf.output(str(path))
+    return str(path)
+
+
+def test_image_only_pages_go_through_ocr(tmp_path):
+    ocr = RecordingOCR()
+    path = make_pdf(tmp_path, ['Page one text', None, 'Page three text'])
+
+    pages = list(iter_pdf_pages(path, ocr=ocr, dpi=50))
+
+    assert [page.source for page in pages] == ['text', 'ocr', 'text']
+    assert pages[1].text == 'Paracetamol 500mg\ntwice a day'
+    assert 'Page three text' in pages[2].text
+    assert len(ocr.images) == 1
+    assert ocr.images[0].ndim == 3 and ocr.images[0].dtype == np.uint8
+
+
+def test_image_only_pages_without_ocr_are_empty(tmp_path):
+    pages = list(iter_pdf_pages(make_pdf(tmp_path, [None, 'Page two text'])))
+
+    assert (pages[0].source, pages[0].text) == ('text', '')
+    assert 'Page two text' in pages[1].text
+
+
+def test_extraction_stops_at_the_page_budget(tmp_path):
+    ocr = RecordingOCR()
+    path = make_pdf(tmp_path, ['Page one text', 'Page two text', None])
+
+    pages = list(iter_pdf_pages(path, max_pages=2, ocr=ocr))
+
+    assert [page.page_number for page in pages] == [0, 1]
+    assert ocr.images == []
+
+
+def test_extraction_stops_at_the_character_budget(tmp_path):
+    ocr = RecordingOCR()
+    path = make_pdf(tmp_path, ['0123456789', '0123456789', None, '0123456789'])
+
+    pages = list(iter_pdf_pages(path, max_chars=15, ocr=ocr))
+
+    assert [page.text for page in pages] == ['0123456789', '01234']
+    assert ocr.images == []
+
+
+@pytest.mark.parametrize('max_chars, expected_pages', [(25, 3), (None, 12)])
+def test_parallel_extraction_keeps_page_order_and_budget(tmp_path, max_chars, expected_pages):
+    path = make_pdf(tmp_path, [f'Page {number:02d} text' for number in range(12)])
+
+    pages = list(iter_pdf_pages(path, max_chars=max_chars, processes=2, pages_per_task=2,
+                                parallel_threshold=8))
+
+    assert [page.page_number for page in pages] == list(range(expected_pages))
+    assert 'Page 00 text' in pages[0].text
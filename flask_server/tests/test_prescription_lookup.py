@@ -0,0 +1,54 @@
+import time
+
+from fakes import FakeBucket, FakeCollection
+from prescription_lookup import PrescriptionLookup, signed_url_expiry
+
+
+def stored_url(expires_at):
+    return f'https://storage.local/fake-bucket/rx.pdf?Expires={int(expires_at)}&Signature=abc'
+
+
+def lookup_with(url, **kwargs):
+    collection = FakeCollection()
+    collection.insert_one({'prescription_id': 'rx-1', 'firebase_path': url})
+    return collection, PrescriptionLookup(collection, FakeBucket(), **kwargs)
+
+
+def test_url_expiring_within_refresh_margin_is_resigned_and_written_back():
+    old_url = stored_url(time.time() + 60)
+    collection, lookup = lookup_with(old_url, refresh_margin=600)
+
+    url = lookup.get('rx-1')['firebase_path']
+
+    assert url != old_url
+    assert signed_url_expiry(url) - time.time() > 600
+    assert collection.documents[0]['firebase_path'] == url
+    assert lookup.stats()['resigned'] == 1
+
+
+def test_fresh_url_is_served_from_cache():
+    url = stored_url(time.time() + 7200)
+    collection, lookup = lookup_with(url, refresh_margin=600)
+
+    assert lookup.get('rx-1')['firebase_path'] == url
+    assert lookup.get('rx-1')['firebase_path'] == url
+
+    stats = lookup.stats()
+    assert (stats['hits'], stats['misses'], stats['resigned']) == (1, 1, 0)
+
+
+def test_cached_url_entering_refresh_margin_is_resigned():
+    url = stored_url(time.time() + 700)
+    collection, lookup = lookup_with(url, ttl=300, refresh_margin=600)
+
+    lookup.get('rx-1')
+    # The margin now covers the cached URL's remaining lifetime
+    lookup.refresh_margin = 800
+
+    assert lookup.get('rx-1')['firebase_path'] != url
+    assert lookup.stats()['resigned'] == 1
+
+
+def test_unknown_prescription_is_none():
+    _, lookup = lookup_with(stored_url(time.time() + 7200))
+    assert lookup.get('missing') is None
@@ -0,0 +1,91 @@
+from blueprints.common import services
+
+
+def test_generate_prescription_issues_pdf_record_and_qr(client):
+    response = client.post('/generate_prescription', json={
+        'patient_name': 'Asha', 'doctor_name': 'Dr. Rao',
+        'medicines': ['Paracetamol 500mg', 'Amoxicillin 250mg']})
+
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    assert response.data.startswith(b'\x89PNG')
+    record = services.prescriptions.documents[-1]
+    assert record['patient_name'] == 'Asha'
+    assert record['doctor_name'] == 'Dr. Rao'
+    pdf_path = f"Prescription/{record['prescription_id']}/pdf/" \
+               f"medical_prescription_{record['prescription_id']}.pdf"
+    pdf, _ = services.bucket.objects[pdf_path]
+    # The logo is drawn with a soft mask, which needs PDF 1.4
+    assert b'/SMask' in pdf and pdf.startswith(b'%PDF-1.4')
+    assert any('tiny.local' in message['body'] for message in services.messages.sent)
+
+
+def test_generate_prescription_reads_query_arguments(client):
+    response = client.get('/generate_prescription?patient_name=Asha&doctor_name=Dr.%20Rao'
+                          '&medicines=Paracetamol,Ibuprofen')
+    assert response.status_code == 200
+
+
+def test_generate_prescription_rejects_missing_fields(client):
+    response = client.post('/generate_prescription', json={'patient_name': 'Asha'})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'Missing doctor_name'}
+
+
+def notes_request(client):
+    services.fetcher.add('https://files.local/notes.txt', b'Paracetamol 500mg twice a day',
+                         'text/plain')
+    return client.post('/upload_handwritten_notes', json={
+        'url': 'https://files.local/notes.txt', 'patient_name': 'Asha', 'doctor_name': 'Dr. Rao'})
+
+
+def test_notes_job_qr_is_served_after_its_bytes_are_dropped(client):
+    from blueprints.prescriptions import notes_pipeline
+
+    response = notes_request(client)
+    assert response.status_code == 202
+    job = notes_pipeline.get(response.get_json()['job_id'])
+    version = None
+    while not job.finished:
+        version = job.wait_for_change(version, timeout=10)
+
+    assert job.status == 'succeeded', job.error
+    assert 'qr_png' not in job.context
+    qr = client.get(response.get_json()['qr_url'])
+    assert qr.status_code == 200
+    assert qr.data.startswith(b'\x89PNG')
+
+
+def test_full_job_backlog_is_answered_with_503(client, monkeypatch):
+    from blueprints.prescriptions import notes_pipeline
+
+    monkeypatch.setattr(notes_pipeline, 'max_pending', 0)
+    response = notes_request(client)
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+
+
+def test_bulk_prescriptions_report_partial_failure_with_207(client):
+    response = client.post('/prescriptions/bulk', json={'prescriptions': [
+        {'patient_name': 'Asha', 'doctor_name': 'Dr. Rao', 'medicines': ['Paracetamol 500mg']},
+        {'patient_name': 'Ravi', 'medicines': ['Ibuprofen 400mg']},
+    ]})
+
+    assert response.status_code == 207
+    body = response.get_json()
+    assert (body['created'], body['failed']) == (1, 1)
+    created, invalid = body['records']
+    assert created['status'] == 'created'
+    assert any(document['prescription_id'] == created['prescription_id']
+               for document in services.prescriptions.documents)
+    assert invalid == {'index': 1, 'status': 'invalid', 'error': 'Missing doctor_name'}
+
+
+def test_bulk_prescriptions_all_created_is_200(client):
+    response = client.post('/prescriptions/bulk', json={'prescriptions': [
+        {'patient_name': 'Asha', 'doctor_name': 'Dr. Rao', 'medicines': ['Paracetamol 500mg']},
+    ]})
+
+    assert response.status_code == 200
+    assert response.get_json()['failed'] == 0
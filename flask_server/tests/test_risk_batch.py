@@ -0,0 +1,59 @@
+import json
+
+import pandas as pd
+import pytest
+
+from symptom_cache import SymptomNormalizationCache
+
+
+@pytest.fixture(scope='module')
+def risk():
+    from blueprints import risk
+    return risk
+
+
+@pytest.fixture
+def risk_client(risk):
+    from app import create_app
+    return create_app(blueprints='risk').test_client()
+
+
+def small_model(risk):
+    table = pd.DataFrame({'fever': [0.2, 0.6], 'cough': [0.5, 0.3]},
+                         index=pd.Index(['low', 'high'], name='risk level'))
+    model = risk.RiskAssessmentModel(table)
+
+    def normalize(symptom):
+        if symptom == 'boom':
+            raise LookupError('Resource punkt not found')
+        return symptom
+    model.symptom_cache = SymptomNormalizationCache(normalize)
+    return model
+
+
+def test_failing_item_gets_its_own_error(risk):
+    results = small_model(risk).predict_risk_levels(['fever', 'boom', 'cough, fever', ''])
+
+    assert results[0]['risk_level'] == 'high'
+    assert results[1] == {'error': 'Resource punkt not found'}
+    assert results[2]['risk_level'] in ('low', 'high')
+    assert results[3] == {'error': 'Symptoms must be a non-empty string'}
+
+
+def test_stream_ends_with_an_error_record(risk, risk_client, monkeypatch):
+    model = small_model(risk)
+    calls = []
+
+    def predict_risk_levels(chunk):
+        calls.append(chunk)
+        if len(calls) == 2:
+            raise RuntimeError('scoring failed')
+        return model.predict_risk_levels(chunk)
+
+    monkeypatch.setattr(risk, 'PREDICT_BATCH_CHUNK_SIZE', 2)
+    monkeypatch.setattr(risk.model, 'predict_risk_levels', predict_risk_levels)
+    response = risk_client.post('/predict/batch', json=['fever', 'cough', 'fever', 'cough'])
+
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [record.get('index') for record in records[:2]] == [0, 1]
+    assert records[-1] == {'error': 'scoring failed', 'failed_from_index': 2}
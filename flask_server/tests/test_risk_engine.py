@@ -0,0 +1,67 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from risk_engine import RiskScoringEngine
+
+
+def engine():
+    table = pd.DataFrame({'fever': [0.01, 0.02, 0.015], 'cough': [0.3, 0.1, 0.2],
+                          'rash': [0.0, 0.4, 0.05]},
+                         index=pd.Index(['low', 'high', 'medium'], name='risk level'))
+    return RiskScoringEngine(table)
+
+
+@pytest.mark.parametrize('symptoms', [
+    ['fever'], ['cough', 'rash'], ['fever', 'unknown symptom'], ['rash', 'rash', 'cough'],
+])
+def test_posteriors_sum_to_one(symptoms):
+    scores = engine().score(symptoms)
+
+    assert list(scores) == ['low', 'high', 'medium']
+    assert sum(scores.values()) == pytest.approx(1.0)
+
+
+def test_long_symptom_lists_stay_finite_and_non_zero():
+    symptoms = ['fever'] * 300
+    # The linear-space product of 300 small probabilities underflows
+    assert np.prod(np.full(300, 0.01)) == 0.0
+
+    scores = engine().score(symptoms)
+
+    assert all(math.isfinite(p) and p > 0.0 for p in scores.values())
+    # The likelihood ratio of high to medium is (0.02 / 0.015) ** 300
+    assert scores['medium'] / scores['high'] == pytest.approx((0.015 / 0.02) ** 300, rel=1e-6)
+
+
+def test_unknown_symptoms_use_the_penalty_for_every_level():
+    scores = engine().score(['unknown'] * 500)
+
+    assert list(scores.values()) == pytest.approx([1 / 3] * 3)
+
+
+def test_zero_probability_is_clamped_not_fatal():
+    scores = engine().score(['rash'])
+
+    assert scores['low'] > 0.0
+    assert scores['high'] == pytest.approx(0.4 / 0.45)
+
+
+def test_score_batch_matches_repeated_score():
+    scorer = engine()
+    symptom_lists = [['fever'], ['cough', 'rash'], ['fever'] * 300, ['unknown', 'cough'],
+                     ['rash', 'rash', 'cough'], []]
+
+    batch = scorer.score_batch(symptom_lists)
+
+    assert len(batch) == len(symptom_lists)
+    for symptoms, scores in zip(symptom_lists, batch):
+        expected = scorer.score(symptoms)
+        assert list(scores) == list(expected)
+        assert list(scores.values()) == pytest.approx(list(expected.values()), rel=1e-9)
+
+
+def test_empty_batch_is_empty():
+    assert engine().score_batch([]) == []
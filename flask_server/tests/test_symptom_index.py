@@ -0,0 +1,47 @@
+import pytest
+
+from symptom_index import DOCTOR_VOCABULARY, RISK_VOCABULARY, SymptomIndex
+
+
+@pytest.fixture(scope='module')
+def index():
+    return SymptomIndex.from_datasets('Dataset/Final_csv.csv', 'Dataset/dataset.csv')
+
+
+@pytest.mark.parametrize('query, risk_term, doctor_term', [
+    ('Stomach ache', 'abdominal pain', 'abdominal pain'),
+    ('tummy ache', 'abdominal pain', 'abdominal pain'),
+    ('Head ache', 'headache', 'headache'),
+    ('muscle aches', 'muscle ache', 'muscle aches'),
+    ('Chest pian', 'chest pain', 'chest pain'),
+    ('feaver', 'fever', 'fever'),
+    ('pain chest', 'chest pain', 'chest pain'),
+    ('pain in lower abdomen', 'pain lower abdomen', 'pain in the lower abdomen'),
+    ('shortness of breth', 'shortness breath', 'shortness of breath'),
+    ('high blood presure', 'high blood pressure', 'high blood pressure'),
+    ('blood in urine', 'blood urine', 'blood in the urine'),
+])
+def test_lay_wording_and_slips_resolve_in_both_vocabularies(index, query, risk_term, doctor_term):
+    assert index.match(query, RISK_VOCABULARY).symptom == risk_term
+    assert index.match(query, DOCTOR_VOCABULARY).symptom == doctor_term
+
+
+@pytest.mark.parametrize('query', [
+    'leg pain', 'sore eyes', 'vomiting blood', 'dry cough', 'low fever',
+])
+def test_a_word_the_vocabulary_cannot_place_leaves_the_symptom_unresolved(index, query):
+    for vocabulary in (RISK_VOCABULARY, DOCTOR_VOCABULARY):
+        match = index.match(query, vocabulary)
+        assert match.symptom is None, (query, vocabulary, match.to_dict())
+
+
+def test_unknown_symptom_stays_unmatched(index):
+    match = index.match('xyzzy', RISK_VOCABULARY)
+    assert match.symptom is None
+    assert match.to_dict()['match'] is None
+
+
+def test_match_methods_are_reported(index):
+    assert index.match('Fatigue', RISK_VOCABULARY).method == 'exact'
+    assert index.match('pain chest', RISK_VOCABULARY).method == 'token'
+    assert index.match('feaver', RISK_VOCABULARY).method == 'fuzzy'
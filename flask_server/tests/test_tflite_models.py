@@ -0,0 +1,25 @@
+import pytest
+
+from tflite_models import calibration_directory
+
+
+def test_missing_calibration_directory_raises(tmp_path):
+    (tmp_path / 'doc.png').write_bytes(b'not a scan of this model')
+
+    with pytest.raises(FileNotFoundError, match='kidney_stone'):
+        calibration_directory(str(tmp_path), 'kidney_stone')
+
+
+def test_calibration_directory_without_images_raises(tmp_path):
+    (tmp_path / 'brain_tumor').mkdir()
+    (tmp_path / 'brain_tumor' / 'notes.txt').write_text('no images')
+
+    with pytest.raises(FileNotFoundError):
+        calibration_directory(str(tmp_path), 'brain_tumor')
+
+
+def test_model_directory_with_images_is_used(tmp_path):
+    (tmp_path / 'skin_cancer').mkdir()
+    (tmp_path / 'skin_cancer' / 'lesion.jpg').write_bytes(b'')
+
+    assert calibration_directory(str(tmp_path), 'skin_cancer') == str(tmp_path / 'skin_cancer')
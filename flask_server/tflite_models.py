@@ -0,0 +1,210 @@
+# Offline conversion of the Keras image classifiers to TFLite graphs, and the
+# runtime wrapper that serves them.  Convert from the flask_server directory:
+#
+#     python tflite_models.py --quantization int8 --calibration-dir calibration
+#
+# Calibration images are read from <calibration-dir>/<model name>/ and must
+# be scans of the model's own domain (kidney CT, brain MRI, skin lesions):
+# int8 activation ranges and the parity check are only meaningful on them.
+# The run stops before converting anything when a model has none.  A graph
+# is only written when its predictions agree with the .h5 model on them.
+
+import argparse
+import logging
+import os
+import sys
+import threading
+
+import numpy as np
+
+from image_models import IMAGE_MODELS, QUANTIZATIONS, tflite_path
+from image_preprocessing import preprocess_image
+from model_registry import load_keras_model
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+
+def tflite_interpreter(path, num_threads=None):
+    # The standalone LiteRT / tflite-runtime packages are a few MB; full
+    # TensorFlow also provides the interpreter
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=path, num_threads=num_threads)
+
+
+class TFLiteModel:
+    """A converted graph with the part of the Keras model interface the
+    registry and inference scheduler use (``predict`` and ``input_shape``).
+
+    The input tensor is resized to each batch's size, and int8 inputs and
+    outputs are quantized and dequantized here, so callers always pass and
+    get float32 arrays.  The interpreter is not thread-safe; calls are
+    serialized.
+    """
+
+    def __init__(self, path, num_threads=None):
+        self.path = path
+        self.interpreter = tflite_interpreter(path, num_threads)
+        self.interpreter.allocate_tensors()
+        self._refresh_details()
+        self.input_shape = (None,) + tuple(self._input['shape'][1:])
+        self.memory_bytes = os.path.getsize(path)
+        self._lock = threading.Lock()
+
+    def _refresh_details(self):
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+
+    @staticmethod
+    def _quantize(values, details):
+        scale, zero_point = details['quantization']
+        if not scale:
+            return values.astype(details['dtype'], copy=False)
+        info = np.iinfo(details['dtype'])
+        return np.clip(np.round(values / scale + zero_point), info.min, info.max).astype(details['dtype'])
+
+    @staticmethod
+    def _dequantize(values, details):
+        scale, zero_point = details['quantization']
+        if not scale:
+            return values.astype(np.float32, copy=False)
+        return (values.astype(np.float32) - zero_point) * scale
+
+    def predict(self, inputs, verbose=0):
+        with self._lock:
+            if self._input['shape'][0] != len(inputs):
+                self.interpreter.resize_tensor_input(
+                    self._input['index'], (len(inputs),) + tuple(self._input['shape'][1:]))
+                self.interpreter.allocate_tensors()
+                self._refresh_details()
+            self.interpreter.set_tensor(self._input['index'], self._quantize(inputs, self._input))
+            self.interpreter.invoke()
+            return self._dequantize(self.interpreter.get_tensor(self._output['index']), self._output)
+
+
+def load_tflite_model(path, num_threads=None):
+    return TFLiteModel(path, num_threads)
+
+
+# Preprocessed (n, height, width, channels) batch of up to `limit` images
+# from a directory, in file name order
+def load_calibration_images(directory, spec, limit=200):
+    names = sorted(name for name in os.listdir(directory)
+                   if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS)[:limit]
+    batch = np.empty((len(names),) + spec.shape, dtype=spec.dtype)
+    for i, name in enumerate(names):
+        with open(os.path.join(directory, name), 'rb') as f:
+            batch[i] = preprocess_image(f.read(), spec)[0]
+    return batch
+
+
+# <directory>/<name>/ of a model's in-domain calibration images; raises
+# FileNotFoundError when it is missing or holds no images
+def calibration_directory(directory, name):
+    model_directory = os.path.join(directory, name)
+    if not os.path.isdir(model_directory) or not any(
+            os.path.splitext(file_name)[1].lower() in IMAGE_EXTENSIONS
+            for file_name in os.listdir(model_directory)):
+        raise FileNotFoundError(
+            f"No calibration images for '{name}' in {model_directory}; add in-domain "
+            f"sample scans for this model")
+    return model_directory
+
+
+def convert_keras_model(model, quantization='float32', calibration=None):
+    """Serialized TFLite graph of a Keras model.  float16 halves the weights;
+    int8 quantizes weights and activations with ranges measured on the
+    ``calibration`` batch, keeping float32 inputs and outputs."""
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    if quantization == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        if calibration is None or not len(calibration):
+            raise ValueError('int8 quantization needs calibration images')
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = lambda: ([sample[np.newaxis]] for sample in calibration)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    elif quantization != 'float32':
+        raise ValueError(f"Unknown quantization: {quantization}")
+    return converter.convert()
+
+
+def parity_check(reference, candidate, inputs, batch_size=16):
+    """Agreement between two models' predictions on the same inputs: share
+    of identical top-1 classes and the largest and mean absolute difference
+    of the output probabilities."""
+    expected, actual = [], []
+    for start in range(0, len(inputs), batch_size):
+        batch = inputs[start:start + batch_size]
+        expected.append(np.asarray(reference.predict(batch, verbose=0), dtype=np.float32))
+        actual.append(np.asarray(candidate.predict(batch, verbose=0), dtype=np.float32))
+    expected, actual = np.concatenate(expected), np.concatenate(actual)
+    difference = np.abs(expected - actual)
+    return {
+        'samples': len(inputs),
+        'top1_agreement': float(np.mean(expected.argmax(axis=1) == actual.argmax(axis=1))),
+        'max_abs_diff': float(difference.max()),
+        'mean_abs_diff': float(difference.mean()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert the image models to TFLite graphs.')
+    parser.add_argument('--models', default=','.join(IMAGE_MODELS),
+                        help='comma-separated model names')
+    parser.add_argument('--quantization', choices=QUANTIZATIONS, default='float32')
+    parser.add_argument('--calibration-dir', default='calibration',
+                        help='directory with one sub-directory of in-domain sample '
+                             'images per model')
+    parser.add_argument('--samples', type=int, default=200,
+                        help='calibration images used per model')
+    parser.add_argument('--min-agreement', type=float, default=0.99,
+                        help='top-1 agreement with the .h5 model required to write a graph')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    names = args.models.split(',')
+    # Checked for every model up front, so a missing directory fails the run
+    # before any conversion
+    calibration_dirs = {name: calibration_directory(args.calibration_dir, name)
+                        for name in names}
+
+    failed = []
+    for name in names:
+        keras_path, spec = IMAGE_MODELS[name]
+        samples = load_calibration_images(calibration_dirs[name], spec, args.samples)
+        model = load_keras_model(keras_path)
+        graph = convert_keras_model(model, args.quantization, samples)
+
+        # Written under a temporary name and only moved into place (where a
+        # hot-reloading server picks it up) once parity holds
+        out_path = tflite_path(keras_path, args.quantization)
+        tmp_path = out_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(graph)
+        report = parity_check(model, TFLiteModel(tmp_path), samples)
+        logging.info(f"{name} {args.quantization}: {len(graph) / 2**20:.2f} MiB "
+                     f"(h5 {os.path.getsize(keras_path) / 2**20:.2f} MiB), parity {report}")
+        if report['top1_agreement'] < args.min_agreement:
+            os.remove(tmp_path)
+            logging.error(f"{name}: top-1 agreement {report['top1_agreement']:.3f} is below "
+                          f"{args.min_agreement}; {out_path} not written")
+            failed.append(name)
+        else:
+            os.replace(tmp_path, out_path)
+            logging.info(f"Wrote {out_path}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())